@@ -0,0 +1,248 @@
+"""Delirium rates aggregated on request from encounter-level records."""
+
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from api.columnar import QUARTERS, construct, require_columns
+from api.models import AggregatedRate, AggregationPeriod
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+ENCOUNTER_COLUMNS = ["admission_date", "ward", "delirium"]
+MAX_ROLLING_WINDOW = 36
+
+
+def month_ordinal(year: int, month: int) -> int:
+    """
+    Encode a month as an integer that sorts chronologically.
+
+    Parameters
+    ----------
+    year : int
+        The year.
+    month : int
+        The month of the year, from 1 to 12.
+
+    Returns
+    -------
+    int
+        ``year * 12`` plus the zero-based month number.
+    """
+    return year * 12 + month - 1
+
+
+def month_label(ordinal: int) -> str:
+    """Return the ``YYYY-MM`` label of a month ordinal."""
+    year, month = divmod(ordinal, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+@dataclass
+class Aggregate:
+    """
+    The rates of every ward and period for one aggregation.
+
+    Attributes
+    ----------
+    wards : np.ndarray
+        Ward code of each rate.
+    ends : np.ndarray
+        Month ordinal of the last month of each rate's period.
+    rates : List[AggregatedRate]
+        The rates, in ``(ward, period)`` order.
+    """
+
+    wards: np.ndarray
+    ends: np.ndarray
+    rates: List[AggregatedRate]
+
+
+class EncounterTable:
+    """
+    Monthly encounter and delirium case counts per ward.
+
+    Encounters are reduced once, with a single ``np.bincount`` over a numeric
+    ``(ward, month)`` key, to two ``wards x months`` count matrices. Quarters
+    are sums of three month columns and rolling windows are differences of
+    cumulative sums, so every aggregation is a handful of vectorized array
+    operations whatever the number of encounters. Aggregations are memoized on
+    the table, which is rebuilt once per version of the encounters object.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame with ``admission_date``, ``ward`` and ``delirium`` columns,
+        one row per encounter. ``delirium`` is a 0/1 or boolean flag.
+
+    Raises
+    ------
+    ValueError
+        If a column is missing or has missing or invalid values.
+    """
+
+    def __init__(self, df: "pd.DataFrame") -> None:
+        import pandas as pd  # noqa: PLC0415
+
+        self._aggregates: Dict[Tuple[AggregationPeriod, int], Aggregate] = {}
+        self._lock = threading.Lock()
+        if df.empty:
+            self.ward_names: List[str] = []
+            self.first_month = 0
+            self.encounters = np.zeros((0, 0), dtype=np.int64)
+            self.cases = np.zeros((0, 0), dtype=np.int64)
+            return
+        require_columns(df, ENCOUNTER_COLUMNS)
+        dates = pd.to_datetime(df["admission_date"], errors="coerce")
+        if dates.isna().any():
+            raise ValueError("Column 'admission_date' has missing or invalid dates")
+        flags = pd.to_numeric(df["delirium"], errors="coerce")
+        if flags.isna().any():
+            raise ValueError("Column 'delirium' has missing or non-numeric values")
+        if df["ward"].isna().any():
+            raise ValueError("Column 'ward' has missing values")
+        codes, names = pd.factorize(df["ward"].astype(str), sort=True)
+        # Months since 1970-01, shifted to month ordinals.
+        months = (
+            dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+        ).astype(np.int64) + month_ordinal(1970, 1)
+        self.ward_names = [str(name) for name in names]
+        self.first_month = int(months.min())
+        n_months = int(months.max()) - self.first_month + 1
+        shape = (len(self.ward_names), n_months)
+        key = codes.astype(np.int64) * n_months + (months - self.first_month)
+        self.encounters = np.bincount(key, minlength=shape[0] * n_months).reshape(shape)
+        self.cases = np.bincount(
+            key[flags.to_numpy() != 0], minlength=shape[0] * n_months
+        ).reshape(shape)
+
+    def aggregate(self, period: AggregationPeriod, window: int = 3) -> Aggregate:
+        """
+        Return the rates of every ward and period, computing them once.
+
+        Parameters
+        ----------
+        period : AggregationPeriod
+            Calendar quarters, calendar months, or rolling windows of
+            ``window`` months ending in each month.
+        window : int, optional
+            Length of the rolling windows in months, by default 3. Ignored for
+            the other periods.
+
+        Returns
+        -------
+        Aggregate
+            The rates, skipping periods without encounters.
+        """
+        key = (period, window if period == AggregationPeriod.ROLLING else 0)
+        with self._lock:
+            cached = self._aggregates.get(key)
+        if cached is not None:
+            return cached
+        aggregate = self._compute(period, window)
+        with self._lock:
+            return self._aggregates.setdefault(key, aggregate)
+
+    def query(
+        self,
+        period: AggregationPeriod,
+        window: int = 3,
+        wards: Optional[Sequence[str]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> List[AggregatedRate]:
+        """
+        Return the rates matching the filters, in ``(ward, period)`` order.
+
+        Parameters
+        ----------
+        period : AggregationPeriod
+            The aggregation period, see ``aggregate``.
+        window : int, optional
+            Length of the rolling windows in months, by default 3.
+        wards : Optional[Sequence[str]], optional
+            Wards to include, by default all of them.
+        start : Optional[int], optional
+            Month ordinal of the first period end to include, by default
+            unbounded.
+        end : Optional[int], optional
+            Month ordinal of the last period end to include, by default
+            unbounded.
+
+        Returns
+        -------
+        List[AggregatedRate]
+            The matching rates.
+        """
+        aggregate = self.aggregate(period, window)
+        if wards is None and start is None and end is None:
+            return aggregate.rates
+        mask = np.ones(len(aggregate.rates), dtype=bool)
+        if wards is not None:
+            selected = set(wards)
+            codes = [i for i, name in enumerate(self.ward_names) if name in selected]
+            mask &= np.isin(aggregate.wards, codes)
+        if start is not None:
+            mask &= aggregate.ends >= start
+        if end is not None:
+            mask &= aggregate.ends <= end
+        return [aggregate.rates[i] for i in np.flatnonzero(mask)]
+
+    def _compute(self, period: AggregationPeriod, window: int) -> Aggregate:
+        """Aggregate the monthly counts over a period."""
+        encounters, cases = self.encounters, self.cases
+        n_wards, n_months = encounters.shape
+        if n_months == 0:
+            return Aggregate(np.empty(0, np.int64), np.empty(0, np.int64), [])
+        if period == AggregationPeriod.QUARTER:
+            # Pad to whole calendar quarters, then sum each group of 3 months.
+            lead = self.first_month % 3
+            trail = -(lead + n_months) % 3
+            padding = ((0, 0), (lead, trail))
+            encounters = np.pad(encounters, padding).reshape(n_wards, -1, 3).sum(2)
+            cases = np.pad(cases, padding).reshape(n_wards, -1, 3).sum(2)
+            starts = self.first_month - lead + 3 * np.arange(encounters.shape[1])
+            ends = starts + 2
+        elif period == AggregationPeriod.ROLLING:
+            # Window sums as differences of cumulative sums along the months.
+            lower = np.maximum(np.arange(1, n_months + 1) - window, 0)
+            totals = np.zeros((n_wards, n_months + 1), dtype=np.int64)
+            np.cumsum(encounters, axis=1, out=totals[:, 1:])
+            encounters = totals[:, 1:] - totals[:, lower]
+            np.cumsum(cases, axis=1, out=totals[:, 1:])
+            cases = totals[:, 1:] - totals[:, lower]
+            ends = self.first_month + np.arange(n_months)
+            starts = ends - window + 1
+        else:
+            starts = ends = self.first_month + np.arange(n_months)
+
+        ward_codes, columns = np.nonzero(encounters)
+        counts = encounters[ward_codes, columns]
+        positives = cases[ward_codes, columns]
+        period_starts = starts[columns]
+        period_ends = ends[columns]
+        if period == AggregationPeriod.QUARTER:
+            labels = [
+                f"{QUARTERS[(month % 12) // 3]} {month // 12}"
+                for month in period_starts.tolist()
+            ]
+        else:
+            labels = [month_label(month) for month in period_ends.tolist()]
+        rates = construct(
+            AggregatedRate,
+            {
+                "ward": [self.ward_names[code] for code in ward_codes.tolist()],
+                "period": labels,
+                "start": [month_label(month) for month in period_starts.tolist()],
+                "end": [month_label(month) for month in period_ends.tolist()],
+                "encounters": counts.tolist(),
+                "cases": positives.tolist(),
+                "rate": (100.0 * positives / counts).tolist(),
+            },
+        )
+        return Aggregate(ward_codes, period_ends, rates)
@@ -0,0 +1,561 @@
+"""In-process cache for datasets loaded from MinIO."""
+
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+DATASET_CACHE_TTL = float(os.getenv("DATASET_CACHE_TTL", "30"))
+DATASET_CACHE_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", str(256 * 2**20)))
+# Containers with more items than this are sized from a sample of about as many.
+SIZE_SAMPLE = 1024
+
+T = TypeVar("T")
+
+ObjectKey = Tuple[str, str]
+CacheKey = Tuple[str, str, str]
+# Returns a dataset with the named delta partitions appended to it.
+Extend = Callable[["pd.DataFrame", List[str]], "pd.DataFrame"]
+
+
+@dataclass
+class ObjectVersion:
+    """
+    Version identifier of an object in the object store.
+
+    Attributes
+    ----------
+    etag : str
+        The ETag reported by the object store.
+    last_modified : Optional[float]
+        The last-modified timestamp of the object, in seconds since the epoch.
+    parts : Tuple[Tuple[str, str], ...]
+        For a dataset made of a base object and delta partitions, the name and
+        ETag of each object in the order they are merged, empty otherwise.
+    """
+
+    etag: str
+    last_modified: Optional[float] = None
+    parts: Tuple[Tuple[str, str], ...] = ()
+
+    @classmethod
+    def from_stat(cls, stat: Any) -> "ObjectVersion":
+        """
+        Build a version from the result of ``Minio.stat_object``.
+
+        Parameters
+        ----------
+        stat : Any
+            The object returned by ``stat_object``.
+
+        Returns
+        -------
+        ObjectVersion
+            The object version.
+        """
+        last_modified = getattr(stat, "last_modified", None)
+        return cls(
+            etag=str(stat.etag),
+            last_modified=last_modified.timestamp() if last_modified else None,
+        )
+
+    @classmethod
+    def combine(cls, parts: Sequence[Tuple[str, "ObjectVersion"]]) -> "ObjectVersion":
+        """
+        Build the version of a dataset made of several objects.
+
+        Parameters
+        ----------
+        parts : Sequence[Tuple[str, ObjectVersion]]
+            The name and version of the base object, then of each delta
+            partition in the order they are merged.
+
+        Returns
+        -------
+        ObjectVersion
+            The version of the base object if there are no partitions, else a
+            version whose ETag changes whenever any of the objects does.
+        """
+        if len(parts) == 1:
+            return parts[0][1]
+        digest = hashlib.sha256()
+        for name, version in parts:
+            digest.update(f"{name}\0{version.etag}\0".encode())
+        modified = [v.last_modified for _, v in parts if v.last_modified is not None]
+        return cls(
+            etag=digest.hexdigest()[:32],
+            last_modified=max(modified, default=None),
+            parts=tuple((name, version.etag) for name, version in parts),
+        )
+
+    def appended_to(self, previous: "ObjectVersion") -> Optional[List[str]]:
+        """
+        Return the partitions appended to ``previous`` to get this version.
+
+        Parameters
+        ----------
+        previous : ObjectVersion
+            An earlier version of the same dataset.
+
+        Returns
+        -------
+        Optional[List[str]]
+            The names of the new partitions, or None if this version is not
+            ``previous`` with partitions added after its last one, e.g. because
+            an object was rewritten or removed.
+        """
+        if not self.parts:
+            return None
+        before = previous.parts or ((self.parts[0][0], previous.etag),)
+        if len(self.parts) <= len(before) or self.parts[: len(before)] != before:
+            return None
+        return [name for name, _ in self.parts[len(before) :]]
+
+
+@dataclass
+class CacheEntry:
+    """
+    A cached dataset.
+
+    Attributes
+    ----------
+    key : CacheKey
+        The key the entry is cached under.
+    data : pd.DataFrame
+        The parsed dataset.
+    version : ObjectVersion
+        The version of the object the dataset was parsed from.
+    data_size : int
+        Approximate in-memory size of the dataset, in bytes.
+    derived : Dict[str, Any]
+        Structures built from the dataset, such as indexes, keyed by name.
+    derived_size : int
+        Approximate in-memory size of the derived structures, in bytes.
+    """
+
+    key: CacheKey
+    data: "pd.DataFrame"
+    version: ObjectVersion
+    data_size: int
+    derived: Dict[str, Any] = field(default_factory=dict)
+    derived_size: int = 0
+
+    @property
+    def size(self) -> int:
+        """Approximate in-memory size of the dataset and its derived structures."""
+        return self.data_size + self.derived_size
+
+
+@dataclass
+class VersionEntry:
+    """
+    The last known version of an object.
+
+    Attributes
+    ----------
+    version : ObjectVersion
+        The version reported by the store.
+    validated_at : float
+        Monotonic time at which the version was checked against the store.
+    """
+
+    version: ObjectVersion
+    validated_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters describing cache effectiveness.
+
+    Attributes
+    ----------
+    hits : int
+        Lookups served from memory without contacting the store.
+    revalidations : int
+        Lookups served from memory after a ``stat_object`` confirmed the version.
+    misses : int
+        Lookups that required a full download and parse.
+    appends : int
+        Lookups served by parsing only the partitions appended to a dataset.
+    evictions : int
+        Entries dropped to stay within the size budget.
+    """
+
+    hits: int = 0
+    revalidations: int = 0
+    misses: int = 0
+    appends: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """
+        Return the counters as a dictionary.
+
+        Returns
+        -------
+        Dict[str, int]
+            The counters keyed by name.
+        """
+        return {
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+            "appends": self.appends,
+            "evictions": self.evictions,
+        }
+
+
+class DatasetCache:
+    """
+    Cache of parsed datasets keyed on ``(bucket, object, read options)``.
+
+    Object versions are trusted for ``ttl`` seconds, during which cached datasets
+    are served without contacting the store. After that the version is
+    revalidated with a single ``stat_object`` call, and datasets are only
+    downloaded and parsed again when the object's ETag has changed. When delta
+    partitions were only appended, just those are parsed and merged into the
+    cached dataset. The total size of the cached frames and of the structures
+    derived from them is kept under ``max_bytes`` by evicting the least
+    recently used entries.
+
+    Parameters
+    ----------
+    ttl : float
+        Seconds during which an object version is trusted without revalidation.
+    max_bytes : int
+        Upper bound on the combined size of the cached datasets and their
+        derived structures.
+    """
+
+    def __init__(
+        self, ttl: float = DATASET_CACHE_TTL, max_bytes: int = DATASET_CACHE_MAX_BYTES
+    ) -> None:
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._versions: Dict[ObjectKey, VersionEntry] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Combined size of the cached datasets and their derived structures."""
+        return self._size
+
+    def __len__(self) -> int:
+        """Return the number of cached datasets."""
+        return len(self._entries)
+
+    def get(
+        self,
+        key: CacheKey,
+        stat: Callable[[], ObjectVersion],
+        load: Callable[[], "pd.DataFrame"],
+        extend: Optional[Extend] = None,
+    ) -> "pd.DataFrame":
+        """
+        Return the dataset for ``key``, loading it if needed.
+
+        Parameters
+        ----------
+        key : CacheKey
+            The bucket, object and read options identifying the dataset.
+        stat : Callable[[], ObjectVersion]
+            Returns the current version of the object in the store.
+        load : Callable[[], pd.DataFrame]
+            Downloads and parses the object.
+        extend : Optional[Extend], optional
+            Appends the named delta partitions to a dataset, see ``get_entry``.
+
+        Returns
+        -------
+        pd.DataFrame
+            The cached or freshly loaded dataset.
+        """
+        return self.get_entry(key, stat, load, extend).data
+
+    def get_entry(
+        self,
+        key: CacheKey,
+        stat: Callable[[], ObjectVersion],
+        load: Callable[[], "pd.DataFrame"],
+        extend: Optional[Extend] = None,
+    ) -> CacheEntry:
+        """
+        Return the cache entry for ``key``, loading the dataset if needed.
+
+        Parameters
+        ----------
+        key : CacheKey
+            The bucket, object and read options identifying the dataset.
+        stat : Callable[[], ObjectVersion]
+            Returns the current version of the object in the store.
+        load : Callable[[], pd.DataFrame]
+            Downloads and parses the base object.
+        extend : Optional[Extend], optional
+            Returns a dataset with the named delta partitions appended, used
+            when the version has ``parts``. If the cached dataset only misses
+            partitions appended since, it is extended instead of reloaded.
+
+        Returns
+        -------
+        CacheEntry
+            The cached or freshly loaded entry.
+        """
+        object_key = (key[0], key[1])
+        with self._lock:
+            entry = self._entries.get(key)
+            known = self._fresh_version(object_key)
+            if (
+                entry is not None
+                and known is not None
+                and entry.version.etag == known.etag
+            ):
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry
+
+        version = known or self._revalidate(object_key, stat)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version.etag == version.etag:
+                self._entries.move_to_end(key)
+                self.stats.revalidations += 1
+                return entry
+
+        appended = None
+        if entry is not None and extend is not None:
+            appended = version.appended_to(entry.version)
+        if entry is not None and extend is not None and appended is not None:
+            data = extend(entry.data, appended)
+            # Only measure the appended rows, sizing deep is linear in the rows.
+            size = entry.data_size + _frame_size(data.iloc[len(entry.data) :])
+        else:
+            data = load()
+            if extend is not None and len(version.parts) > 1:
+                data = extend(data, [name for name, _ in version.parts[1:]])
+            size = _frame_size(data)
+        entry = CacheEntry(key, data, version, size)
+        with self._lock:
+            if appended is None:
+                self.stats.misses += 1
+            else:
+                self.stats.appends += 1
+            self._store(key, entry)
+        return entry
+
+    def derive(
+        self, entry: CacheEntry, name: str, build: Callable[["pd.DataFrame"], T]
+    ) -> T:
+        """
+        Return a structure derived from a cached dataset, building it once.
+
+        Derived structures live on the entry, so they are rebuilt exactly when
+        the dataset is reloaded for a new object version. Their size counts
+        towards the entry's, and so towards ``max_bytes``.
+
+        Parameters
+        ----------
+        entry : CacheEntry
+            The entry returned by ``get_entry``.
+        name : str
+            Name identifying the derived structure.
+        build : Callable[[pd.DataFrame], T]
+            Builds the structure from the dataset.
+
+        Returns
+        -------
+        T
+            The derived structure.
+        """
+        with self._lock:
+            if name in entry.derived:
+                return cast(T, entry.derived[name])
+        derived = build(entry.data)
+        size = _object_size(derived)
+        with self._lock:
+            if name in entry.derived:
+                return cast(T, entry.derived[name])
+            entry.derived[name] = derived
+            entry.derived_size += size
+            if self._entries.get(entry.key) is entry:
+                self._size += size
+                self._trim()
+        return derived
+
+    def version(
+        self, object_key: ObjectKey, stat: Callable[[], ObjectVersion]
+    ) -> ObjectVersion:
+        """
+        Return the current version of an object.
+
+        The known version is returned while it is within the TTL, so this costs
+        at most one ``stat_object`` call and never downloads the object.
+
+        Parameters
+        ----------
+        object_key : ObjectKey
+            The ``(bucket, object)`` pair identifying the object.
+        stat : Callable[[], ObjectVersion]
+            Returns the current version of the object in the store.
+
+        Returns
+        -------
+        ObjectVersion
+            The version of the object.
+        """
+        with self._lock:
+            known = self._fresh_version(object_key)
+        return known or self._revalidate(object_key, stat)
+
+    def invalidate(self, object_key: ObjectKey) -> int:
+        """
+        Drop the known version and all cached datasets of an object.
+
+        Parameters
+        ----------
+        object_key : ObjectKey
+            The ``(bucket, object)`` pair identifying the object.
+
+        Returns
+        -------
+        int
+            The number of datasets dropped.
+        """
+        with self._lock:
+            self._versions.pop(object_key, None)
+            keys = [key for key in self._entries if key[:2] == object_key]
+            for key in keys:
+                self._size -= self._entries.pop(key).size
+            return len(keys)
+
+    def expire(self, object_key: ObjectKey) -> None:
+        """
+        Forget the known version of an object, keeping its cached datasets.
+
+        The next lookup revalidates the version, and reuses or extends the
+        cached datasets if they still match it.
+
+        Parameters
+        ----------
+        object_key : ObjectKey
+            The ``(bucket, object)`` pair identifying the object.
+        """
+        with self._lock:
+            self._versions.pop(object_key, None)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._size = 0
+            self.stats = CacheStats()
+
+    def _fresh_version(self, object_key: ObjectKey) -> Optional[ObjectVersion]:
+        """Return the known version of an object if it is within the TTL."""
+        known = self._versions.get(object_key)
+        if known is not None and time.monotonic() - known.validated_at < self.ttl:
+            return known.version
+        return None
+
+    def _revalidate(
+        self, object_key: ObjectKey, stat: Callable[[], ObjectVersion]
+    ) -> ObjectVersion:
+        """Fetch the version of an object from the store and remember it."""
+        version = stat()
+        with self._lock:
+            self._versions[object_key] = VersionEntry(version)
+        return version
+
+    def _store(self, key: CacheKey, entry: CacheEntry) -> None:
+        """Insert ``entry`` and evict least recently used entries over budget."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous.size
+        if entry.size > self.max_bytes:
+            logger.warning(
+                f"Dataset {key} ({entry.size} bytes) exceeds the cache budget, "
+                "not caching"
+            )
+            return
+        self._entries[key] = entry
+        self._size += entry.size
+        self._trim()
+
+    def _trim(self) -> None:
+        """Evict least recently used entries until the cache is within budget."""
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            self.stats.evictions += 1
+
+
+def _frame_size(df: "pd.DataFrame") -> int:
+    """Return the in-memory size of ``df``, in bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _object_size(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """
+    Return the approximate deep in-memory size of ``obj``, in bytes.
+
+    Objects reachable more than once are counted once, and classes and enum
+    members, which are shared, are not counted. Containers with more than
+    ``SIZE_SAMPLE`` items are sized from an evenly spaced sample of them.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, (type, Enum)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return (
+            size + _items_size(list(obj), seen) + _items_size(list(obj.values()), seen)
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + _items_size(list(obj), seen)
+    for klass in type(obj).__mro__:
+        for slot in getattr(klass, "__slots__", ()):
+            if slot != "__dict__" and hasattr(obj, slot):
+                size += _object_size(getattr(obj, slot), seen)
+    if hasattr(obj, "__dict__"):
+        size += _object_size(vars(obj), seen)
+    return size
+
+
+def _items_size(items: List[Any], seen: Set[int]) -> int:
+    """Return the deep size of the items of a container, sampling long ones."""
+    if len(items) <= SIZE_SAMPLE:
+        return sum(_object_size(item, seen) for item in items)
+    sample = items[:: len(items) // SIZE_SAMPLE]
+    return sum(_object_size(item, seen) for item in sample) * len(items) // len(sample)
@@ -0,0 +1,310 @@
+"""Columnar conversion of datasets into response models."""
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
+
+import numpy as np
+
+from api.models import (
+    DeliriumRate,
+    DemographicItem,
+    DemographicValue,
+    Quarter,
+    TimeSeriesData,
+)
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+QUARTERS = [quarter.value for quarter in Quarter]
+
+
+def require_columns(df: "pd.DataFrame", columns: List[str]) -> None:
+    """
+    Check that a DataFrame has the given columns.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame to check.
+    columns : List[str]
+        The required column names.
+
+    Raises
+    ------
+    ValueError
+        If any of the columns is missing.
+    """
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+
+def to_float(column: "pd.Series") -> List[float]:
+    """
+    Coerce a column to floats, rejecting missing values.
+
+    Parameters
+    ----------
+    column : pd.Series
+        The column to convert.
+
+    Returns
+    -------
+    List[float]
+        The column values.
+
+    Raises
+    ------
+    ValueError
+        If the column has missing or non-numeric values.
+    """
+    import pandas as pd  # noqa: PLC0415
+
+    values = pd.to_numeric(column, errors="coerce").astype(float)
+    if values.isna().any():
+        raise ValueError(f"Column {column.name!r} has missing or non-numeric values")
+    return list(values.tolist())
+
+
+def to_int(column: "pd.Series") -> List[int]:
+    """
+    Coerce a column to integers, rejecting missing or fractional values.
+
+    Parameters
+    ----------
+    column : pd.Series
+        The column to convert.
+
+    Returns
+    -------
+    List[int]
+        The column values.
+
+    Raises
+    ------
+    ValueError
+        If the column has missing, non-numeric or fractional values.
+    """
+    values = np.asarray(to_float(column))
+    if not np.array_equal(values, np.trunc(values)):
+        raise ValueError(f"Column {column.name!r} has non-integer values")
+    return list(values.astype(np.int64).tolist())
+
+
+def to_optional_float(column: "pd.Series") -> List[Optional[float]]:
+    """
+    Coerce a column to floats, mapping missing values to None.
+
+    Parameters
+    ----------
+    column : pd.Series
+        The column to convert.
+
+    Returns
+    -------
+    List[Optional[float]]
+        The column values.
+    """
+    import pandas as pd  # noqa: PLC0415
+
+    values = pd.to_numeric(column, errors="coerce").astype(float)
+    return list(values.astype(object).where(values.notna(), None).tolist())
+
+
+def to_str(column: "pd.Series", default: str = "") -> List[str]:
+    """
+    Coerce a column to strings, mapping missing values to ``default``.
+
+    Parameters
+    ----------
+    column : pd.Series
+        The column to convert.
+    default : str, optional
+        The value used for missing entries, by default "".
+
+    Returns
+    -------
+    List[str]
+        The column values.
+    """
+    return list(column.astype(object).where(column.notna(), default).astype(str))
+
+
+def to_quarter(column: "pd.Series") -> List[Quarter]:
+    """
+    Coerce a column to quarters.
+
+    Parameters
+    ----------
+    column : pd.Series
+        The column to convert.
+
+    Returns
+    -------
+    List[Quarter]
+        The column values.
+
+    Raises
+    ------
+    ValueError
+        If the column has values that are not quarters.
+    """
+    import pandas as pd  # noqa: PLC0415
+
+    codes = pd.Categorical(column, categories=QUARTERS).codes
+    if (codes < 0).any():
+        raise ValueError(f"Column {column.name!r} has invalid quarters")
+    members = list(Quarter)
+    return [members[code] for code in codes.tolist()]
+
+
+def construct(model: Type[Any], columns: Dict[str, List[Any]]) -> List[Any]:
+    """
+    Build models from already validated columns.
+
+    Parameters
+    ----------
+    model : Type[Any]
+        The pydantic model class.
+    columns : Dict[str, List[Any]]
+        Column values keyed by field name, all of the same length.
+
+    Returns
+    -------
+    List[Any]
+        One model per row, built without revalidation.
+    """
+    names = list(columns)
+    return [
+        model.model_construct(**dict(zip(names, row))) for row in zip(*columns.values())
+    ]
+
+
+def rates_from_frame(df: "pd.DataFrame") -> List[DeliriumRate]:
+    """
+    Convert a delirium rates DataFrame into response models.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame with ``quarter``, ``year``, ``rate`` and ``ward`` columns.
+
+    Returns
+    -------
+    List[DeliriumRate]
+        One delirium rate per row.
+    """
+    if df.empty:
+        return []
+    require_columns(df, ["quarter", "year", "rate", "ward"])
+    return construct(
+        DeliriumRate,
+        {
+            "quarter": to_quarter(df["quarter"]),
+            "year": to_int(df["year"]),
+            "rate": to_float(df["rate"]),
+            "ward": to_str(df["ward"]),
+        },
+    )
+
+
+def time_trends_from_frame(df: "pd.DataFrame") -> List[TimeSeriesData]:
+    """
+    Convert a time trends DataFrame into response models.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame with ``period``, ``gim`` and ``other_wards`` columns.
+
+    Returns
+    -------
+    List[TimeSeriesData]
+        One data point per row.
+    """
+    if df.empty:
+        return []
+    require_columns(df, ["period", "gim", "other_wards"])
+    return construct(
+        TimeSeriesData,
+        {
+            "period": to_str(df["period"]),
+            "gim": to_float(df["gim"]),
+            "other_wards": to_float(df["other_wards"]),
+        },
+    )
+
+
+def demographic_values_from_frame(
+    df: "pd.DataFrame", prefix: str
+) -> List[DemographicValue]:
+    """
+    Convert the ``<prefix>_value``, ``_units`` and ``_sd`` columns into values.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The demographics DataFrame.
+    prefix : str
+        The column prefix, e.g. "recent".
+
+    Returns
+    -------
+    List[DemographicValue]
+        One demographic value per row.
+    """
+    require_columns(df, [f"{prefix}_value", f"{prefix}_units", f"{prefix}_sd"])
+    return construct(
+        DemographicValue,
+        {
+            "value": to_float(df[f"{prefix}_value"]),
+            "units": to_str(df[f"{prefix}_units"]),
+            "standard_deviation": to_optional_float(df[f"{prefix}_sd"]),
+        },
+    )
+
+
+def demographic_items_from_frame(df: "pd.DataFrame") -> List[DemographicItem]:
+    """
+    Convert the rows of a demographics DataFrame into items.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The demographics DataFrame.
+
+    Returns
+    -------
+    List[DemographicItem]
+        One demographic item per row.
+    """
+    return construct(
+        DemographicItem,
+        {
+            "recent": demographic_values_from_frame(df, "recent"),
+            "training": demographic_values_from_frame(df, "training"),
+            "standard_mean_difference": demographic_values_from_frame(df, "smd"),
+        },
+    )
+
+
+def demographics_from_frame(df: "pd.DataFrame") -> Dict[str, DemographicItem]:
+    """
+    Convert a demographics DataFrame into items keyed by attribute.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Demographics rows for a single quarter.
+
+    Returns
+    -------
+    Dict[str, DemographicItem]
+        One demographic item per attribute.
+    """
+    if df.empty:
+        return {}
+    require_columns(df, ["attribute"])
+    return dict(zip(to_str(df["attribute"]), demographic_items_from_frame(df)))
@@ -0,0 +1,148 @@
+"""Content-encoding negotiation and compression of response payloads."""
+
+import gzip
+import os
+from typing import Dict, Optional
+
+import brotli
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import Message, Receive, Scope, Send
+
+
+# Payloads smaller than this are sent uncompressed.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Level used by the streaming middleware for dynamic responses.
+GZIP_STREAM_LEVEL = int(os.getenv("GZIP_STREAM_LEVEL", "6"))
+# Levels used for payloads compressed once per data version and cached.
+GZIP_CACHED_LEVEL = int(os.getenv("GZIP_CACHED_LEVEL", "9"))
+BROTLI_CACHED_QUALITY = int(os.getenv("BROTLI_CACHED_QUALITY", "9"))
+
+# Supported encodings, in order of preference.
+ENCODINGS = ("br", "gzip")
+
+
+def parse_accept_encoding(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """
+    Parse an ``Accept-Encoding`` header.
+
+    Parameters
+    ----------
+    accept_encoding : Optional[str]
+        The header value.
+
+    Returns
+    -------
+    Dict[str, float]
+        The quality value of each listed coding, lowercased.
+    """
+    qualities: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Choose the content coding of a response.
+
+    Parameters
+    ----------
+    accept_encoding : Optional[str]
+        The ``Accept-Encoding`` request header.
+
+    Returns
+    -------
+    Optional[str]
+        The preferred supported coding the client accepts, None for identity.
+    """
+    qualities = parse_accept_encoding(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def merge_vary(*values: Optional[str]) -> str:
+    """
+    Merge ``Vary`` header values, keeping the first spelling of each field.
+
+    Parameters
+    ----------
+    *values : Optional[str]
+        Comma-separated field names, None for a missing header.
+
+    Returns
+    -------
+    str
+        The distinct field names, in order of first appearance.
+    """
+    fields: Dict[str, str] = {}
+    for value in values:
+        for item in (value or "").split(","):
+            field = item.strip()
+            if field:
+                fields.setdefault(field.lower(), field)
+    return ", ".join(fields.values())
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a payload for caching.
+
+    Parameters
+    ----------
+    body : bytes
+        The payload.
+    encoding : str
+        "br" or "gzip".
+
+    Returns
+    -------
+    bytes
+        The compressed payload.
+
+    Raises
+    ------
+    ValueError
+        If the encoding is not supported.
+    """
+    if encoding == "br":
+        return bytes(brotli.compress(body, quality=BROTLI_CACHED_QUALITY))
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_CACHED_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+class VaryMergingGZipMiddleware(GZipMiddleware):
+    """
+    Compress responses with gzip without repeating fields in ``Vary``.
+
+    Starlette's responder appends ``Accept-Encoding`` to ``Vary`` whenever it
+    compresses, even when the route already set it for cacheable responses.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve a request, merging the ``Vary`` header of the response."""
+
+        async def send_with_vary(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if "vary" in headers:
+                    headers["Vary"] = merge_vary(headers["vary"])
+            await send(message)
+
+        await super().__call__(scope, receive, send_with_vary)
@@ -1,152 +1,560 @@
 """Data module."""
 
-import io
-import math
-from enum import Enum
-from typing import Dict, List, Optional
-
-import pandas as pd
-from minio import Minio
-from pydantic import BaseModel, validator
-
-
-minio_client = Minio(
-    "minio:9000", access_key="minioadmin", secret_key="minioadmin", secure=False
+import functools
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    cast,
 )
 
+from fastapi import HTTPException, status
 
-class Quarter(str, Enum):
-    """Quarter of the year."""
-
-    Q1 = "Q1"
-    Q2 = "Q2"
-    Q3 = "Q3"
-    Q4 = "Q4"
-
+from api.aggregation import ENCOUNTER_COLUMNS, EncounterTable
+from api.cache import CacheEntry, CacheKey, DatasetCache, ObjectVersion
+from api.columnar import (
+    rates_from_frame,
+    time_trends_from_frame,
+)
+from api.drift import COHORT_ATTRIBUTES, drift_items, summarize
+from api.executor import data_executor
+from api.formats import CSV, detect_format, iter_frames, read_frame
+from api.index import DemographicsIndex, RatesIndex, decode_cursor, encode_cursor
+from api.metrics import observe_size, stage
+from api.models import (
+    AggregatedRate,
+    AggregationPeriod,
+    DeliriumRate,
+    DemographicItem,
+    PatientDemographics,
+    TimeSeriesData,
+)
 
-class DeliriumRate(BaseModel):
-    """Delirium rate for a given quarter and ward."""
 
-    quarter: Quarter
-    year: int
-    rate: float
-    ward: str
+if TYPE_CHECKING:
+    import pandas as pd
+    from minio import Minio
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MINIO_TIMEOUT = float(os.getenv("MINIO_TIMEOUT", "10"))
+
+# Built on first use by ``get_minio_client``, so importing the module does not
+# load the MinIO SDK. Assign a client here to use it instead.
+minio_client: Optional["Minio"] = None
+dataset_cache = DatasetCache()
+
+BUCKET_NAME = "delirium-data"
+# Objects may be CSV, Parquet or Arrow IPC files, see ``api.formats``.
+RATES_OBJECT = os.getenv("RATES_OBJECT", "delirium_rates.csv")
+TIME_TRENDS_OBJECT = os.getenv("TIME_TRENDS_OBJECT", "time_trends.csv")
+DEMOGRAPHICS_OBJECT = os.getenv("DEMOGRAPHICS_OBJECT", "demographics.csv")
+# Encounter-level records that rates are aggregated from on request.
+ENCOUNTERS_OBJECT = os.getenv("ENCOUNTERS_OBJECT", "encounters.parquet")
+# Patient-level cohorts, one row per patient, that demographic drift is
+# computed from. See ``api.drift.COHORT_ATTRIBUTES`` for their columns.
+RECENT_COHORT_OBJECT = os.getenv("RECENT_COHORT_OBJECT", "cohorts/recent.parquet")
+TRAINING_COHORT_OBJECT = os.getenv("TRAINING_COHORT_OBJECT", "cohorts/training.parquet")
+
+# Rows per chunk of the streaming endpoints, and the size above which a
+# Parquet or Arrow object being streamed is spooled to disk instead of memory.
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "10000"))
+STREAM_SPOOL_SIZE = int(os.getenv("STREAM_SPOOL_SIZE", str(16 * 2**20)))
+
+# Each site's objects live under their own prefix in the bucket, e.g.
+# "sites/toronto-general/delirium_rates.csv". Requests without a site read the
+# unprefixed objects. SITES optionally restricts the sites that can be served.
+SITE_PREFIX = os.getenv("SITE_PREFIX", "sites/{site}/")
+SITE_PATTERN = r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$"
+SITES = [site for site in os.getenv("SITES", "").split(",") if site]
+
+# New data can be added as append-only delta partitions of a dataset, e.g.
+# "deltas/delirium_rates/2024-Q3.csv", merged after the base object in name
+# order, so dated names keep the rows in time order. Partitions of a site live
+# under the site's prefix. An empty DELTA_PREFIX disables them.
+DELTA_PREFIX = os.getenv("DELTA_PREFIX", "deltas/{dataset}/")
+
+RATES_COLUMNS = ["quarter", "year", "rate", "ward"]
+TIME_TRENDS_COLUMNS = ["period", "gim", "other_wards"]
+
+# Drift of each site, with the ETags of the cohorts it was computed from.
+_drift_results: Dict[
+    Optional[str], Tuple[Tuple[str, ...], Dict[str, DemographicItem]]
+] = {}
+_drift_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _create_minio_client() -> "Minio":
+    """Create the MinIO client, importing the SDK only then."""
+    import urllib3  # noqa: PLC0415
+    from minio import Minio  # noqa: PLC0415
+
+    return Minio(
+        "minio:9000",
+        access_key="minioadmin",
+        secret_key="minioadmin",
+        secure=False,
+        http_client=urllib3.PoolManager(
+            timeout=urllib3.Timeout(connect=MINIO_TIMEOUT, read=MINIO_TIMEOUT),
+            maxsize=data_executor.max_workers,
+            retries=urllib3.Retry(
+                total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+            ),
+        ),
+    )
 
 
-class TimeSeriesData(BaseModel):
-    """Time series data for a given period."""
+def get_minio_client() -> "Minio":
+    """Return the MinIO client, creating it on first use."""
+    return minio_client if minio_client is not None else _create_minio_client()
+
+
+def warm_up() -> None:
+    """Import the data libraries, which the module itself imports on first use."""
+    import minio  # noqa: F401, PLC0415
+    import pandas as pd  # noqa: F401, PLC0415
+    import pyarrow.parquet  # noqa: F401, PLC0415
+
+
+def site_object(object_name: str, site: Optional[str] = None) -> str:
+    """Return the name of a site's copy of an object."""
+    if site is None:
+        return object_name
+    return SITE_PREFIX.format(site=site) + object_name
+
+
+def split_site_object(object_name: str) -> Tuple[Optional[str], str]:
+    """Split an object name into its site, None if unprefixed, and base name."""
+    before, _, after = SITE_PREFIX.partition("{site}")
+    if not object_name.startswith(before):
+        return None, object_name
+    site, separator, base = object_name[len(before) :].partition(after)
+    if not separator or not site or not re.match(SITE_PATTERN, site):
+        return None, object_name
+    return site, base
+
+
+def delta_prefix(object_name: str) -> Optional[str]:
+    """Return the prefix of an object's delta partitions, None if disabled."""
+    if not DELTA_PREFIX:
+        return None
+    site, base_name = split_site_object(object_name)
+    dataset = os.path.splitext(base_name)[0]
+    return site_object(DELTA_PREFIX.format(dataset=dataset), site)
+
+
+def list_delta_partitions(
+    bucket_name: str, object_name: str
+) -> List[Tuple[str, ObjectVersion]]:
+    """List the delta partitions of an object in MinIO, in merge order."""
+    prefix = delta_prefix(object_name)
+    if prefix is None:
+        return []
+    with stage("list", object_name):
+        partitions = [
+            (item.object_name, ObjectVersion.from_stat(item))
+            for item in get_minio_client().list_objects(
+                bucket_name, prefix=prefix, recursive=True
+            )
+            if not item.is_dir
+        ]
+    return sorted(partitions, key=lambda partition: partition[0])
 
-    period: str
-    gim: float
-    other_wards: float
 
+def get_object_version(bucket_name: str, object_name: str) -> ObjectVersion:
+    """Get the current version of an object and its delta partitions in MinIO."""
+    base = ObjectVersion.from_stat(
+        get_minio_client().stat_object(bucket_name, object_name)
+    )
+    return ObjectVersion.combine(
+        [(object_name, base), *list_delta_partitions(bucket_name, object_name)]
+    )
 
-class DemographicValue(BaseModel):
-    """Demographic value for a given attribute."""
 
-    value: float
-    units: str
-    standard_deviation: Optional[float] = None
+def data_unavailable(object_name: str) -> HTTPException:
+    """Return the error raised when a dataset cannot be read from MinIO."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Dataset {object_name} is unavailable",
+    )
 
-    @validator("value", "standard_deviation", pre=True)
-    def check_nan(cls, v):  # noqa: N805
-        """Check for NaN values."""
-        if v is None or (isinstance(v, float) and math.isnan(v)):
-            return None
-        return v
 
-    @validator("units", pre=True)
-    def check_nan_units(cls, v):  # noqa: N805
-        """Check for NaN values."""
-        if v is None or (isinstance(v, float) and math.isnan(v)):
-            return ""
-        return v
+def read_object_from_minio(
+    bucket_name: str,
+    object_name: str,
+    columns: Optional[Sequence[str]] = None,
+    dataset: Optional[str] = None,
+) -> "pd.DataFrame":
+    """Download and parse a CSV, Parquet or Arrow IPC object from MinIO."""
+    # Partitions are labelled by their prefix, to bound the metric series.
+    dataset = dataset or object_name
+    with stage("fetch", dataset):
+        data = get_minio_client().get_object(bucket_name, object_name)
+        try:
+            file_format = detect_format(object_name, data.headers.get("Content-Type"))
+            raw = data.read()
+        finally:
+            data.close()
+            data.release_conn()
+    observe_size("fetch", dataset, len(raw))
+    with stage("parse", dataset):
+        return read_frame(raw, file_format, columns=columns)
+
+
+def stream_object_from_minio(
+    bucket_name: str,
+    object_name: str,
+    columns: Optional[Sequence[str]] = None,
+    chunk_rows: int = STREAM_CHUNK_ROWS,
+    dataset: Optional[str] = None,
+) -> Iterator["pd.DataFrame"]:
+    """
+    Open an object in MinIO and parse it one chunk of rows at a time.
+
+    The object is opened straight away, so an object that cannot be read
+    raises here, before any rows are produced. Errors while reading it are
+    raised by the returned iterator.
+    """
+    data = get_minio_client().get_object(bucket_name, object_name)
+    return _iter_object_chunks(data, object_name, columns, chunk_rows, dataset)
+
+
+def _iter_object_chunks(
+    data: Any,
+    object_name: str,
+    columns: Optional[Sequence[str]],
+    chunk_rows: int,
+    dataset: Optional[str],
+) -> Iterator["pd.DataFrame"]:
+    """Parse an open MinIO response in chunks, releasing it when done."""
+    try:
+        file_format = detect_format(object_name, data.headers.get("Content-Type"))
+        if file_format == CSV:
+            # The response is a file-like stream, parsed as it arrives.
+            stream = cast(IO[bytes], data)
+            yield from iter_frames(stream, file_format, columns, chunk_rows)
+            return
+        # Parquet and Arrow files are read from their footer, so spool them.
+        with tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_SIZE) as spool:
+            with stage("fetch", dataset or object_name):
+                shutil.copyfileobj(data, spool)
+            spool.seek(0)
+            yield from iter_frames(spool, file_format, columns, chunk_rows)
+    finally:
+        data.close()
+        data.release_conn()
+
+
+def stream_dataset_from_minio(
+    bucket_name: str,
+    object_name: str,
+    columns: Optional[Sequence[str]] = None,
+    chunk_rows: int = STREAM_CHUNK_ROWS,
+) -> Iterator["pd.DataFrame"]:
+    """
+    Stream an object from MinIO followed by its delta partitions.
+
+    The object is opened straight away, and a 503 is raised if that fails, so
+    an unreadable dataset is never taken for an empty one. Once it is open, any
+    error is logged and raised by the returned iterator, so a streamed response
+    is aborted rather than ending as if it were complete.
+    """
+    try:
+        chunks = stream_object_from_minio(bucket_name, object_name, columns, chunk_rows)
+    except Exception as e:
+        logger.warning(f"Error streaming data from MinIO: {e}")
+        raise data_unavailable(object_name) from e
+    return _iter_dataset_chunks(bucket_name, object_name, chunks, columns, chunk_rows)
+
+
+def _iter_dataset_chunks(
+    bucket_name: str,
+    object_name: str,
+    chunks: Iterator["pd.DataFrame"],
+    columns: Optional[Sequence[str]],
+    chunk_rows: int,
+) -> Iterator["pd.DataFrame"]:
+    """Yield the chunks of an open object, then those of its delta partitions."""
+    try:
+        yield from chunks
+        dataset = delta_prefix(object_name)
+        for partition_name, _ in list_delta_partitions(bucket_name, object_name):
+            yield from stream_object_from_minio(
+                bucket_name, partition_name, columns, chunk_rows, dataset
+            )
+    except Exception:
+        logger.exception(f"Streaming {bucket_name}/{object_name} from MinIO failed")
+        raise
+
+
+def append_partitions(
+    df: "pd.DataFrame",
+    bucket_name: str,
+    object_name: str,
+    partition_names: Sequence[str],
+    columns: Optional[Sequence[str]] = None,
+) -> "pd.DataFrame":
+    """Download and parse delta partitions of an object and append them to it."""
+    import pandas as pd  # noqa: PLC0415
+
+    dataset = delta_prefix(object_name) or object_name
+    frames = [
+        read_object_from_minio(bucket_name, name, columns=columns, dataset=dataset)
+        for name in partition_names
+    ]
+    with stage("append", object_name):
+        return pd.concat([df, *frames], ignore_index=True)
+
+
+def _cache_key(
+    bucket_name: str,
+    object_name: str,
+    columns: Optional[Sequence[str]],
+) -> CacheKey:
+    """Build the dataset cache key for an object read with the given columns."""
+    options = repr(columns and tuple(columns))
+    return (bucket_name, object_name, options)
+
+
+def _load_entry(
+    bucket_name: str,
+    object_name: str,
+    columns: Optional[Sequence[str]] = None,
+) -> CacheEntry:
+    """Return the cache entry of a dataset, raising a 503 if it cannot be read."""
+    try:
+        return dataset_cache.get_entry(
+            _cache_key(bucket_name, object_name, columns),
+            stat=lambda: get_object_version(bucket_name, object_name),
+            load=lambda: read_object_from_minio(
+                bucket_name, object_name, columns=columns
+            ),
+            extend=lambda df, names: append_partitions(
+                df, bucket_name, object_name, names, columns=columns
+            ),
+        )
+    except Exception as e:
+        logger.warning(f"Error loading data from MinIO: {e}")
+        raise data_unavailable(object_name) from e
+
+
+def load_data_from_minio(
+    bucket_name: str,
+    object_name: str,
+    columns: Optional[Sequence[str]] = None,
+) -> "pd.DataFrame":
+    """Load data from MinIO, reusing the cached copy while it is unchanged."""
+    return _load_entry(bucket_name, object_name, columns).data
+
+
+def load_versioned_from_minio(
+    bucket_name: str,
+    object_name: str,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple["pd.DataFrame", str]:
+    """Load data from MinIO with the ETag of the version it was read from."""
+    entry = _load_entry(bucket_name, object_name, columns)
+    return entry.data, entry.version.etag
+
+
+def load_derived_from_minio(
+    bucket_name: str,
+    object_name: str,
+    name: str,
+    build: Callable[["pd.DataFrame"], T],
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[T, str]:
+    """Load a structure built from a dataset, rebuilt once per object version."""
+    entry = _load_entry(bucket_name, object_name, columns)
+    return dataset_cache.derive(entry, name, build), entry.version.etag
+
+
+def get_dataset_version(
+    object_name: str, bucket_name: str = BUCKET_NAME
+) -> Optional[ObjectVersion]:
+    """Get the version of a dataset without downloading it."""
+    try:
+        return dataset_cache.version(
+            (bucket_name, object_name),
+            stat=lambda: get_object_version(bucket_name, object_name),
+        )
+    except Exception as e:
+        logger.warning(f"Error getting object version from MinIO: {e}")
+        return None
 
 
-class DemographicItem(BaseModel):
-    """Demographic item for a given attribute."""
+def get_delirium_rates(site: Optional[str] = None) -> List[DeliriumRate]:
+    """Get delirium rates for a given quarter and ward."""
+    df = load_data_from_minio(
+        BUCKET_NAME, site_object(RATES_OBJECT, site), columns=RATES_COLUMNS
+    )
+    with stage("build", "rates"):
+        return rates_from_frame(df)
+
+
+def get_filtered_rates(
+    wards: Optional[Sequence[str]] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    site: Optional[str] = None,
+) -> Tuple[List[DeliriumRate], Optional[str]]:
+    """Get delirium rates filtered by ward and period, one page at a time."""
+    index, etag = load_derived_from_minio(
+        BUCKET_NAME,
+        site_object(RATES_OBJECT, site),
+        "rates_index",
+        RatesIndex,
+        columns=RATES_COLUMNS,
+    )
+    position = decode_cursor(cursor, etag) if cursor else 0
+    with stage("query", "rates"):
+        page = index.query(wards, start, end, position=position, limit=limit)
+    if page.next_position is None:
+        return page.rates, None
+    return page.rates, encode_cursor(etag, page.next_position)
+
+
+def get_aggregated_rates(
+    period: AggregationPeriod,
+    window: int = 3,
+    wards: Optional[Sequence[str]] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    site: Optional[str] = None,
+) -> List[AggregatedRate]:
+    """Get delirium rates aggregated from encounters, memoized per data version."""
+    table, _ = load_derived_from_minio(
+        BUCKET_NAME,
+        site_object(ENCOUNTERS_OBJECT, site),
+        "encounter_table",
+        EncounterTable,
+        columns=ENCOUNTER_COLUMNS,
+    )
+    with stage("aggregate", period.value):
+        return table.query(period, window, wards, start, end)
+
+
+def iter_delirium_rates(
+    chunk_rows: int = STREAM_CHUNK_ROWS, site: Optional[str] = None
+) -> Iterator[List[DeliriumRate]]:
+    """Stream delirium rates in chunks, opening the dataset straight away."""
+    chunks = stream_dataset_from_minio(
+        BUCKET_NAME,
+        site_object(RATES_OBJECT, site),
+        columns=RATES_COLUMNS,
+        chunk_rows=chunk_rows,
+    )
+    return _build_chunks(chunks, rates_from_frame, "rates-stream")
 
-    recent: DemographicValue
-    training: DemographicValue
-    standard_mean_difference: DemographicValue
 
+def get_time_trends(site: Optional[str] = None) -> List[TimeSeriesData]:
+    """Get time trends for a given period."""
+    df = load_data_from_minio(
+        BUCKET_NAME, site_object(TIME_TRENDS_OBJECT, site), columns=TIME_TRENDS_COLUMNS
+    )
+    with stage("build", "time-trends"):
+        return time_trends_from_frame(df)
+
+
+def iter_time_trends(
+    chunk_rows: int = STREAM_CHUNK_ROWS, site: Optional[str] = None
+) -> Iterator[List[TimeSeriesData]]:
+    """Stream time trends in chunks, opening the dataset straight away."""
+    chunks = stream_dataset_from_minio(
+        BUCKET_NAME,
+        site_object(TIME_TRENDS_OBJECT, site),
+        columns=TIME_TRENDS_COLUMNS,
+        chunk_rows=chunk_rows,
+    )
+    return _build_chunks(chunks, time_trends_from_frame, "time-trends-stream")
 
-class PatientDemographics(BaseModel):
-    """Patient demographics for a given quarter and ward."""
 
-    data: Dict[str, DemographicItem]
-    recent_quarter: str
-    recent_year: int
+def _build_chunks(
+    chunks: Iterator["pd.DataFrame"], build: Callable[["pd.DataFrame"], T], name: str
+) -> Iterator[T]:
+    """Build response models from each chunk of a streamed dataset."""
+    for df in chunks:
+        with stage("build", name):
+            models = build(df)
+        yield models
 
 
-def load_data_from_minio(bucket_name: str, object_name: str) -> pd.DataFrame:
-    """Load data from MinIO."""
-    try:
-        data = minio_client.get_object(bucket_name, object_name)
-        return pd.read_csv(io.BytesIO(data.read()))
-    except Exception as e:
-        print(f"Error loading data from MinIO: {e}")
-        return pd.DataFrame()
+def patient_demographics_from_frame(df: "pd.DataFrame") -> PatientDemographics:
+    """Build the demographics of the most recent quarter in a DataFrame."""
+    return DemographicsIndex(df).latest()
 
 
-def get_most_recent_quarter(df: pd.DataFrame) -> tuple[int, Quarter]:
-    """Get the most recent quarter from a DataFrame."""
-    df["year"] = df["year"].astype(int)
-    df["quarter"] = pd.Categorical(
-        df["quarter"], categories=["Q1", "Q2", "Q3", "Q4"], ordered=True
+def get_patient_demographics(site: Optional[str] = None) -> PatientDemographics:
+    """Get patient demographics for a given quarter and ward."""
+    index, _ = load_derived_from_minio(
+        BUCKET_NAME,
+        site_object(DEMOGRAPHICS_OBJECT, site),
+        "demographics_index",
+        DemographicsIndex,
     )
-    most_recent = df.sort_values(["year", "quarter"], ascending=[False, False]).iloc[0]
-    return most_recent["year"], most_recent["quarter"]
-
-
-def get_delirium_rates() -> List[DeliriumRate]:
-    """Get delirium rates for a given quarter and ward."""
-    df = load_data_from_minio("delirium-data", "delirium_rates.csv")
-    return [
-        DeliriumRate(
-            quarter=row["quarter"], year=row["year"], rate=row["rate"], ward=row["ward"]
-        )
-        for _, row in df.iterrows()
-    ]
+    return index.latest()
+
+
+def get_demographics_history(
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    site: Optional[str] = None,
+) -> List[PatientDemographics]:
+    """Get patient demographics of a range of quarters, indexed per data version."""
+    index, _ = load_derived_from_minio(
+        BUCKET_NAME,
+        site_object(DEMOGRAPHICS_OBJECT, site),
+        "demographics_index",
+        DemographicsIndex,
+    )
+    with stage("query", "demographics"):
+        return index.query(start, end)
 
 
-def get_time_trends() -> List[TimeSeriesData]:
-    """Get time trends for a given period."""
-    df = load_data_from_minio("delirium-data", "time_trends.csv")
-    return [
-        TimeSeriesData(
-            period=row["period"], gim=row["gim"], other_wards=row["other_wards"]
-        )
-        for _, row in df.iterrows()
+def get_demographic_drift(site: Optional[str] = None) -> Dict[str, DemographicItem]:
+    """Get recent-versus-training drift, recomputed only when a cohort changes."""
+    object_names = [
+        site_object(name, site)
+        for name in (RECENT_COHORT_OBJECT, TRAINING_COHORT_OBJECT)
     ]
-
-
-def get_patient_demographics() -> PatientDemographics:
-    """Get patient demographics for a given quarter and ward."""
-    df = load_data_from_minio("delirium-data", "demographics.csv")
-    recent_year, recent_quarter = get_most_recent_quarter(df)
-
-    data = {}
-    for _, row in df.iterrows():
-        if row["year"] == recent_year and row["quarter"] == recent_quarter:
-            data[row["attribute"]] = DemographicItem(
-                recent=DemographicValue(
-                    value=row["recent_value"],
-                    units=row["recent_units"],
-                    standard_deviation=row["recent_sd"],
-                ),
-                training=DemographicValue(
-                    value=row["training_value"],
-                    units=row["training_units"],
-                    standard_deviation=row["training_sd"],
-                ),
-                standard_mean_difference=DemographicValue(
-                    value=row["smd_value"],
-                    units=row["smd_units"],
-                    standard_deviation=row["smd_sd"],
-                ),
-            )
-
-    return PatientDemographics(
-        data=data, recent_quarter=recent_quarter, recent_year=recent_year
-    )
+    versions = [get_dataset_version(name) for name in object_names]
+    etags = []
+    for object_name, version in zip(object_names, versions):
+        if version is None:
+            raise data_unavailable(object_name)
+        etags.append(version.etag)
+    with _drift_lock:
+        cached = _drift_results.get(site)
+    if cached is not None and cached[0] == tuple(etags):
+        return cached[1]
+    columns = [attribute.column for attribute in COHORT_ATTRIBUTES]
+    summaries = []
+    for object_name in object_names:
+        with stage("summarize", object_name):
+            chunks = stream_dataset_from_minio(BUCKET_NAME, object_name, columns)
+            summaries.append(summarize(chunks, COHORT_ATTRIBUTES))
+    items = drift_items(*summaries)
+    # Only reached when both cohorts were read in full, failures raise above.
+    with _drift_lock:
+        _drift_results[site] = (tuple(etags), items)
+    return items
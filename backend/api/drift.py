@@ -0,0 +1,272 @@
+"""Demographic drift between the recent and training cohorts."""
+
+import math
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from api.models import DemographicItem, DemographicValue
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+CONTINUOUS = "continuous"
+CATEGORICAL = "categorical"
+
+
+@dataclass
+class Attribute:
+    """
+    A patient attribute compared between cohorts.
+
+    Attributes
+    ----------
+    name : str
+        Display name, the key of the attribute's items.
+    column : str
+        Column of the cohort tables holding the attribute.
+    kind : str
+        ``CONTINUOUS`` for numeric values, ``CATEGORICAL`` for levels, which
+        are reported as the percentage of patients at each level.
+    units : str
+        Units of the continuous values.
+    """
+
+    name: str
+    column: str
+    kind: str = CONTINUOUS
+    units: str = ""
+
+
+COHORT_ATTRIBUTES = [
+    Attribute("Age", "age", CONTINUOUS, "years"),
+    Attribute("Gender", "gender", CATEGORICAL),
+    Attribute("BMI", "bmi", CONTINUOUS, "kg/m²"),
+    Attribute("Blood Pressure", "systolic_bp", CONTINUOUS, "mmHg"),
+]
+
+
+@dataclass
+class Moments:
+    """
+    Count, mean and sum of squared deviations of a stream of values.
+
+    Chunks are merged with Chan et al.'s parallel update, so the moments are
+    exact after a single pass however the values are split, without the
+    cancellation of the naive sum-of-squares formula.
+
+    Attributes
+    ----------
+    count : int
+        Number of values seen.
+    mean : float
+        Mean of the values seen.
+    m2 : float
+        Sum of squared deviations from the mean.
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Add a chunk of values.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            The values, without missing ones.
+        """
+        count = len(values)
+        if count == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation, None with fewer than two values."""
+        if self.count < 2:
+            return None
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+@dataclass
+class CohortSummary:
+    """
+    Streaming summary of a cohort's attributes.
+
+    Attributes
+    ----------
+    attributes : List[Attribute]
+        The attributes to summarize.
+    moments : Dict[str, Moments]
+        Moments of each continuous attribute, keyed by name.
+    levels : Dict[str, Dict[str, int]]
+        Patients at each level of each categorical attribute, keyed by name.
+    """
+
+    attributes: List[Attribute]
+    moments: Dict[str, Moments] = field(default_factory=dict)
+    levels: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def update(self, df: "pd.DataFrame") -> None:
+        """
+        Add a chunk of patients, one per row.
+
+        Missing values are skipped, attribute by attribute.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The chunk, with a column per attribute.
+        """
+        import pandas as pd  # noqa: PLC0415
+
+        for attribute in self.attributes:
+            if attribute.column not in df.columns:
+                continue
+            column = df[attribute.column]
+            if attribute.kind == CATEGORICAL:
+                counts = self.levels.setdefault(attribute.name, {})
+                for level, count in column.dropna().astype(str).value_counts().items():
+                    counts[str(level)] = counts.get(str(level), 0) + int(count)
+            else:
+                values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=float)
+                self.moments.setdefault(attribute.name, Moments()).update(
+                    values[~np.isnan(values)]
+                )
+
+
+def summarize(
+    chunks: Iterable["pd.DataFrame"], attributes: List[Attribute]
+) -> CohortSummary:
+    """
+    Summarize a cohort read one chunk at a time.
+
+    Parameters
+    ----------
+    chunks : Iterable[pd.DataFrame]
+        The cohort's rows, in chunks.
+    attributes : List[Attribute]
+        The attributes to summarize.
+
+    Returns
+    -------
+    CohortSummary
+        The summary, built in a single pass over the chunks.
+    """
+    summary = CohortSummary(attributes)
+    for chunk in chunks:
+        summary.update(chunk)
+    return summary
+
+
+def standardized_mean_difference(
+    recent: float, training: float, recent_sd: float, training_sd: float
+) -> float:
+    """
+    Return the difference of two means in units of their pooled SD.
+
+    Parameters
+    ----------
+    recent : float
+        Mean of the recent cohort.
+    training : float
+        Mean of the training cohort.
+    recent_sd : float
+        Standard deviation of the recent cohort.
+    training_sd : float
+        Standard deviation of the training cohort.
+
+    Returns
+    -------
+    float
+        The standardized mean difference, 0 if both cohorts are constant.
+    """
+    pooled = math.sqrt((recent_sd**2 + training_sd**2) / 2)
+    return (recent - training) / pooled if pooled > 0 else 0.0
+
+
+def drift_items(
+    recent: CohortSummary, training: CohortSummary
+) -> Dict[str, DemographicItem]:
+    """
+    Compare two cohort summaries, attribute by attribute.
+
+    Continuous attributes give one item with the means, SDs and SMD. Each
+    level of a categorical attribute gives an item named ``"<name>: <level>"``
+    with the percentage of patients at that level and the SMD of the two
+    proportions. Attributes missing from either cohort are left out.
+
+    Parameters
+    ----------
+    recent : CohortSummary
+        Summary of the recent cohort.
+    training : CohortSummary
+        Summary of the training cohort.
+
+    Returns
+    -------
+    Dict[str, DemographicItem]
+        The items, keyed by name.
+    """
+    items: Dict[str, DemographicItem] = {}
+    for attribute in recent.attributes:
+        if attribute.kind == CATEGORICAL:
+            recent_counts = recent.levels.get(attribute.name, {})
+            training_counts = training.levels.get(attribute.name, {})
+            recent_total = sum(recent_counts.values())
+            training_total = sum(training_counts.values())
+            if not recent_total or not training_total:
+                continue
+            for level in sorted(set(recent_counts) | set(training_counts)):
+                p = recent_counts.get(level, 0) / recent_total
+                q = training_counts.get(level, 0) / training_total
+                smd = standardized_mean_difference(
+                    p, q, math.sqrt(p * (1 - p)), math.sqrt(q * (1 - q))
+                )
+                items[f"{attribute.name}: {level}"] = _item(
+                    100 * p, None, 100 * q, None, smd, "%"
+                )
+            continue
+        r = recent.moments.get(attribute.name)
+        t = training.moments.get(attribute.name)
+        if r is None or t is None or r.std is None or t.std is None:
+            continue
+        smd = standardized_mean_difference(r.mean, t.mean, r.std, t.std)
+        items[attribute.name] = _item(
+            r.mean, r.std, t.mean, t.std, smd, attribute.units
+        )
+    return items
+
+
+def _item(
+    recent: float,
+    recent_sd: Optional[float],
+    training: float,
+    training_sd: Optional[float],
+    smd: float,
+    units: str,
+) -> DemographicItem:
+    """Build a demographic item from already computed statistics."""
+    return DemographicItem.model_construct(
+        recent=DemographicValue.model_construct(
+            value=recent, units=units, standard_deviation=recent_sd
+        ),
+        training=DemographicValue.model_construct(
+            value=training, units=units, standard_deviation=training_sd
+        ),
+        standard_mean_difference=DemographicValue.model_construct(
+            value=smd, units="", standard_deviation=None
+        ),
+    )
@@ -0,0 +1,146 @@
+"""Conditional request helpers for cacheable responses."""
+
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from api.cache import ObjectVersion
+from api.compression import merge_vary
+
+
+RESPONSE_MAX_AGE = int(os.getenv("RESPONSE_MAX_AGE", "0"))
+CACHE_CONTROL = f"private, max-age={RESPONSE_MAX_AGE}, must-revalidate"
+
+
+def compute_etag(request: Request, *versions: ObjectVersion) -> str:
+    """
+    Compute a weak ETag for a response.
+
+    The ETag depends on the version of every source object and on the request
+    path and query parameters, so it changes whenever the response would. It is
+    weak because the identity, gzip and brotli representations of a response
+    share it, and only a weak validator may be shared between byte-different
+    bodies.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    *versions : ObjectVersion
+        Versions of the objects the response is built from.
+
+    Returns
+    -------
+    str
+        The weak, quoted ETag.
+    """
+    digest = hashlib.sha256()
+    for version in versions:
+        digest.update(version.etag.encode())
+        digest.update(b"\0")
+    digest.update(request.url.path.encode())
+    for name, value in sorted(request.query_params.multi_items()):
+        digest.update(f"\0{name}={value}".encode())
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """
+    Check an ``If-None-Match`` header against an ETag.
+
+    The comparison is weak, as ``If-None-Match`` requires, so a tag matches
+    with or without its ``W/`` prefix.
+
+    Parameters
+    ----------
+    etag : str
+        The quoted ETag of the current response.
+    if_none_match : Optional[str]
+        The value of the ``If-None-Match`` request header.
+
+    Returns
+    -------
+    bool
+        True if the client already holds the current response.
+    """
+    if not if_none_match:
+        return False
+    opaque_tag = etag.removeprefix("W/")
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == opaque_tag
+        for candidate in candidates
+    )
+
+
+def set_cache_headers(response: Response, etag: Optional[str]) -> None:
+    """
+    Set the ``ETag``, ``Cache-Control`` and ``Vary`` headers on a response.
+
+    Cacheable payloads are sent compressed when the client accepts it, so the
+    response varies with ``Accept-Encoding``. Call this once the payload has
+    been built, so that a response that failed to load is never cacheable.
+
+    Parameters
+    ----------
+    response : Response
+        The response to update.
+    etag : Optional[str]
+        The quoted ETag of the response, None to leave the response without
+        validators.
+    """
+    if etag is None:
+        return
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers["Vary"] = merge_vary(
+        response.headers.get("Vary"), "Accept-Encoding"
+    )
+
+
+def response_etag(
+    request: Request, *versions: Optional[ObjectVersion]
+) -> Optional[str]:
+    """
+    Compute the ETag of a response, if the version of every source is known.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    *versions : Optional[ObjectVersion]
+        Versions of the source objects, None if a version is unknown.
+
+    Returns
+    -------
+    Optional[str]
+        The weak, quoted ETag, or None if any version is unknown.
+    """
+    if not versions or any(version is None for version in versions):
+        return None
+    return compute_etag(request, *[v for v in versions if v is not None])
+
+
+def check_not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """
+    Answer a conditional request before the response is built.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    etag : Optional[str]
+        The ETag from ``response_etag``, None if it is unknown.
+
+    Returns
+    -------
+    Optional[Response]
+        A 304 response if the client's copy is current, None otherwise.
+    """
+    if etag is None or not etag_matches(etag, request.headers.get("if-none-match")):
+        return None
+    not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(not_modified, etag)
+    return not_modified
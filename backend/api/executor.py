@@ -0,0 +1,171 @@
+"""Bounded worker pools for blocking work called from async routes."""
+
+import asyncio
+import contextlib
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+
+from fastapi import HTTPException, status
+
+
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a cap on queued work and a per-call timeout.
+
+    Blocking calls are run on ``max_workers`` dedicated threads so they never
+    stall the event loop. At most ``max_pending`` calls may be queued or running
+    at once; further calls are rejected immediately with a 503 instead of
+    queueing without bound. Calls that do not finish within ``timeout`` seconds
+    are answered with a 504.
+
+    Parameters
+    ----------
+    name : str
+        Name of the pool, used as the thread name prefix.
+    max_workers : int
+        Number of worker threads, i.e. the concurrency cap.
+    max_pending : int
+        Maximum number of calls queued or running at once.
+    timeout : float
+        Seconds a caller waits for a call to finish.
+    timeout_detail : str, optional
+        Detail of the 504 response sent when a call times out.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_pending: int,
+        timeout: float,
+        timeout_detail: str = "Timed out waiting for the data store",
+    ) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.timeout_detail = timeout_detail
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of calls queued or running."""
+        return self._pending
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run ``fn`` on the pool and wait for its result.
+
+        Parameters
+        ----------
+        fn : Callable[..., T]
+            The blocking function to call.
+        *args : Any
+            Positional arguments for ``fn``.
+        **kwargs : Any
+            Keyword arguments for ``fn``.
+
+        Returns
+        -------
+        T
+            The result of ``fn``.
+
+        Raises
+        ------
+        HTTPException
+            503 if the pool is saturated, 504 if the call timed out.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server is busy, please try again later",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        try:
+            future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        # Release the slot when the work finishes, not when the caller gives up,
+        # so timed-out calls that are still running keep counting against the cap.
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=self.timeout_detail,
+            ) from e
+
+    async def iterate(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        """
+        Advance a blocking iterator on the pool, one item per call.
+
+        Each item counts against ``max_pending`` and ``timeout`` like a call to
+        ``run``. The iterator is closed when the caller stops early, e.g. when
+        a streaming client disconnects.
+
+        Parameters
+        ----------
+        iterator : Iterator[T]
+            The blocking iterator, e.g. a generator reading an object.
+
+        Yields
+        ------
+        T
+            The items of ``iterator``.
+        """
+        done = object()
+        try:
+            while True:
+                item = await self.run(next, iterator, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            # A generator still running on the pool after a timeout cannot be
+            # closed; it is left to finish and be garbage collected.
+            if close is not None:
+                with contextlib.suppress(ValueError):
+                    close()
+
+    def shutdown(self) -> None:
+        """Stop accepting work and cancel calls that have not started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self) -> None:
+        """Free the slot held by a finished call."""
+        with self._lock:
+            self._pending -= 1
+
+
+data_executor = BoundedExecutor(
+    "data",
+    max_workers=int(os.getenv("DATA_WORKERS", "4")),
+    max_pending=int(os.getenv("DATA_MAX_PENDING", "64")),
+    timeout=float(os.getenv("DATA_TIMEOUT", "30")),
+)
+
+# bcrypt releases the GIL, so hashing scales with cores. Each hash takes a few
+# hundred milliseconds, so the queue is kept short: a deep queue only turns a
+# login burst into multi-second waits that hold database connections.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+hash_executor = BoundedExecutor(
+    "hash",
+    max_workers=HASH_WORKERS,
+    max_pending=int(os.getenv("HASH_MAX_PENDING", str(4 * HASH_WORKERS))),
+    timeout=float(os.getenv("HASH_TIMEOUT", "10")),
+    timeout_detail="Timed out verifying credentials",
+)
@@ -0,0 +1,172 @@
+"""Readers for the file formats stored in the object store."""
+
+import io
+from typing import IO, TYPE_CHECKING, Any, Iterable, Iterator, Optional, Sequence
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+CSV = "csv"
+PARQUET = "parquet"
+ARROW = "arrow"
+
+EXTENSIONS = {
+    ".csv": CSV,
+    ".parquet": PARQUET,
+    ".pq": PARQUET,
+    ".arrow": ARROW,
+    ".feather": ARROW,
+    ".ipc": ARROW,
+}
+CONTENT_TYPES = {
+    "text/csv": CSV,
+    "application/csv": CSV,
+    "application/vnd.apache.parquet": PARQUET,
+    "application/x-parquet": PARQUET,
+    "application/vnd.apache.arrow.file": ARROW,
+    "application/vnd.apache.arrow.stream": ARROW,
+}
+
+
+def detect_format(object_name: str, content_type: Optional[str] = None) -> str:
+    """
+    Detect the format of an object from its name or content type.
+
+    Parameters
+    ----------
+    object_name : str
+        The name of the object.
+    content_type : Optional[str], optional
+        The content type reported by the object store, by default None.
+
+    Returns
+    -------
+    str
+        One of ``CSV``, ``PARQUET`` or ``ARROW``.
+    """
+    for extension, file_format in EXTENSIONS.items():
+        if object_name.lower().endswith(extension):
+            return file_format
+    if content_type:
+        media_type = content_type.split(";")[0].strip().lower()
+        if media_type in CONTENT_TYPES:
+            return CONTENT_TYPES[media_type]
+    return CSV
+
+
+def read_frame(
+    raw: bytes,
+    file_format: str,
+    columns: Optional[Sequence[str]] = None,
+) -> "pd.DataFrame":
+    """
+    Parse an object into a DataFrame.
+
+    Parameters
+    ----------
+    raw : bytes
+        The object contents.
+    file_format : str
+        One of ``CSV``, ``PARQUET`` or ``ARROW``.
+    columns : Optional[Sequence[str]], optional
+        Columns to read, by default all of them.
+
+    Returns
+    -------
+    pd.DataFrame
+        The parsed rows.
+    """
+    import pandas as pd  # noqa: PLC0415
+    import pyarrow.parquet as pq  # noqa: PLC0415
+
+    if file_format == PARQUET:
+        table = pq.read_table(
+            io.BytesIO(raw), columns=list(columns) if columns is not None else None
+        )
+        return table.to_pandas()
+    if file_format == ARROW:
+        return _read_arrow(raw, columns)
+    usecols = list(columns) if columns is not None else None
+    df = pd.read_csv(io.BytesIO(raw), usecols=usecols)
+    return df[usecols] if usecols is not None else df
+
+
+def iter_frames(
+    source: IO[bytes],
+    file_format: str,
+    columns: Optional[Sequence[str]] = None,
+    chunk_rows: int = 10_000,
+) -> Iterator["pd.DataFrame"]:
+    """
+    Parse an object one chunk of rows at a time.
+
+    CSV is parsed as it is read, so ``source`` may be a network stream. Parquet
+    and Arrow IPC files keep their metadata in a footer and need a seekable
+    ``source``; they are decoded one row group or record batch at a time.
+
+    Parameters
+    ----------
+    source : IO[bytes]
+        The object contents.
+    file_format : str
+        One of ``CSV``, ``PARQUET`` or ``ARROW``.
+    columns : Optional[Sequence[str]], optional
+        Columns to read, by default all of them.
+    chunk_rows : int, optional
+        Maximum number of rows per chunk, by default 10,000.
+
+    Yields
+    ------
+    pd.DataFrame
+        The next chunk of rows.
+    """
+    import pandas as pd  # noqa: PLC0415
+    import pyarrow as pa  # noqa: PLC0415
+    import pyarrow.parquet as pq  # noqa: PLC0415
+
+    projected = list(columns) if columns is not None else None
+    if file_format == PARQUET:
+        parquet = pq.ParquetFile(source)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=projected):
+            yield batch.to_pandas()
+        return
+    if file_format == ARROW:
+        try:
+            reader: Any = pa.ipc.open_file(source)
+            batches: Iterable[pa.RecordBatch] = (
+                reader.get_batch(i) for i in range(reader.num_record_batches)
+            )
+        except pa.ArrowInvalid:
+            source.seek(0)
+            reader = pa.ipc.open_stream(source)
+            batches = reader
+        for batch in batches:
+            selected = batch.select(projected) if projected is not None else batch
+            for offset in range(0, selected.num_rows, chunk_rows):
+                yield selected.slice(offset, chunk_rows).to_pandas()
+        return
+    with pd.read_csv(source, usecols=projected, chunksize=chunk_rows) as chunks:
+        for chunk in chunks:
+            yield chunk[projected] if projected is not None else chunk
+
+
+def _read_arrow(raw: bytes, columns: Optional[Sequence[str]]) -> "pd.DataFrame":
+    """Read an Arrow IPC file or stream, one record batch at a time."""
+    import pandas as pd  # noqa: PLC0415
+    import pyarrow as pa  # noqa: PLC0415
+
+    try:
+        reader: Any = pa.ipc.open_file(pa.py_buffer(raw))
+        batches: Iterable[pa.RecordBatch] = (
+            reader.get_batch(i) for i in range(reader.num_record_batches)
+        )
+    except pa.ArrowInvalid:
+        reader = pa.ipc.open_stream(pa.py_buffer(raw))
+        batches = reader
+    projected = list(columns) if columns is not None else reader.schema.names
+    tables = [pa.Table.from_batches([batch]).select(projected) for batch in batches]
+    if not tables:
+        return pd.DataFrame(columns=projected)
+    return pa.concat_tables(tables).to_pandas()
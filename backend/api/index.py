@@ -0,0 +1,312 @@
+"""In-memory indexes over scorecard datasets."""
+
+import base64
+import binascii
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from api.columnar import (
+    QUARTERS,
+    demographic_items_from_frame,
+    rates_from_frame,
+    require_columns,
+    to_int,
+    to_str,
+)
+from api.models import DeliriumRate, PatientDemographics, Quarter
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def period_ordinal(year: int, quarter: Quarter) -> int:
+    """
+    Encode a quarter as an integer that sorts chronologically.
+
+    Parameters
+    ----------
+    year : int
+        The year.
+    quarter : Quarter
+        The quarter of the year.
+
+    Returns
+    -------
+    int
+        ``year * 4`` plus the zero-based quarter number.
+    """
+    return year * 4 + QUARTERS.index(Quarter(quarter).value)
+
+
+def encode_cursor(version: str, position: int) -> str:
+    """
+    Encode a pagination cursor.
+
+    Parameters
+    ----------
+    version : str
+        ETag of the dataset the cursor points into.
+    position : int
+        Position of the next row in the index.
+
+    Returns
+    -------
+    str
+        The opaque cursor.
+    """
+    raw = f"{version}:{position}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, version: str) -> int:
+    """
+    Decode a pagination cursor.
+
+    Parameters
+    ----------
+    cursor : str
+        The opaque cursor.
+    version : str
+        ETag of the current dataset.
+
+    Returns
+    -------
+    int
+        Position of the next row in the index.
+
+    Raises
+    ------
+    ValueError
+        If the cursor is malformed or was issued for another dataset version.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        cursor_version, position = raw.rsplit(":", 1)
+        value = int(position)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_version != version or value < 0:
+        raise ValueError("Cursor is stale, the data has changed")
+    return value
+
+
+@dataclass
+class RatesPage:
+    """
+    A page of delirium rates.
+
+    Attributes
+    ----------
+    rates : List[DeliriumRate]
+        The rates on the page.
+    next_position : Optional[int]
+        Index position of the first rate on the next page, None on the last page.
+    """
+
+    rates: List[DeliriumRate]
+    next_position: Optional[int]
+
+
+class RatesIndex:
+    """
+    Index of delirium rates over ``(ward, year, quarter)``.
+
+    Rows are sorted by ward and then by period ordinal, and the response models
+    are built once in that order. A query locates each requested ward's slice
+    and the period range inside it by binary search, so it costs O(log n) plus
+    the size of the result instead of a scan of the dataset.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame with ``quarter``, ``year``, ``rate`` and ``ward`` columns.
+    """
+
+    def __init__(self, df: "pd.DataFrame") -> None:
+        import pandas as pd  # noqa: PLC0415
+
+        if df.empty:
+            self.rates: List[DeliriumRate] = []
+            self.periods = np.empty(0, dtype=np.int64)
+            self.wards: Dict[str, Tuple[int, int]] = {}
+            return
+        require_columns(df, ["quarter", "year", "rate", "ward"])
+        rates = rates_from_frame(df)
+        wards = np.array(to_str(df["ward"]), dtype=object)
+        quarters = pd.Categorical(df["quarter"], categories=QUARTERS).codes
+        periods = np.asarray(to_int(df["year"]), dtype=np.int64) * 4 + quarters
+        order = np.lexsort((periods, wards))
+        self.rates = [rates[i] for i in order]
+        self.periods = periods[order]
+        sorted_wards = wards[order]
+        names, starts = np.unique(sorted_wards, return_index=True)
+        ends = np.append(starts[1:], len(sorted_wards))
+        self.wards = {
+            str(name): (int(start), int(end))
+            for name, start, end in zip(names, starts, ends)
+        }
+
+    def __len__(self) -> int:
+        """Return the number of indexed rates."""
+        return len(self.rates)
+
+    def query(
+        self,
+        wards: Optional[Sequence[str]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        position: int = 0,
+        limit: Optional[int] = None,
+    ) -> RatesPage:
+        """
+        Return the rates matching the filters, in ``(ward, period)`` order.
+
+        Parameters
+        ----------
+        wards : Optional[Sequence[str]], optional
+            Wards to include, by default all of them.
+        start : Optional[int], optional
+            First period ordinal to include, by default unbounded.
+        end : Optional[int], optional
+            Last period ordinal to include, by default unbounded.
+        position : int, optional
+            Index position to resume from, as returned in ``next_position``.
+        limit : Optional[int], optional
+            Maximum number of rates to return, by default no limit.
+
+        Returns
+        -------
+        RatesPage
+            The matching rates and where the next page starts.
+        """
+        names = sorted(self.wards) if wards is None else sorted(set(wards))
+        lower = -np.inf if start is None else start
+        upper = np.inf if end is None else end
+        rates: List[DeliriumRate] = []
+        for name in names:
+            if name not in self.wards:
+                continue
+            ward_start, ward_end = self.wards[name]
+            periods = self.periods[ward_start:ward_end]
+            lo = ward_start + int(np.searchsorted(periods, lower, side="left"))
+            hi = ward_start + int(np.searchsorted(periods, upper, side="right"))
+            lo = max(lo, position)
+            if lo >= hi:
+                continue
+            if limit is not None and len(rates) + hi - lo > limit:
+                cut = lo + limit - len(rates)
+                rates.extend(self.rates[lo:cut])
+                return RatesPage(rates, cut)
+            rates.extend(self.rates[lo:hi])
+        return RatesPage(rates, None)
+
+
+class DemographicsIndex:
+    """
+    Index of patient demographics over ``(year, quarter)``.
+
+    The demographic items of every row are built in one pass, then grouped by
+    period ordinal with a single stable sort, so each quarter's demographics
+    are a dictionary lookup and a range of quarters is a binary search over the
+    sorted ordinals.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame with ``attribute``, ``year`` and ``quarter`` columns and the
+        demographic value columns, one row per attribute and quarter.
+    """
+
+    def __init__(self, df: "pd.DataFrame") -> None:
+        import pandas as pd  # noqa: PLC0415
+
+        self.periods: Dict[int, PatientDemographics] = {}
+        self.ordinals = np.empty(0, dtype=np.int64)
+        if df.empty:
+            return
+        require_columns(df, ["attribute", "year", "quarter"])
+        items = demographic_items_from_frame(df)
+        attributes = to_str(df["attribute"])
+        quarters = pd.Categorical(df["quarter"], categories=QUARTERS).codes
+        if (quarters < 0).any():
+            raise ValueError("Column 'quarter' has missing or invalid quarters")
+        ordinals = np.asarray(to_int(df["year"]), dtype=np.int64) * 4 + quarters
+        # A stable sort keeps row order within a quarter, so the last row of a
+        # repeated attribute wins, as in ``demographics_from_frame``.
+        order = np.argsort(ordinals, kind="stable")
+        self.ordinals, starts = np.unique(ordinals[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for ordinal, start, end in zip(self.ordinals.tolist(), starts, ends):
+            year, quarter = divmod(ordinal, 4)
+            self.periods[ordinal] = PatientDemographics.model_construct(
+                data={attributes[i]: items[i] for i in order[start:end]},
+                recent_quarter=QUARTERS[quarter],
+                recent_year=year,
+            )
+
+    def __len__(self) -> int:
+        """Return the number of indexed quarters."""
+        return len(self.ordinals)
+
+    def get(self, ordinal: int) -> Optional[PatientDemographics]:
+        """
+        Return the demographics of a quarter.
+
+        Parameters
+        ----------
+        ordinal : int
+            Period ordinal of the quarter, see ``period_ordinal``.
+
+        Returns
+        -------
+        Optional[PatientDemographics]
+            The demographics, None if the quarter has none.
+        """
+        return self.periods.get(ordinal)
+
+    def latest(self) -> PatientDemographics:
+        """
+        Return the demographics of the most recent quarter.
+
+        Returns
+        -------
+        PatientDemographics
+            The demographics.
+
+        Raises
+        ------
+        ValueError
+            If the index is empty.
+        """
+        if not len(self.ordinals):
+            raise ValueError("No demographics to report")
+        return self.periods[int(self.ordinals[-1])]
+
+    def query(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> List[PatientDemographics]:
+        """
+        Return the demographics of a range of quarters, in period order.
+
+        Parameters
+        ----------
+        start : Optional[int], optional
+            First period ordinal to include, by default unbounded.
+        end : Optional[int], optional
+            Last period ordinal to include, by default unbounded.
+
+        Returns
+        -------
+        List[PatientDemographics]
+            The demographics of each quarter in the range that has any.
+        """
+        lo = 0 if start is None else np.searchsorted(self.ordinals, start, "left")
+        hi = (
+            len(self.ordinals)
+            if end is None
+            else np.searchsorted(self.ordinals, end, "right")
+        )
+        return [self.periods[ordinal] for ordinal in self.ordinals[lo:hi].tolist()]
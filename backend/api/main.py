@@ -2,14 +2,28 @@
 
 import logging
 import os
+import threading
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import REGISTRY
 
+from api import data
+from api.compression import (
+    COMPRESSION_MIN_SIZE,
+    GZIP_STREAM_LEVEL,
+    VaryMergingGZipMiddleware,
+)
+from api.executor import data_executor, hash_executor
+from api.metrics import DatasetCacheCollector, ExecutorCollector, MetricsMiddleware
 from api.routes.auth import router as auth_router
 from api.routes.delirium import router as delirium_router
+from api.routes.metrics import router as metrics_router
+from api.snapshots import refresh_snapshots
+from api.users.auth import SECRET_KEY
 from api.users.crud import create_initial_admin
-from api.users.db import get_async_session, init_db
+from api.users.db import close_db, get_async_session, init_db
+from api.watcher import WATCHER_MODE, DatasetWatcher
 
 
 logger = logging.getLogger("uvicorn")
@@ -17,17 +31,67 @@ logger = logging.getLogger("uvicorn")
 
 app = FastAPI()
 frontend_port = os.getenv("FRONTEND_PORT", None)
-if not frontend_port:
-    raise ValueError("No FRONTEND_PORT environment variable set!")
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[f"http://localhost:{frontend_port}"],
+    allow_origins=[f"http://localhost:{frontend_port}"] if frontend_port else [],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+# Compresses dynamic responses on the fly. Snapshot responses arrive already
+# compressed with a Content-Encoding header, which the middleware passes through.
+app.add_middleware(
+    VaryMergingGZipMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    compresslevel=GZIP_STREAM_LEVEL,
 )
+app.add_middleware(MetricsMiddleware)
 app.include_router(delirium_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
+
+REGISTRY.register(DatasetCacheCollector(data.dataset_cache))
+REGISTRY.register(ExecutorCollector(data_executor, hash_executor))
+
+dataset_watcher = DatasetWatcher(
+    data.get_minio_client,
+    data.dataset_cache,
+    data.BUCKET_NAME,
+    [
+        data.site_object(object_name, site)
+        for site in [None, *data.SITES]
+        for object_name in [
+            data.RATES_OBJECT,
+            data.TIME_TRENDS_OBJECT,
+            data.DEMOGRAPHICS_OBJECT,
+            data.ENCOUNTERS_OBJECT,
+            data.RECENT_COHORT_OBJECT,
+            data.TRAINING_COHORT_OBJECT,
+        ]
+    ],
+    refresh_snapshots,
+    version=lambda object_name: data.get_object_version(data.BUCKET_NAME, object_name),
+    delta_prefix=data.delta_prefix,
+)
+
+
+def check_settings() -> None:
+    """
+    Check that the required environment variables are set.
+
+    The check runs on startup rather than on import, so the app can be imported
+    by tooling and benchmarks without a full environment.
+
+    Raises
+    ------
+    ValueError
+        If ``FRONTEND_PORT`` or ``JWT_SECRET_KEY`` is not set.
+    """
+    if not frontend_port:
+        raise ValueError("No FRONTEND_PORT environment variable set!")
+    if not SECRET_KEY:
+        raise ValueError("JWT_SECRET_KEY environment variable is not set")
 
 
 @app.on_event("startup")
@@ -37,7 +101,12 @@ async def startup_event() -> None:
 
     This function is called when the FastAPI application starts up. It initializes
     the database and creates an initial admin user if one doesn't already exist.
+    It then starts watching the data bucket in the background, unless
+    ``WATCHER_MODE`` is "off". The data libraries are imported last, on a
+    background thread, so the app starts without waiting for them and the first
+    data request usually finds them loaded.
     """
+    check_settings()
     try:
         await init_db()
         async for session in get_async_session():
@@ -45,3 +114,15 @@ async def startup_event() -> None:
     except Exception as e:
         logger.error(f"Startup failed: {str(e)}")
         raise
+    if WATCHER_MODE != "off":
+        dataset_watcher.start()
+    threading.Thread(target=data.warm_up, name="warm-up", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """Stop the data bucket watcher and the worker pools, and close the database."""
+    dataset_watcher.stop()
+    data_executor.shutdown()
+    hash_executor.shutdown()
+    await close_db()
@@ -0,0 +1,227 @@
+"""Prometheus metrics for the request pipeline."""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.cache import DatasetCache
+from api.executor import BoundedExecutor
+
+
+# Stages of a request: fetch, parse, build, query, serialize and compress for
+# datasets; token, user, password_verify, password_hash and db_session for auth.
+STAGE_SECONDS = Histogram(
+    "scorecard_stage_duration_seconds",
+    "Time spent in each stage of serving a request.",
+    ["stage", "dataset"],
+    buckets=(
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+    ),
+)
+PAYLOAD_BYTES = Histogram(
+    "scorecard_payload_bytes",
+    "Size of objects fetched and of payloads serialized or compressed.",
+    ["stage", "dataset"],
+    buckets=tuple(4.0**exponent for exponent in range(5, 15)),
+)
+STAGE_IN_FLIGHT = Gauge(
+    "scorecard_stage_in_flight",
+    "Number of calls currently in each stage.",
+    ["stage", "dataset"],
+)
+CACHE_REQUESTS = Counter(
+    "scorecard_cache_requests_total",
+    "Lookups in the user and snapshot caches, by result.",
+    ["cache", "result"],
+)
+HTTP_SECONDS = Histogram(
+    "scorecard_http_request_duration_seconds",
+    "Time to respond to HTTP requests, by route.",
+    ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "scorecard_http_requests_in_flight", "Number of HTTP requests being served."
+)
+DB_SESSIONS_IN_FLIGHT = Gauge(
+    "scorecard_db_sessions_in_flight", "Number of open database sessions."
+)
+
+
+@contextmanager
+def stage(name: str, dataset: str = "") -> Iterator[None]:
+    """
+    Time a stage and count it as in flight while it runs.
+
+    Parameters
+    ----------
+    name : str
+        The stage, e.g. "fetch" or "serialize".
+    dataset : str, optional
+        The object or payload the stage works on, by default none.
+    """
+    in_flight = STAGE_IN_FLIGHT.labels(name, dataset)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(name, dataset).observe(time.perf_counter() - start)
+        in_flight.dec()
+
+
+def observe_size(name: str, dataset: str, size: int) -> None:
+    """
+    Record the size of a payload.
+
+    Parameters
+    ----------
+    name : str
+        The stage that produced or consumed the payload.
+    dataset : str
+        The object or payload.
+    size : int
+        Size in bytes.
+    """
+    PAYLOAD_BYTES.labels(name, dataset).observe(size)
+
+
+class DatasetCacheCollector(Collector):
+    """
+    Export the counters of a ``DatasetCache``.
+
+    Parameters
+    ----------
+    cache : DatasetCache
+        The cache to export.
+    """
+
+    def __init__(self, cache: DatasetCache) -> None:
+        self.cache = cache
+
+    def collect(self) -> Iterator[Any]:
+        """Yield the cache metrics."""
+        stats = self.cache.stats
+        requests = CounterMetricFamily(
+            "scorecard_dataset_cache_requests",
+            "Dataset cache lookups, by result.",
+            labels=["result"],
+        )
+        requests.add_metric(["hit"], stats.hits)
+        requests.add_metric(["revalidation"], stats.revalidations)
+        requests.add_metric(["miss"], stats.misses)
+        requests.add_metric(["append"], stats.appends)
+        yield requests
+        yield CounterMetricFamily(
+            "scorecard_dataset_cache_evictions",
+            "Datasets evicted to stay within the memory budget.",
+            value=stats.evictions,
+        )
+        yield GaugeMetricFamily(
+            "scorecard_dataset_cache_bytes",
+            "Estimated memory held by cached datasets and their derived structures.",
+            value=self.cache.size,
+        )
+
+
+class ExecutorCollector(Collector):
+    """
+    Export the queue depth of bounded worker pools.
+
+    Parameters
+    ----------
+    *executors : BoundedExecutor
+        The pools to export.
+    """
+
+    def __init__(self, *executors: BoundedExecutor) -> None:
+        self.executors = executors
+
+    def collect(self) -> Iterator[Any]:
+        """Yield the pool metrics."""
+        pending = GaugeMetricFamily(
+            "scorecard_executor_pending",
+            "Calls queued or running on each worker pool.",
+            labels=["pool"],
+        )
+        for executor in self.executors:
+            pending.add_metric([executor.name], executor.pending)
+        yield pending
+
+
+class MetricsMiddleware:
+    """
+    Record the latency and in-flight count of HTTP requests.
+
+    Requests are labelled with the route template rather than the raw path,
+    so that path parameters do not create a series per value. Written as plain
+    ASGI middleware so that streamed responses are not buffered.
+
+    Parameters
+    ----------
+    app : ASGIApp
+        The application to wrap.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve a request, timing it until the response is complete."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_SECONDS.labels(scope["method"], route, str(status)).observe(
+                time.perf_counter() - start
+            )
+            HTTP_IN_FLIGHT.dec()
+
+
+def metrics_response() -> Response:
+    """
+    Render every registered metric in the Prometheus text format.
+
+    Returns
+    -------
+    Response
+        The metrics.
+    """
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,92 @@
+"""Pydantic data classes for the delirium scorecard."""
+
+from enum import Enum
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class Quarter(str, Enum):
+    """Quarter of the year."""
+
+    Q1 = "Q1"
+    Q2 = "Q2"
+    Q3 = "Q3"
+    Q4 = "Q4"
+
+
+class DeliriumRate(BaseModel):
+    """Delirium rate for a given quarter and ward."""
+
+    quarter: Quarter
+    year: int
+    rate: float
+    ward: str
+
+
+class AggregationPeriod(str, Enum):
+    """Period over which encounters are aggregated into rates."""
+
+    QUARTER = "quarter"
+    MONTH = "month"
+    ROLLING = "rolling"
+
+
+class AggregatedRate(BaseModel):
+    """Delirium rate of a ward over a period, computed from encounters."""
+
+    ward: str
+    period: str
+    start: str
+    end: str
+    encounters: int
+    cases: int
+    rate: float
+
+
+class TimeSeriesData(BaseModel):
+    """Time series data for a given period."""
+
+    period: str
+    gim: float
+    other_wards: float
+
+
+class DemographicValue(BaseModel):
+    """Demographic value for a given attribute."""
+
+    value: float
+    units: str
+    standard_deviation: Optional[float] = None
+
+
+class DemographicItem(BaseModel):
+    """Demographic item for a given attribute."""
+
+    recent: DemographicValue
+    training: DemographicValue
+    standard_mean_difference: DemographicValue
+
+
+class PatientDemographics(BaseModel):
+    """Patient demographics for a given quarter and ward."""
+
+    data: Dict[str, DemographicItem]
+    recent_quarter: str
+    recent_year: int
+
+
+class ScorecardSection(str, Enum):
+    """Section of the combined scorecard payload."""
+
+    RATES = "rates"
+    TIME_TRENDS = "time_trends"
+    DEMOGRAPHICS = "demographics"
+
+
+class Scorecard(BaseModel):
+    """Datasets of the dashboard, in one payload; unrequested sections are omitted."""
+
+    rates: Optional[List[DeliriumRate]] = None
+    time_trends: Optional[List[TimeSeriesData]] = None
+    demographics: Optional[PatientDemographics] = None
@@ -0,0 +1,140 @@
+"""Serialization of response models without re-validating them."""
+
+from typing import Any, Dict, Iterator, List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from api.metrics import observe_size, stage
+from api.models import (
+    AggregatedRate,
+    DeliriumRate,
+    DemographicItem,
+    PatientDemographics,
+    TimeSeriesData,
+)
+
+
+rates_adapter = TypeAdapter(List[DeliriumRate])
+aggregated_rates_adapter = TypeAdapter(List[AggregatedRate])
+time_trends_adapter = TypeAdapter(List[TimeSeriesData])
+demographics_adapter = TypeAdapter(PatientDemographics)
+demographics_history_adapter = TypeAdapter(List[PatientDemographics])
+demographic_items_adapter = TypeAdapter(Dict[str, DemographicItem])
+
+NDJSON = "application/x-ndjson"
+JSON = "application/json"
+
+# Headers of the injected response that describe its body rather than the
+# resource, and so must not be copied onto a response with another body.
+BODY_HEADERS = ("content-length", "content-type", "content-encoding")
+
+
+def forward_headers(response: Response) -> Dict[str, str]:
+    """
+    Return the headers set by a route on its injected response.
+
+    Parameters
+    ----------
+    response : Response
+        The response injected into the route.
+
+    Returns
+    -------
+    Dict[str, str]
+        The headers to send, excluding those describing the body.
+    """
+    return {
+        name: value
+        for name, value in response.headers.items()
+        if name not in BODY_HEADERS
+    }
+
+
+def model_response(
+    adapter: TypeAdapter[Any], value: Any, response: Response, name: str = ""
+) -> Response:
+    """
+    Serialize trusted response models straight to JSON.
+
+    Returning models from a route makes FastAPI validate them against the
+    ``response_model`` again and encode them through ``jsonable_encoder`` and
+    the standard library ``json``. The models built in ``api.columnar`` are
+    already valid, so this path dumps them with the adapter's compiled
+    serializer instead, producing the same bytes. Keep ``response_model`` on
+    the route for the OpenAPI schema.
+
+    Parameters
+    ----------
+    adapter : TypeAdapter[Any]
+        Adapter for the route's response model.
+    value : Any
+        The response models.
+    response : Response
+        The response injected into the route, carrying its headers.
+    name : str, optional
+        Name of the payload in the serialization metrics.
+
+    Returns
+    -------
+    Response
+        A JSON response with the serialized models.
+    """
+    with stage("serialize", name):
+        body = adapter.dump_json(value)
+    observe_size("serialize", name, len(body))
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=forward_headers(response),
+    )
+
+
+def stream_json(
+    adapter: TypeAdapter[Any],
+    chunks: Iterator[List[Any]],
+    media_type: str = NDJSON,
+    name: str = "",
+) -> Iterator[bytes]:
+    """
+    Serialize chunks of trusted response models as they are produced.
+
+    With ``NDJSON`` each model is written on its own line. With ``JSON`` the
+    chunks are joined into one JSON array; the opening bracket is sent before
+    the first chunk is read, so clients get the first bytes straight away.
+
+    Parameters
+    ----------
+    adapter : TypeAdapter[Any]
+        Adapter for a list of the models.
+    chunks : Iterator[List[Any]]
+        The models, in chunks.
+    media_type : str, optional
+        ``NDJSON`` or ``JSON``, by default ``NDJSON``.
+    name : str, optional
+        Name of the payload in the serialization metrics.
+
+    Yields
+    ------
+    bytes
+        The serialized chunks.
+    """
+    if media_type == JSON:
+        yield b"["
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        with stage("serialize", name):
+            if media_type == JSON:
+                # Strip the brackets of each chunk's array to splice them.
+                body = (b"" if first else b",") + adapter.dump_json(chunk)[1:-1]
+            else:
+                body = b"".join(
+                    model.model_dump_json().encode() + b"\n" for model in chunk
+                )
+        observe_size("serialize", name, len(body))
+        first = False
+        yield body
+    if media_type == JSON:
+        yield b"]"
@@ -2,17 +2,34 @@
 
 import logging
 from datetime import timedelta
-from typing import Any, Dict, List
-
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import Any, Dict, List, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.index import decode_cursor, encode_cursor
 from api.users.auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     authenticate_user,
     create_access_token,
     get_current_active_user,
 )
+from api.users.bulk import (
+    bulk_create_users,
+    bulk_deactivate_users,
+    bulk_update_users,
+    export_users,
+    parse_rows,
+)
 from api.users.crud import (
     create_user,
     delete_user,
@@ -20,9 +37,9 @@ from api.users.crud import (
     update_user,
     update_user_password,
 )
-from api.users.data import User, UserCreate
-from api.users.db import get_async_session
-from api.users.utils import verify_password
+from api.users.data import BulkResult, User, UserCreate
+from api.users.db import get_async_read_session, get_async_session
+from api.users.utils import verify_password_async
 
 
 # Configure logging
@@ -31,12 +48,12 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# A cursor only holds the last ID seen, so it stays valid as users change.
+USERS_CURSOR_VERSION = "users"
+
 
 @router.post("/auth/signin")
-async def signin(
-    request: Request,
-    db: AsyncSession = Depends(get_async_session),  # noqa: B008
-) -> Dict[str, Any]:
+async def signin(request: Request) -> Dict[str, Any]:
     """
     Authenticate a user and return an access token.
 
@@ -44,8 +61,6 @@ async def signin(
     ----------
     request : Request
         The incoming request object.
-    db : AsyncSession
-        The database session.
 
     Returns
     -------
@@ -67,7 +82,7 @@ async def signin(
             detail="Username and password are required",
         )
 
-    user = await authenticate_user(db, username, password)
+    user = await authenticate_user(username, password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -193,22 +208,41 @@ async def signup(
 
 @router.get("/users", response_model=List[User])
 async def get_users_(
+    response: Response,
     current_user: User = Depends(get_current_active_user),  # noqa: B008
     skip: int = 0,
-    limit: int = 100,
-    db: AsyncSession = Depends(get_async_session),  # noqa: B008
+    limit: int = Query(100, ge=1, le=1000),  # noqa: B008
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    prefix: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_session),  # noqa: B008
 ) -> List[User]:
     """
-    Get a list of users (admin only).
+    Get a list of users ordered by ID (admin only).
+
+    If more users match, the ``X-Next-Cursor`` header holds the cursor for the
+    next page. Paging with ``cursor`` costs the same at any depth, unlike
+    ``skip``.
 
     Parameters
     ----------
+    response : Response
+        The outgoing response, used to set headers.
     current_user : User
         The current authenticated user.
     skip : int, optional
         The number of users to skip, by default 0.
     limit : int, optional
         The maximum number of users to return, by default 100.
+    cursor : Optional[str], optional
+        Cursor from a previous page's ``X-Next-Cursor`` header.
+    role : Optional[str], optional
+        Only return users with this role.
+    is_active : Optional[bool], optional
+        Only return active or inactive users.
+    prefix : Optional[str], optional
+        Only return users whose username or email starts with this prefix.
     db : AsyncSession
         The asynchronous database session.
 
@@ -220,13 +254,34 @@ async def get_users_(
     Raises
     ------
     HTTPException
-        If the current user is not an admin.
+        If the current user is not an admin or the cursor is invalid.
     """
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view users"
         )
-    return list(await get_users(db, skip=skip, limit=limit))
+    try:
+        after_id = decode_cursor(cursor, USERS_CURSOR_VERSION) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+    # Read one extra user to know whether there is a next page.
+    users = await get_users(
+        db,
+        skip=skip,
+        limit=limit + 1,
+        after_id=after_id,
+        role=role,
+        is_active=is_active,
+        prefix=prefix,
+    )
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            USERS_CURSOR_VERSION, users[-1].id
+        )
+    return users
 
 
 @router.put("/users/{user_id}", response_model=User)
@@ -306,7 +361,7 @@ async def update_password(
             detail="Current password and new password are required",
         )
 
-    if not verify_password(current_password, current_user.hashed_password):
+    if not await verify_password_async(current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect current password",
@@ -314,7 +369,6 @@ async def update_password(
 
     try:
         await update_user_password(db, current_user.id, new_password)
-        await db.commit()
     except HTTPException as he:
         # Re-raise HTTP exceptions
         raise he
@@ -366,3 +420,167 @@ async def delete_user_(
     if success:
         return {"message": "User deleted successfully"}
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+
+@router.post("/users/bulk", response_model=BulkResult)
+async def bulk_create_users_(
+    request: Request,
+    atomic: bool = False,
+    current_user: User = Depends(get_current_active_user),  # noqa: B008
+    db: AsyncSession = Depends(get_async_session),  # noqa: B008
+) -> BulkResult:
+    """
+    Create users from a CSV or JSON list (admin only).
+
+    CSV bodies (Content-Type ``text/csv``) have a header row with the columns
+    username, email, role and password or hashed_password. JSON bodies are a
+    list of objects with the same fields.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    atomic : bool, optional
+        If True, no user is created when any row is rejected, by default False.
+    current_user : User
+        The current authenticated user.
+    db : AsyncSession
+        The asynchronous database session.
+
+    Returns
+    -------
+    BulkResult
+        The number of users created and the rejected rows.
+
+    Raises
+    ------
+    HTTPException
+        If the current user is not an admin or the body cannot be parsed.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to create users",
+        )
+    rows = parse_rows(await request.body(), request.headers.get("content-type"))
+    return await bulk_create_users(db, rows, atomic=atomic)
+
+
+@router.post("/users/bulk/update", response_model=BulkResult)
+async def bulk_update_users_(
+    request: Request,
+    atomic: bool = False,
+    current_user: User = Depends(get_current_active_user),  # noqa: B008
+    db: AsyncSession = Depends(get_async_session),  # noqa: B008
+) -> BulkResult:
+    """
+    Update users matched by username from a CSV or JSON list (admin only).
+
+    Rows have a username and any of email, role, password and is_active;
+    fields that are left out are not changed.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    atomic : bool, optional
+        If True, no user is updated when any row is rejected, by default False.
+    current_user : User
+        The current authenticated user.
+    db : AsyncSession
+        The asynchronous database session.
+
+    Returns
+    -------
+    BulkResult
+        The number of users updated and the rejected rows.
+
+    Raises
+    ------
+    HTTPException
+        If the current user is not an admin or the body cannot be parsed.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update users",
+        )
+    rows = parse_rows(await request.body(), request.headers.get("content-type"))
+    return await bulk_update_users(db, rows, atomic=atomic)
+
+
+@router.post("/users/bulk/deactivate", response_model=BulkResult)
+async def bulk_deactivate_users_(
+    request: Request,
+    atomic: bool = False,
+    current_user: User = Depends(get_current_active_user),  # noqa: B008
+    db: AsyncSession = Depends(get_async_session),  # noqa: B008
+) -> BulkResult:
+    """
+    Deactivate users from a CSV with a username column or a JSON list (admin only).
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    atomic : bool, optional
+        If True, no user is deactivated when any row is rejected, by default False.
+    current_user : User
+        The current authenticated user.
+    db : AsyncSession
+        The asynchronous database session.
+
+    Returns
+    -------
+    BulkResult
+        The number of users deactivated and the rejected rows.
+
+    Raises
+    ------
+    HTTPException
+        If the current user is not an admin or the body cannot be parsed.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update users",
+        )
+    rows = parse_rows(await request.body(), request.headers.get("content-type"))
+    return await bulk_deactivate_users(db, rows, atomic=atomic)
+
+
+@router.get("/users/export")
+async def export_users_(
+    file_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_active_user),  # noqa: B008
+) -> StreamingResponse:
+    """
+    Stream every user as CSV or NDJSON, without password hashes (admin only).
+
+    Parameters
+    ----------
+    file_format : str, optional
+        "csv" or "ndjson", by default "csv".
+    current_user : User
+        The current authenticated user.
+
+    Returns
+    -------
+    StreamingResponse
+        The users, streamed in batches.
+
+    Raises
+    ------
+    HTTPException
+        If the current user is not an admin.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view users"
+        )
+    media_type = "text/csv" if file_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_users(file_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{file_format}"'},
+    )
@@ -1,50 +1,629 @@
 """Delirium scorecard routes."""
 
-from typing import List
+import asyncio
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import APIRouter
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 
+from api.aggregation import MAX_ROLLING_WINDOW, month_ordinal
+from api.compression import negotiate_encoding
 from api.data import (
+    DEMOGRAPHICS_OBJECT,
+    ENCOUNTERS_OBJECT,
+    RATES_OBJECT,
+    RECENT_COHORT_OBJECT,
+    SITE_PATTERN,
+    SITES,
+    TIME_TRENDS_OBJECT,
+    TRAINING_COHORT_OBJECT,
+    get_aggregated_rates,
+    get_dataset_version,
+    get_demographic_drift,
+    get_demographics_history,
+    get_filtered_rates,
+    iter_delirium_rates,
+    iter_time_trends,
+    site_object,
+)
+from api.etag import check_not_modified, response_etag, set_cache_headers
+from api.executor import data_executor
+from api.index import period_ordinal
+from api.models import (
+    AggregatedRate,
+    AggregationPeriod,
     DeliriumRate,
+    DemographicItem,
     PatientDemographics,
+    Quarter,
+    Scorecard,
+    ScorecardSection,
     TimeSeriesData,
-    get_delirium_rates,
-    get_patient_demographics,
-    get_time_trends,
 )
+from api.responses import (
+    JSON,
+    NDJSON,
+    aggregated_rates_adapter,
+    demographic_items_adapter,
+    demographics_history_adapter,
+    forward_headers,
+    model_response,
+    rates_adapter,
+    stream_json,
+    time_trends_adapter,
+)
+from api.snapshots import (
+    SCORECARD_SNAPSHOTS,
+    SOURCES,
+    get_scorecard_snapshot,
+    get_snapshot,
+    materialize_snapshots,
+    snapshot_response,
+)
+from api.users.auth import get_current_active_user
+from api.users.data import User
 
 
 router = APIRouter()
 
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+
+def site_param(
+    site: Optional[str] = Query(None, pattern=SITE_PATTERN),  # noqa: B008
+) -> Optional[str]:
+    """
+    Validate the site a request is for.
+
+    Parameters
+    ----------
+    site : Optional[str], optional
+        The site, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Optional[str]
+        The site.
+
+    Raises
+    ------
+    HTTPException
+        If ``SITES`` is set and does not include the site.
+    """
+    if site is not None and SITES and site not in SITES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown site: {site}"
+        )
+    return site
+
 
 @router.get("/rates", response_model=List[DeliriumRate])
-async def delirium_rates() -> List[DeliriumRate]:
+async def delirium_rates(
+    request: Request,
+    response: Response,
+    ward: Optional[List[str]] = Query(None),  # noqa: B008
+    start_year: Optional[int] = None,
+    start_quarter: Quarter = Quarter.Q1,
+    end_year: Optional[int] = None,
+    end_quarter: Quarter = Quarter.Q4,
+    limit: Optional[int] = Query(None, ge=1, le=10000),  # noqa: B008
+    cursor: Optional[str] = None,
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Union[List[DeliriumRate], Response]:
     """Get delirium rates.
 
+    Without filters every rate is returned in dataset order. With any filter,
+    rates are returned in ward and period order, and if ``limit`` cuts the
+    result short the ``X-Next-Cursor`` header holds the cursor for the next page.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    response : Response
+        The outgoing response, used to set headers.
+    ward : Optional[List[str]], optional
+        Wards to include, repeatable, by default all of them.
+    start_year : Optional[int], optional
+        Year of the first quarter to include, by default unbounded.
+    start_quarter : Quarter, optional
+        First quarter to include in ``start_year``, by default Q1.
+    end_year : Optional[int], optional
+        Year of the last quarter to include, by default unbounded.
+    end_quarter : Quarter, optional
+        Last quarter to include in ``end_year``, by default Q4.
+    limit : Optional[int], optional
+        Maximum number of rates to return, by default no limit.
+    cursor : Optional[str], optional
+        Cursor from a previous page's ``X-Next-Cursor`` header.
+    site : Optional[str], optional
+        The site to serve, by default the unprefixed datasets.
+
     Returns
     -------
     List[DeliriumRate]
+
+    Raises
+    ------
+    HTTPException
+        If the cursor is invalid or was issued for an older version of the data.
+    """
+    version = await data_executor.run(
+        get_dataset_version, site_object(RATES_OBJECT, site)
+    )
+    etag = response_etag(request, version)
+    not_modified = check_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    if (
+        ward is None
+        and start_year is None
+        and end_year is None
+        and limit is None
+        and cursor is None
+    ):
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        snapshot = await data_executor.run(get_snapshot, "rates", encoding, site)
+        set_cache_headers(response, etag)
+        return snapshot_response(snapshot, response, encoding)
+
+    start = None if start_year is None else period_ordinal(start_year, start_quarter)
+    end = None if end_year is None else period_ordinal(end_year, end_quarter)
+    try:
+        rates, next_cursor = await data_executor.run(
+            get_filtered_rates,
+            ward,
+            start,
+            end,
+            cursor=cursor,
+            limit=limit,
+            site=site,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    set_cache_headers(response, etag)
+    return model_response(rates_adapter, rates, response, name="rates")
+
+
+@router.get("/rates/stream")
+async def delirium_rates_stream(
+    request: Request,
+    response: Response,
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|json)$"),
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Response:
+    """Stream every delirium rate, reading the dataset in chunks.
+
+    Memory stays bounded however long the history is, and the first rates are
+    sent before the rest of the dataset is read.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    response : Response
+        The outgoing response, used to set headers.
+    stream_format : str, optional
+        "ndjson" for one rate per line, or "json" for a JSON array, by default
+        "ndjson".
+    site : Optional[str], optional
+        The site to serve, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Response
+        The rates, streamed in dataset order.
+    """
+    version = await data_executor.run(
+        get_dataset_version, site_object(RATES_OBJECT, site)
+    )
+    etag = response_etag(request, version)
+    not_modified = check_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    media_type = NDJSON if stream_format == "ndjson" else JSON
+    rates = await data_executor.run(iter_delirium_rates, site=site)
+    chunks = stream_json(rates_adapter, rates, media_type, "rates")
+    set_cache_headers(response, etag)
+    return StreamingResponse(
+        data_executor.iterate(chunks),
+        media_type=media_type,
+        headers=forward_headers(response),
+    )
+
+
+@router.get("/rates/aggregate", response_model=List[AggregatedRate])
+async def aggregated_rates(
+    request: Request,
+    response: Response,
+    period: AggregationPeriod = AggregationPeriod.QUARTER,
+    window: int = Query(3, ge=1, le=MAX_ROLLING_WINDOW),  # noqa: B008
+    ward: Optional[List[str]] = Query(None),  # noqa: B008
+    start: Optional[str] = Query(None, pattern=MONTH_PATTERN),  # noqa: B008
+    end: Optional[str] = Query(None, pattern=MONTH_PATTERN),  # noqa: B008
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Union[List[AggregatedRate], Response]:
+    """Get delirium rates computed from encounter-level records.
+
+    Rates are the percentage of encounters flagged with delirium, per ward and
+    period. Each aggregation is computed once per version of the encounters
+    dataset, so repeated and filtered requests only select from it.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    response : Response
+        The outgoing response, used to set headers.
+    period : AggregationPeriod, optional
+        Calendar quarters, calendar months or rolling windows, by default
+        quarters.
+    window : int, optional
+        Length of the rolling windows in months, by default 3.
+    ward : Optional[List[str]], optional
+        Wards to include, repeatable, by default all of them.
+    start : Optional[str], optional
+        First month, as YYYY-MM, a period may end in, by default unbounded.
+    end : Optional[str], optional
+        Last month, as YYYY-MM, a period may end in, by default unbounded.
+    site : Optional[str], optional
+        The site to serve, by default the unprefixed datasets.
+
+    Returns
+    -------
+    List[AggregatedRate]
+        The rates in ward and period order, skipping periods without
+        encounters.
+
+    Raises
+    ------
+    HTTPException
+        If the encounters dataset is invalid.
     """
-    return get_delirium_rates()
+    version = await data_executor.run(
+        get_dataset_version, site_object(ENCOUNTERS_OBJECT, site)
+    )
+    etag = response_etag(request, version)
+    not_modified = check_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    first, last = (
+        None if month is None else month_ordinal(int(month[:4]), int(month[5:]))
+        for month in (start, end)
+    )
+    try:
+        rates = await data_executor.run(
+            get_aggregated_rates, period, window, ward, first, last, site
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+    set_cache_headers(response, etag)
+    return model_response(
+        aggregated_rates_adapter, rates, response, name="aggregated-rates"
+    )
 
 
 @router.get("/time-trends", response_model=List[TimeSeriesData])
-async def time_trends() -> List[TimeSeriesData]:
+async def time_trends(
+    request: Request,
+    response: Response,
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Union[List[TimeSeriesData], Response]:
     """Get time trends.
 
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    response : Response
+        The outgoing response, used to set headers.
+    site : Optional[str], optional
+        The site to serve, by default the unprefixed datasets.
+
     Returns
     -------
     List[TimeSeriesData]
+        The time trend data points, or a 304 response if the client's copy is
+        current.
     """
-    return get_time_trends()
+    version = await data_executor.run(
+        get_dataset_version, site_object(TIME_TRENDS_OBJECT, site)
+    )
+    etag = response_etag(request, version)
+    not_modified = check_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    snapshot = await data_executor.run(get_snapshot, "time-trends", encoding, site)
+    set_cache_headers(response, etag)
+    return snapshot_response(snapshot, response, encoding)
+
+
+@router.get("/time-trends/stream")
+async def time_trends_stream(
+    request: Request,
+    response: Response,
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|json)$"),
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Response:
+    """Stream every time trend data point, reading the dataset in chunks.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    response : Response
+        The outgoing response, used to set headers.
+    stream_format : str, optional
+        "ndjson" for one data point per line, or "json" for a JSON array, by
+        default "ndjson".
+    site : Optional[str], optional
+        The site to serve, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Response
+        The time trends, streamed in dataset order.
+    """
+    version = await data_executor.run(
+        get_dataset_version, site_object(TIME_TRENDS_OBJECT, site)
+    )
+    etag = response_etag(request, version)
+    not_modified = check_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    media_type = NDJSON if stream_format == "ndjson" else JSON
+    trends = await data_executor.run(iter_time_trends, site=site)
+    chunks = stream_json(time_trends_adapter, trends, media_type, "time-trends")
+    set_cache_headers(response, etag)
+    return StreamingResponse(
+        data_executor.iterate(chunks),
+        media_type=media_type,
+        headers=forward_headers(response),
+    )
 
 
 @router.get("/demographics", response_model=PatientDemographics)
-async def patient_demographics() -> PatientDemographics:
+async def patient_demographics(
+    request: Request,
+    response: Response,
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Union[PatientDemographics, Response]:
     """Get patient demographics.
 
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    response : Response
+        The outgoing response, used to set headers.
+    site : Optional[str], optional
+        The site to serve, by default the unprefixed datasets.
+
     Returns
     -------
     PatientDemographics
+        The demographics of the most recent quarter, or a 304 response if the
+        client's copy is current.
+    """
+    version = await data_executor.run(
+        get_dataset_version, site_object(DEMOGRAPHICS_OBJECT, site)
+    )
+    etag = response_etag(request, version)
+    not_modified = check_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    snapshot = await data_executor.run(get_snapshot, "demographics", encoding, site)
+    set_cache_headers(response, etag)
+    return snapshot_response(snapshot, response, encoding)
+
+
+@router.get("/demographics/history", response_model=List[PatientDemographics])
+async def demographics_history(
+    request: Request,
+    response: Response,
+    start_year: Optional[int] = None,
+    start_quarter: Quarter = Quarter.Q1,
+    end_year: Optional[int] = None,
+    end_quarter: Quarter = Quarter.Q4,
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Union[List[PatientDemographics], Response]:
+    """Get patient demographics of every quarter in a range.
+
+    The dataset is indexed by quarter once per version, so any quarter or range
+    of quarters is served without scanning it. Pass the same start and end to
+    get a single quarter.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    response : Response
+        The outgoing response, used to set headers.
+    start_year : Optional[int], optional
+        Year of the first quarter to include, by default unbounded.
+    start_quarter : Quarter, optional
+        First quarter to include in ``start_year``, by default Q1.
+    end_year : Optional[int], optional
+        Year of the last quarter to include, by default unbounded.
+    end_quarter : Quarter, optional
+        Last quarter to include in ``end_year``, by default Q4.
+    site : Optional[str], optional
+        The site to serve, by default the unprefixed datasets.
+
+    Returns
+    -------
+    List[PatientDemographics]
+        The demographics of each quarter in the range, in period order.
+
+    Raises
+    ------
+    HTTPException
+        If the demographics dataset is invalid.
+    """
+    version = await data_executor.run(
+        get_dataset_version, site_object(DEMOGRAPHICS_OBJECT, site)
+    )
+    etag = response_etag(request, version)
+    not_modified = check_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    start = None if start_year is None else period_ordinal(start_year, start_quarter)
+    end = None if end_year is None else period_ordinal(end_year, end_quarter)
+    try:
+        history = await data_executor.run(get_demographics_history, start, end, site)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+    set_cache_headers(response, etag)
+    return model_response(
+        demographics_history_adapter, history, response, name="demographics-history"
+    )
+
+
+@router.get("/demographics/drift", response_model=Dict[str, DemographicItem])
+async def demographic_drift(
+    request: Request,
+    response: Response,
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Union[Dict[str, DemographicItem], Response]:
+    """Get demographic drift computed from the raw recent and training cohorts.
+
+    Cohorts are read in chunks in a single pass, so they need not fit in
+    memory, and the result is kept until either cohort changes.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    response : Response
+        The outgoing response, used to set headers.
+    site : Optional[str], optional
+        The site to serve, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Dict[str, DemographicItem]
+        Means, SDs and SMDs of each attribute, or of each level of a
+        categorical attribute, keyed by name.
+    """
+    versions = await asyncio.gather(
+        *(
+            data_executor.run(get_dataset_version, site_object(object_name, site))
+            for object_name in (RECENT_COHORT_OBJECT, TRAINING_COHORT_OBJECT)
+        )
+    )
+    etag = response_etag(request, *versions)
+    not_modified = check_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    items = await data_executor.run(get_demographic_drift, site)
+    set_cache_headers(response, etag)
+    return model_response(demographic_items_adapter, items, response, name="drift")
+
+
+@router.get("/scorecard", response_model=Scorecard, response_model_exclude_none=True)
+async def scorecard(
+    request: Request,
+    response: Response,
+    section: Optional[List[ScorecardSection]] = Query(None),  # noqa: B008
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Union[Scorecard, Response]:
+    """Get the dashboard datasets in one payload.
+
+    The datasets are fetched concurrently, so the response takes as long as the
+    slowest of them rather than their sum.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request object.
+    response : Response
+        The outgoing response, used to set headers.
+    section : Optional[List[ScorecardSection]], optional
+        Sections to include, repeatable, by default all of them.
+    site : Optional[str], optional
+        The site to serve, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Scorecard
+    """
+    sections = list(dict.fromkeys(section or ScorecardSection))
+    names = [SCORECARD_SNAPSHOTS[s] for s in sections]
+    versions = await asyncio.gather(
+        *(
+            data_executor.run(
+                get_dataset_version, site_object(SOURCES[name].object_name, site)
+            )
+            for name in names
+        )
+    )
+    etag = response_etag(request, *versions)
+    not_modified = check_not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    snapshots = await asyncio.gather(
+        *(data_executor.run(get_snapshot, name, None, site) for name in names)
+    )
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    combined = await data_executor.run(
+        get_scorecard_snapshot, dict(zip(sections, snapshots)), encoding, site
+    )
+    set_cache_headers(response, etag)
+    return snapshot_response(combined, response, encoding)
+
+
+@router.post("/admin/materialize")
+async def materialize(
+    current_user: User = Depends(get_current_active_user),  # noqa: B008
+    site: Optional[str] = Depends(site_param),  # noqa: B008
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compile the response snapshots against the latest data (admin only).
+
+    Call this after uploading new data so that the next dashboard requests are
+    served from pre-serialized payloads.
+
+    Parameters
+    ----------
+    current_user : User
+        The current authenticated user.
+    site : Optional[str], optional
+        The site to compile, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        The source ETag and payload size of each snapshot, keyed by endpoint.
+
+    Raises
+    ------
+    HTTPException
+        If the current user is not an admin.
     """
-    return get_patient_demographics()
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to materialize snapshots",
+        )
+    compiled = await data_executor.run(materialize_snapshots, site)
+    return {
+        name: {"etag": etag, "size": size} for name, (etag, size) in compiled.items()
+    }
@@ -0,0 +1,19 @@
+"""Metrics route."""
+
+from fastapi import APIRouter, Response
+
+from api.metrics import metrics_response
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Get the metrics in the Prometheus text format.
+
+    Returns
+    -------
+    Response
+    """
+    return metrics_response()
@@ -0,0 +1,494 @@
+"""Pre-serialized response snapshots, compiled once per data version."""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from api.columnar import rates_from_frame, time_trends_from_frame
+from api.compression import COMPRESSION_MIN_SIZE, ENCODINGS, compress
+from api.data import (
+    BUCKET_NAME,
+    DEMOGRAPHICS_OBJECT,
+    RATES_COLUMNS,
+    RATES_OBJECT,
+    TIME_TRENDS_COLUMNS,
+    TIME_TRENDS_OBJECT,
+    dataset_cache,
+    get_dataset_version,
+    load_versioned_from_minio,
+    patient_demographics_from_frame,
+    site_object,
+    split_site_object,
+)
+from api.metrics import CACHE_REQUESTS, observe_size, stage
+from api.models import ScorecardSection
+from api.responses import (
+    demographics_adapter,
+    forward_headers,
+    rates_adapter,
+    time_trends_adapter,
+)
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
+SNAPSHOT_CACHE_MAX_BYTES = int(os.getenv("SNAPSHOT_CACHE_MAX_BYTES", str(64 * 2**20)))
+
+
+@dataclass
+class Snapshot:
+    """
+    A compiled response payload.
+
+    Attributes
+    ----------
+    name : str
+        Name of the endpoint the payload belongs to, qualified by its site.
+    etag : str
+        ETag of the source object the payload was compiled from.
+    body : bytes
+        The serialized JSON payload.
+    encoded : Dict[str, bytes]
+        The compressed payload, keyed by content coding, filled in by ``encode``.
+    """
+
+    name: str
+    etag: str
+    body: bytes
+    encoded: Dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    @property
+    def size(self) -> int:
+        """Size of the payload and its compressed variants, in bytes."""
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+    def encode(self, encoding: Optional[str]) -> bytes:
+        """
+        Return the payload in a content coding, compressing it on first use.
+
+        Parameters
+        ----------
+        encoding : Optional[str]
+            The content coding, None for identity.
+
+        Returns
+        -------
+        bytes
+            The encoded payload. Payloads below ``COMPRESSION_MIN_SIZE`` are
+            always returned as is.
+        """
+        if encoding is None or len(self.body) < COMPRESSION_MIN_SIZE:
+            return self.body
+        encoded = self.encoded.get(encoding)
+        if encoded is None:
+            with stage(f"compress_{encoding}", self.name):
+                encoded = compress(self.body, encoding)
+            observe_size(f"compress_{encoding}", self.name, len(encoded))
+            self.encoded[encoding] = encoded
+        return encoded
+
+
+@dataclass
+class SnapshotSource:
+    """
+    How to compile the snapshot of an endpoint.
+
+    Attributes
+    ----------
+    object_name : str
+        The source object in the data bucket.
+    columns : Optional[List[str]]
+        Columns to read from the source object, None for all of them.
+    build : Callable[[pd.DataFrame], Any]
+        Builds the endpoint's response models from the source dataset.
+    adapter : TypeAdapter[Any]
+        Serializes the response models.
+    """
+
+    object_name: str
+    columns: Optional[List[str]]
+    build: Callable[["pd.DataFrame"], Any]
+    adapter: TypeAdapter[Any]
+
+
+SOURCES: Dict[str, SnapshotSource] = {
+    "rates": SnapshotSource(
+        RATES_OBJECT,
+        RATES_COLUMNS,
+        rates_from_frame,
+        rates_adapter,
+    ),
+    "time-trends": SnapshotSource(
+        TIME_TRENDS_OBJECT,
+        TIME_TRENDS_COLUMNS,
+        time_trends_from_frame,
+        time_trends_adapter,
+    ),
+    "demographics": SnapshotSource(
+        DEMOGRAPHICS_OBJECT,
+        None,
+        patient_demographics_from_frame,
+        demographics_adapter,
+    ),
+}
+
+# Snapshot backing each section of the combined scorecard payload.
+SCORECARD_SNAPSHOTS: Dict[ScorecardSection, str] = {
+    ScorecardSection.RATES: "rates",
+    ScorecardSection.TIME_TRENDS: "time-trends",
+    ScorecardSection.DEMOGRAPHICS: "demographics",
+}
+
+
+class SnapshotStore:
+    """
+    Latest compiled snapshot of each endpoint, optionally persisted to disk.
+
+    Snapshots written to ``directory`` survive restarts: a fresh process serves
+    them for the current object version without loading the dataset at all.
+    The snapshots held in memory, with their compressed variants, are kept
+    under ``max_bytes`` by evicting the least recently used ones, so serving
+    many sites only keeps the busy ones resident. Evicted snapshots are read
+    back from ``directory``, or compiled again, on their next request.
+
+    Parameters
+    ----------
+    directory : Optional[str]
+        Directory to persist snapshots in, None to keep them in memory only.
+    max_bytes : int
+        Upper bound on the combined size of the snapshots held in memory.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = SNAPSHOT_DIR,
+        max_bytes: int = SNAPSHOT_CACHE_MAX_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._snapshots: "OrderedDict[str, Snapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Combined size of the snapshots held in memory, in bytes."""
+        with self._lock:
+            return sum(snapshot.size for snapshot in self._snapshots.values())
+
+    def get(self, name: str, etag: str) -> Optional[Snapshot]:
+        """
+        Return the snapshot of an endpoint for an object version.
+
+        Parameters
+        ----------
+        name : str
+            Name of the endpoint.
+        etag : str
+            ETag of the source object.
+
+        Returns
+        -------
+        Optional[Snapshot]
+            The snapshot, or None if it has not been compiled for this version.
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(name)
+            if snapshot is not None and snapshot.etag == etag:
+                self._snapshots.move_to_end(name)
+                # Compressed variants are added after ``put``, so trim here too.
+                self._trim()
+                return snapshot
+        path = self._path(name, etag)
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            snapshot = Snapshot(name, etag, f.read())
+        with self._lock:
+            self._insert(snapshot)
+        return snapshot
+
+    def put(self, snapshot: Snapshot) -> None:
+        """
+        Store a snapshot, replacing older versions of the same endpoint.
+
+        Parameters
+        ----------
+        snapshot : Snapshot
+            The snapshot to store.
+        """
+        with self._lock:
+            previous = self._snapshots.get(snapshot.name)
+            self._insert(snapshot)
+        path = self._path(snapshot.name, snapshot.etag)
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(snapshot.body)
+            os.replace(f"{path}.tmp", path)
+            if previous is not None and previous.etag != snapshot.etag:
+                old_path = self._path(previous.name, previous.etag)
+                if old_path is not None and os.path.exists(old_path):
+                    os.remove(old_path)
+        except OSError as e:
+            logger.warning(f"Could not persist snapshot {snapshot.name}: {e}")
+
+    def __contains__(self, name: str) -> bool:
+        """Return whether a snapshot of the endpoint is held in memory."""
+        with self._lock:
+            return name in self._snapshots
+
+    def clear(self) -> None:
+        """Drop the in-memory snapshots."""
+        with self._lock:
+            self._snapshots.clear()
+
+    def _insert(self, snapshot: Snapshot) -> None:
+        """Insert a snapshot as the most recently used and trim the store."""
+        self._snapshots.pop(snapshot.name, None)
+        self._snapshots[snapshot.name] = snapshot
+        self._trim()
+
+    def _trim(self) -> None:
+        """Evict least recently used snapshots, keeping the newest, over budget."""
+        size = sum(snapshot.size for snapshot in self._snapshots.values())
+        while size > self.max_bytes and len(self._snapshots) > 1:
+            _, evicted = self._snapshots.popitem(last=False)
+            size -= evicted.size
+            self.evictions += 1
+
+    def _path(self, name: str, etag: str) -> Optional[str]:
+        """Return the file a snapshot is persisted to."""
+        if self.directory is None:
+            return None
+        filename = etag.strip('"') + ".json"
+        return os.path.join(self.directory, name, filename)
+
+
+snapshot_store = SnapshotStore()
+
+
+def snapshot_key(name: str, site: Optional[str] = None) -> str:
+    """
+    Return the name a snapshot is stored under, qualified by its site.
+
+    Parameters
+    ----------
+    name : str
+        Name of the endpoint.
+    site : Optional[str], optional
+        The site, by default the unprefixed datasets.
+
+    Returns
+    -------
+    str
+        The snapshot name.
+    """
+    return name if site is None else f"sites/{site}/{name}"
+
+
+def compile_snapshot(name: str, site: Optional[str] = None) -> Snapshot:
+    """
+    Compile the snapshot of an endpoint from the current data.
+
+    Parameters
+    ----------
+    name : str
+        Name of the endpoint.
+    site : Optional[str], optional
+        The site, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Snapshot
+        The compiled snapshot.
+    """
+    source = SOURCES[name]
+    # Built from the dataset directly rather than derived from its cache
+    # entry, so the body is only held by ``snapshot_store`` and evicting it
+    # frees it.
+    df, etag = load_versioned_from_minio(
+        BUCKET_NAME, site_object(source.object_name, site), columns=source.columns
+    )
+    with stage("build", name):
+        models = source.build(df)
+    with stage("serialize", name):
+        body = bytes(source.adapter.dump_json(models))
+    observe_size("serialize", name, len(body))
+    snapshot = Snapshot(snapshot_key(name, site), etag, body)
+    snapshot_store.put(snapshot)
+    return snapshot
+
+
+def get_snapshot(
+    name: str, encoding: Optional[str] = None, site: Optional[str] = None
+) -> Snapshot:
+    """
+    Return the snapshot of an endpoint, compiling it if the data changed.
+
+    Parameters
+    ----------
+    name : str
+        Name of the endpoint.
+    encoding : Optional[str], optional
+        Content coding to prepare the payload in, by default identity.
+    site : Optional[str], optional
+        The site, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Snapshot
+        The snapshot for the current version of the source object.
+    """
+    version = get_dataset_version(site_object(SOURCES[name].object_name, site))
+    snapshot = None
+    if version is not None:
+        snapshot = snapshot_store.get(snapshot_key(name, site), version.etag)
+    CACHE_REQUESTS.labels("snapshot", "miss" if snapshot is None else "hit").inc()
+    if snapshot is None:
+        snapshot = compile_snapshot(name, site)
+    snapshot.encode(encoding)
+    return snapshot
+
+
+def get_scorecard_snapshot(
+    sections: Dict[ScorecardSection, Snapshot],
+    encoding: Optional[str] = None,
+    site: Optional[str] = None,
+) -> Snapshot:
+    """
+    Splice section snapshots into one JSON object without re-serializing them.
+
+    The combined snapshot is kept like the others, so its compressed variants
+    are also built once per data version.
+
+    Parameters
+    ----------
+    sections : Dict[ScorecardSection, Snapshot]
+        The snapshot of each section, in payload order.
+    encoding : Optional[str], optional
+        Content coding to prepare the payload in, by default identity.
+    site : Optional[str], optional
+        The site the sections belong to, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Snapshot
+        The combined snapshot, keyed by section.
+    """
+    name = snapshot_key(
+        "scorecard-" + "-".join(section.value for section in sections), site
+    )
+    etag = "+".join(snapshot.etag.strip('"') for snapshot in sections.values())
+    combined = snapshot_store.get(name, etag)
+    if combined is None:
+        members = [
+            json.dumps(section.value).encode() + b":" + snapshot.body
+            for section, snapshot in sections.items()
+        ]
+        combined = Snapshot(name, etag, b"{" + b",".join(members) + b"}")
+        snapshot_store.put(combined)
+    combined.encode(encoding)
+    return combined
+
+
+def snapshot_response(
+    snapshot: Snapshot, response: Response, encoding: Optional[str] = None
+) -> Response:
+    """
+    Wrap a snapshot in a response, keeping the headers already set on ``response``.
+
+    Parameters
+    ----------
+    snapshot : Snapshot
+        The snapshot to send.
+    response : Response
+        The response injected into the route, carrying the cache headers.
+    encoding : Optional[str], optional
+        Content coding negotiated with the client, by default identity.
+
+    Returns
+    -------
+    Response
+        A JSON response with the pre-serialized, possibly compressed, payload.
+    """
+    headers = forward_headers(response)
+    body = snapshot.encode(encoding)
+    if body is not snapshot.body:
+        headers["Content-Encoding"] = str(encoding)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def refresh_snapshots(object_name: str) -> List[str]:
+    """
+    Recompile the snapshots compiled from an object after it changed.
+
+    Their compressed variants are built as well, off the request path. For a
+    site's object, only the snapshots currently held in memory are
+    recompiled, so that sites nobody is viewing are not loaded.
+
+    Parameters
+    ----------
+    object_name : str
+        The object that changed.
+
+    Returns
+    -------
+    List[str]
+        Names of the recompiled snapshots.
+    """
+    site, base_name = split_site_object(object_name)
+    names = [
+        name
+        for name, source in SOURCES.items()
+        if source.object_name == base_name
+        and (site is None or snapshot_key(name, site) in snapshot_store)
+    ]
+    for name in names:
+        snapshot = compile_snapshot(name, site)
+        for encoding in ENCODINGS:
+            snapshot.encode(encoding)
+    return [snapshot_key(name, site) for name in names]
+
+
+def materialize_snapshots(site: Optional[str] = None) -> Dict[str, Tuple[str, int]]:
+    """
+    Compile the snapshots of every endpoint against the latest data.
+
+    Object versions are revalidated first so that freshly uploaded data is
+    picked up immediately, and the compressed variants are built as well.
+    Unchanged datasets are not parsed again, and new delta partitions are
+    merged into the cached datasets.
+
+    Parameters
+    ----------
+    site : Optional[str], optional
+        The site, by default the unprefixed datasets.
+
+    Returns
+    -------
+    Dict[str, Tuple[str, int]]
+        The source ETag and payload size of each snapshot, keyed by endpoint.
+    """
+    compiled = {}
+    for name, source in SOURCES.items():
+        dataset_cache.expire((BUCKET_NAME, site_object(source.object_name, site)))
+        snapshot = compile_snapshot(name, site)
+        for encoding in ENCODINGS:
+            snapshot.encode(encoding)
+        compiled[name] = (snapshot.etag, len(snapshot.body))
+    return compiled
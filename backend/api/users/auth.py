@@ -9,16 +9,16 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.metrics import CACHE_REQUESTS, stage
+from api.users.cache import user_cache
 from api.users.crud import get_user_by_username
 from api.users.data import TokenData, User
-from api.users.db import get_async_session
-from api.users.utils import verify_password
+from api.users.db import AsyncReadSessionLocal, get_async_read_session
+from api.users.utils import verify_password_async
 
 
-# Constants
+# Constants, checked on startup by ``api.main.check_settings``
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY")
-if not SECRET_KEY:
-    raise ValueError("JWT_SECRET_KEY environment variable is not set")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
@@ -26,16 +26,16 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/signin")
 
 
-async def authenticate_user(
-    db: AsyncSession, username: str, password: str
-) -> Optional[User]:
+async def authenticate_user(username: str, password: str) -> Optional[User]:
     """
     Authenticate a user by username and password.
 
+    The user is looked up on a short-lived read session, which is closed
+    before the password is verified, so no connection is held while bcrypt
+    runs.
+
     Parameters
     ----------
-    db : AsyncSession
-        The database session.
     username : str
         The username to authenticate.
     password : str
@@ -46,10 +46,11 @@ async def authenticate_user(
     Optional[User]
         The authenticated user if successful, None otherwise.
     """
-    user = await get_user_by_username(db, username)
+    async with AsyncReadSessionLocal() as db:
+        user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
@@ -80,11 +81,14 @@ def create_access_token(
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),  # noqa: B008
-    db: AsyncSession = Depends(get_async_session),  # noqa: B008
+    db: AsyncSession = Depends(get_async_read_session),  # noqa: B008
 ) -> User:
     """
     Get the current authenticated user from the token.
 
+    Users are served from ``user_cache`` when possible, so most requests do not
+    query the database.
+
     Parameters
     ----------
     token : str
@@ -108,7 +112,8 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with stage("token"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -116,9 +121,16 @@ async def get_current_user(
     except JWTError as err:
         raise credentials_exception from err
 
-    user = await get_user_by_username(db, username=token_data.username)
+    user = user_cache.get(username)
+    CACHE_REQUESTS.labels("user", "miss" if user is None else "hit").inc()
+    if user is not None:
+        return user
+    generation = user_cache.generation
+    with stage("user"):
+        user = await get_user_by_username(db, username=token_data.username)
     if user is None:
         raise credentials_exception
+    user_cache.put(user, generation)
     return user
 
 
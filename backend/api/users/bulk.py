@@ -0,0 +1,413 @@
+"""Bulk user import, update, deactivation and export."""
+
+import csv
+import io
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.metrics import stage
+from api.users.cache import user_cache
+from api.users.crud import UserModel
+from api.users.data import (
+    BulkResult,
+    BulkRowError,
+    UserBulkUpdate,
+    UserImport,
+)
+from api.users.db import AsyncReadSessionLocal
+from api.users.utils import hash_passwords_async, is_password_hash
+
+
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "10000"))
+# Rows per IN (...) lookup, well below SQLite's limit on bound parameters.
+LOOKUP_CHUNK_SIZE = 500
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_COLUMNS = ["id", "username", "email", "role", "is_active"]
+
+
+def parse_rows(body: bytes, content_type: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Parse the rows of a bulk request from a CSV or JSON body.
+
+    CSV bodies need a header row; empty cells are treated as missing. JSON
+    bodies are a list of objects, or a list of usernames for deactivation.
+
+    Parameters
+    ----------
+    body : bytes
+        The request body.
+    content_type : Optional[str]
+        The Content-Type header of the request; "text/csv" selects CSV.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        The rows.
+
+    Raises
+    ------
+    HTTPException
+        422 if the body cannot be parsed, 413 if it has more than
+        ``BULK_MAX_ROWS`` rows.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    try:
+        if media_type == "text/csv":
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            rows = [
+                {key: value for key, value in row.items() if key and value != ""}
+                for row in reader
+            ]
+        else:
+            parsed = json.loads(body)
+            if not isinstance(parsed, list):
+                raise ValueError("expected a list of rows")
+            rows = [
+                {"username": item} if isinstance(item, str) else item for item in parsed
+            ]
+    except (UnicodeDecodeError, csv.Error, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Could not parse the request body: {e}",
+        ) from e
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ROWS} rows can be sent at once",
+        )
+    return rows
+
+
+def _validate_rows(
+    rows: List[Dict[str, Any]], model: Type[BaseModel], errors: List[BulkRowError]
+) -> List[Tuple[int, Any]]:
+    """
+    Validate each row against a model, and reject repeated usernames.
+
+    Parameters
+    ----------
+    rows : List[Dict[str, Any]]
+        The parsed rows.
+    model : Type[BaseModel]
+        The model of a row.
+    errors : List[BulkRowError]
+        Rejected rows are appended here.
+
+    Returns
+    -------
+    List[Tuple[int, Any]]
+        The row number and validated model of each valid row.
+    """
+    valid = []
+    seen = set()
+    for number, row in enumerate(rows, start=1):
+        username = row.get("username") if isinstance(row, dict) else None
+        try:
+            item = model.model_validate(row)
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            )
+            errors.append(BulkRowError(row=number, username=username, detail=detail))
+            continue
+        if item.username in seen:  # type: ignore[attr-defined]
+            errors.append(
+                BulkRowError(
+                    row=number, username=username, detail="Duplicate username in input"
+                )
+            )
+            continue
+        seen.add(item.username)  # type: ignore[attr-defined]
+        valid.append((number, item))
+    return valid
+
+
+async def _existing(column: Any, values: Sequence[str]) -> Dict[str, Tuple[int, str]]:
+    """
+    Look up users by the values of a unique column.
+
+    The lookup runs on a read session, so the single write connection is only
+    checked out for the final write. A user written in between is caught as a
+    conflict on commit.
+
+    Parameters
+    ----------
+    column : Any
+        ``UserModel.username`` or ``UserModel.email``.
+    values : Sequence[str]
+        The values to look up.
+
+    Returns
+    -------
+    Dict[str, Tuple[int, str]]
+        The id and username of each user found, keyed by the column value.
+    """
+    found = {}
+    async with AsyncReadSessionLocal() as session:
+        for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+            chunk = values[start : start + LOOKUP_CHUNK_SIZE]
+            result = await session.execute(
+                select(column, UserModel.id, UserModel.username).where(
+                    column.in_(chunk)
+                )
+            )
+            for value, user_id, username in result:
+                found[value] = (user_id, username)
+    return found
+
+
+async def _commit(db: AsyncSession) -> None:
+    """
+    Commit a bulk write, turning a conflicting concurrent change into a 409.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        The database session.
+
+    Raises
+    ------
+    HTTPException
+        409 if a row conflicts with a user written since it was validated.
+    """
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Users changed while the request was processed, please retry",
+        ) from e
+
+
+def _result(applied: int, errors: List[BulkRowError]) -> BulkResult:
+    """Build the result of a bulk operation, with errors in input order."""
+    errors.sort(key=lambda error: error.row)
+    return BulkResult(succeeded=applied, failed=len(errors), errors=errors)
+
+
+async def bulk_create_users(
+    db: AsyncSession, rows: List[Dict[str, Any]], atomic: bool = False
+) -> BulkResult:
+    """
+    Create users from the rows of a bulk import.
+
+    Rows are validated against the read session first, then plain text
+    passwords are hashed in parallel, and only then is the write session used,
+    to insert all valid rows in one transaction.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        The database session.
+    rows : List[Dict[str, Any]]
+        The parsed rows, see ``UserImport``.
+    atomic : bool, optional
+        If True, nothing is written when any row is rejected, by default False.
+
+    Returns
+    -------
+    BulkResult
+        The number of users created and the rejected rows.
+    """
+    errors: List[BulkRowError] = []
+    with stage("bulk_validate"):
+        valid = _validate_rows(rows, UserImport, errors)
+        usernames = await _existing(
+            UserModel.username, [user.username for _, user in valid]
+        )
+        emails = await _existing(UserModel.email, [user.email for _, user in valid])
+    to_create: List[Tuple[int, UserImport]] = []
+    seen_emails = set()
+    for number, user in valid:
+        detail = None
+        if user.username in usernames:
+            detail = "Username already exists"
+        elif user.email in emails or user.email in seen_emails:
+            detail = "Email already exists"
+        elif (user.password is None) == (user.hashed_password is None):
+            detail = "Exactly one of password and hashed_password is required"
+        elif user.hashed_password is not None and not is_password_hash(
+            user.hashed_password
+        ):
+            detail = "hashed_password is not a supported password hash"
+        if detail:
+            errors.append(
+                BulkRowError(row=number, username=user.username, detail=detail)
+            )
+            continue
+        seen_emails.add(user.email)
+        to_create.append((number, user))
+    if atomic and errors:
+        return _result(0, errors)
+
+    plain = [user.password for _, user in to_create if user.password is not None]
+    hashed = iter(await hash_passwords_async(plain))
+    values = [
+        {
+            "username": user.username,
+            "email": user.email,
+            "role": user.role,
+            "hashed_password": next(hashed)
+            if user.password is not None
+            else user.hashed_password,
+            "is_active": True,
+        }
+        for _, user in to_create
+    ]
+    if values:
+        with stage("bulk_write"):
+            await db.execute(insert(UserModel), values)
+            await _commit(db)
+    return _result(len(values), errors)
+
+
+async def bulk_update_users(
+    db: AsyncSession, rows: List[Dict[str, Any]], atomic: bool = False
+) -> BulkResult:
+    """
+    Update users, matched by username, from the rows of a bulk request.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        The database session.
+    rows : List[Dict[str, Any]]
+        The parsed rows, see ``UserBulkUpdate``.
+    atomic : bool, optional
+        If True, nothing is written when any row is rejected, by default False.
+
+    Returns
+    -------
+    BulkResult
+        The number of users updated and the rejected rows.
+    """
+    errors: List[BulkRowError] = []
+    with stage("bulk_validate"):
+        valid = _validate_rows(rows, UserBulkUpdate, errors)
+        users = await _existing(
+            UserModel.username, [user.username for _, user in valid]
+        )
+        emails = await _existing(
+            UserModel.email, [user.email for _, user in valid if user.email]
+        )
+    to_update: List[Tuple[int, UserBulkUpdate]] = []
+    seen_emails = set()
+    for number, user in valid:
+        detail = None
+        if user.username not in users:
+            detail = "User not found"
+        elif user.email and (
+            emails.get(user.email, (None, user.username))[1] != user.username
+            or user.email in seen_emails
+        ):
+            detail = "Email already exists"
+        if detail:
+            errors.append(
+                BulkRowError(row=number, username=user.username, detail=detail)
+            )
+            continue
+        if user.email:
+            seen_emails.add(user.email)
+        to_update.append((number, user))
+    if atomic and errors:
+        return _result(0, errors)
+
+    plain = [user.password for _, user in to_update if user.password]
+    hashed = iter(await hash_passwords_async(plain))
+    values = []
+    for _, user in to_update:
+        changes = user.model_dump(exclude={"username", "password"}, exclude_none=True)
+        if user.password:
+            changes["hashed_password"] = next(hashed)
+        if changes:
+            values.append({"id": users[user.username][0], **changes})
+    if values:
+        with stage("bulk_write"):
+            await db.execute(update(UserModel), values)
+            await _commit(db)
+        for _, user in to_update:
+            user_cache.invalidate(user.username)
+    return _result(len(to_update), errors)
+
+
+async def bulk_deactivate_users(
+    db: AsyncSession, rows: List[Dict[str, Any]], atomic: bool = False
+) -> BulkResult:
+    """
+    Deactivate users, matched by username.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        The database session.
+    rows : List[Dict[str, Any]]
+        The parsed rows, each with a username.
+    atomic : bool, optional
+        If True, nothing is written when any row is rejected, by default False.
+
+    Returns
+    -------
+    BulkResult
+        The number of users deactivated and the rejected rows.
+    """
+    rows = [
+        {
+            "username": row.get("username") if isinstance(row, dict) else row,
+            "is_active": False,
+        }
+        for row in rows
+    ]
+    return await bulk_update_users(db, rows, atomic=atomic)
+
+
+async def export_users(file_format: str = "csv") -> AsyncIterator[bytes]:
+    """
+    Stream every user, without password hashes, as CSV or NDJSON.
+
+    Users are read in batches of ``EXPORT_BATCH_SIZE`` ordered by id, each in
+    its own short read, so a slow client never holds a transaction open.
+
+    Parameters
+    ----------
+    file_format : str, optional
+        "csv" or "ndjson", by default "csv".
+
+    Yields
+    ------
+    bytes
+        A chunk of the export.
+    """
+    columns = [getattr(UserModel, column) for column in EXPORT_COLUMNS]
+    id_column = columns[0]
+    if file_format == "csv":
+        yield (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+    last_id = 0
+    while True:
+        async with AsyncReadSessionLocal() as session:
+            result = await session.execute(
+                select(*columns)
+                .where(id_column > last_id)
+                .order_by(id_column)
+                .limit(EXPORT_BATCH_SIZE)
+            )
+            batch = result.all()
+        if not batch:
+            return
+        last_id = batch[-1][0]
+        if file_format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            yield buffer.getvalue().encode()
+        else:
+            yield "".join(
+                json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in batch
+            ).encode()
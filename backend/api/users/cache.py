@@ -0,0 +1,103 @@
+"""In-process cache of authenticated users."""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from api.users.data import User
+
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+
+class UserCache:
+    """
+    Users keyed by username, with a TTL and LRU eviction.
+
+    Writes that go through ``api.users.crud`` invalidate the affected user, so
+    deactivation, deletion and password changes take effect on the next request
+    in this process. The TTL bounds how long other processes serving the same
+    database may keep a stale copy.
+
+    A lookup that races with an invalidation must not put the user it read
+    before the write back into the cache, so ``put`` takes the ``generation``
+    observed before the database read and ignores users read before the latest
+    invalidation.
+
+    Parameters
+    ----------
+    ttl : float, optional
+        Seconds a user is served from the cache, by default ``USER_CACHE_TTL``.
+    max_size : int, optional
+        Maximum number of cached users, by default ``USER_CACHE_SIZE``.
+    """
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_size: int = USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.generation = 0
+        self._users: OrderedDict[str, Tuple[User, float]] = OrderedDict()
+
+    def get(self, username: str) -> Optional[User]:
+        """
+        Return a cached user.
+
+        Parameters
+        ----------
+        username : str
+            The username.
+
+        Returns
+        -------
+        Optional[User]
+            The user, or None if it is not cached or has expired.
+        """
+        found = self._users.get(username)
+        if found is None:
+            return None
+        user, expires_at = found
+        if time.monotonic() >= expires_at:
+            del self._users[username]
+            return None
+        self._users.move_to_end(username)
+        return user
+
+    def put(self, user: User, generation: int) -> None:
+        """
+        Cache a user read from the database.
+
+        Parameters
+        ----------
+        user : User
+            The user.
+        generation : int
+            Value of ``generation`` before the user was read.
+        """
+        if self.ttl <= 0 or generation != self.generation:
+            return
+        self._users[user.username] = (user, time.monotonic() + self.ttl)
+        self._users.move_to_end(user.username)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+    def invalidate(self, username: str) -> None:
+        """
+        Drop a user, e.g. after it was updated or deleted.
+
+        Parameters
+        ----------
+        username : str
+            The username.
+        """
+        self.generation += 1
+        self._users.pop(username, None)
+
+    def clear(self) -> None:
+        """Drop every cached user."""
+        self.generation += 1
+        self._users.clear()
+
+
+user_cache = UserCache()
@@ -3,12 +3,13 @@
 from typing import List, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import Boolean, Column, Integer, String, select
+from sqlalchemy import Boolean, Column, Integer, String, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.users.cache import user_cache
 from api.users.data import User, UserCreate
 from api.users.db import Base
-from api.users.utils import get_password_hash
+from api.users.utils import get_password_hash_async
 
 
 class UserModel(Base):  # type: ignore
@@ -37,8 +38,8 @@ class UserModel(Base):  # type: ignore
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    role = Column(String)
-    is_active = Column(Boolean, default=True)
+    role = Column(String, index=True)
+    is_active = Column(Boolean, default=True, index=True)
 
 
 async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
@@ -83,9 +84,21 @@ async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User
     return User.from_orm(db_user) if db_user else None
 
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+async def get_users(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    prefix: Optional[str] = None,
+) -> List[User]:
     """
-    Retrieve a list of users.
+    Retrieve a list of users, ordered by ID.
+
+    Pass the ID of the last user of a page as ``after_id`` to get the next page.
+    Unlike ``skip``, which reads and discards every skipped row, this seeks
+    straight to the page through the primary key or the filter's index.
 
     Parameters
     ----------
@@ -95,13 +108,38 @@ async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[U
         Number of users to skip, by default 0.
     limit : int, optional
         Maximum number of users to return, by default 100.
+    after_id : Optional[int], optional
+        Only return users with a greater ID, by default from the first user.
+    role : Optional[str], optional
+        Only return users with this role, by default any role.
+    is_active : Optional[bool], optional
+        Only return active or inactive users, by default both.
+    prefix : Optional[str], optional
+        Only return users whose username or email starts with this prefix,
+        case-sensitively, by default all users.
 
     Returns
     -------
     List[User]
         List of user objects.
     """
-    result = await db.execute(select(UserModel).offset(skip).limit(limit))
+    stmt = select(UserModel)
+    if after_id is not None:
+        stmt = stmt.filter(UserModel.id > after_id)  # type: ignore[arg-type]
+    if role is not None:
+        stmt = stmt.filter(UserModel.role == role)
+    if is_active is not None:
+        stmt = stmt.filter(UserModel.is_active == is_active)
+    if prefix:
+        # A range rather than LIKE, so SQLite can use the unique indexes.
+        end = prefix + "\U0010ffff"
+        stmt = stmt.filter(
+            or_(
+                UserModel.username.between(prefix, end),
+                UserModel.email.between(prefix, end),
+            )
+        )
+    result = await db.execute(stmt.order_by(UserModel.id).offset(skip).limit(limit))
     return [User.from_orm(user) for user in result.scalars().all()]
 
 
@@ -121,7 +159,7 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
     User
         The created user object.
     """
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = UserModel(
         username=user.username,
         email=user.email,
@@ -158,18 +196,28 @@ async def update_user(db: AsyncSession, user_id: int, user_update: UserCreate) -
     ValueError
         If the user is not found.
     """
+    # Hash before the first query, so the write connection is not held while
+    # bcrypt runs.
+    hashed_password = (
+        await get_password_hash_async(user_update.password)
+        if user_update.password
+        else None
+    )
     result = await db.execute(select(UserModel).filter(UserModel.id == user_id))
     db_user = result.scalar_one_or_none()
     if not db_user:
         raise ValueError("User not found")
 
+    username = str(db_user.username)
     db_user.username = user_update.username
     db_user.email = user_update.email
     db_user.role = user_update.role
-    if user_update.password:
-        db_user.hashed_password = get_password_hash(user_update.password)
+    if hashed_password is not None:
+        db_user.hashed_password = hashed_password
 
     await db.commit()
+    # Invalidate after the commit, so a concurrent lookup cannot cache the old row.
+    user_cache.invalidate(username)
     await db.refresh(db_user)
     return User.from_orm(db_user)
 
@@ -190,7 +238,9 @@ async def create_initial_admin(db: AsyncSession) -> User:
     """
     admin_user = await get_user_by_username(db, username="admin")
     if not admin_user:
-        hashed_password = get_password_hash("admin_password")  # Use a secure password
+        hashed_password = await get_password_hash_async(
+            "admin_password"
+        )  # Use a secure password
         admin_user = UserModel(
             username="admin",
             email="admin@example.com",
@@ -223,8 +273,10 @@ async def delete_user(db: AsyncSession, user_id: int) -> bool:
     result = await db.execute(select(UserModel).filter(UserModel.id == user_id))
     db_user = result.scalar_one_or_none()
     if db_user:
+        username = str(db_user.username)
         await db.delete(db_user)
         await db.commit()
+        user_cache.invalidate(username)
         return True
     return False
 
@@ -249,6 +301,9 @@ async def update_user_password(
     HTTPException
         If the user is not found.
     """
+    # Hash before the first query, so the write connection is not held while
+    # bcrypt runs.
+    hashed_password = await get_password_hash_async(new_password)
     stmt = select(UserModel).where(UserModel.id == user_id)
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
@@ -256,5 +311,8 @@ async def update_user_password(
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.hashed_password = get_password_hash(new_password)
+    username = str(user.username)
+    user.hashed_password = hashed_password
     db.add(user)
+    await db.commit()
+    user_cache.invalidate(username)
@@ -1,6 +1,6 @@
 """Pydantic data classes for authentication and user management."""
 
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, EmailStr
 
@@ -93,3 +93,84 @@ class User(UserBase):
         """Override config."""
 
         from_attributes = True
+
+
+class UserImport(UserBase):
+    """
+    Model for a row of a bulk user import.
+
+    Attributes
+    ----------
+    password : Optional[str]
+        The user's password in plain text, hashed before storage.
+    hashed_password : Optional[str]
+        An existing bcrypt hash, used as is. Accounts migrated from another
+        system skip hashing this way. One of ``password`` and
+        ``hashed_password`` is required.
+    """
+
+    password: Optional[str] = None
+    hashed_password: Optional[str] = None
+
+
+class UserBulkUpdate(BaseModel):
+    """
+    Model for a row of a bulk user update. Unset fields are left unchanged.
+
+    Attributes
+    ----------
+    username : str
+        The username of the user to update.
+    email : Optional[EmailStr]
+        The new email address.
+    role : Optional[str]
+        The new role.
+    password : Optional[str]
+        The new password in plain text.
+    is_active : Optional[bool]
+        Whether the account is active.
+    """
+
+    username: str
+    email: Optional[EmailStr] = None
+    role: Optional[str] = None
+    password: Optional[str] = None
+    is_active: Optional[bool] = None
+
+
+class BulkRowError(BaseModel):
+    """
+    A row of a bulk operation that was not applied.
+
+    Attributes
+    ----------
+    row : int
+        Position of the row in the input, starting at 1.
+    username : Optional[str]
+        The username of the row, if it has one.
+    detail : str
+        Why the row was rejected.
+    """
+
+    row: int
+    username: Optional[str] = None
+    detail: str
+
+
+class BulkResult(BaseModel):
+    """
+    Outcome of a bulk operation.
+
+    Attributes
+    ----------
+    succeeded : int
+        Number of rows applied.
+    failed : int
+        Number of rows rejected.
+    errors : List[BulkRowError]
+        The rejected rows.
+    """
+
+    succeeded: int
+    failed: int
+    errors: List[BulkRowError]
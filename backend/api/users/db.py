@@ -1,18 +1,114 @@
 """Database module to store user information."""
 
-from typing import Any, AsyncGenerator
+import os
+from typing import Any, AsyncGenerator, List
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import Connection, event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base
 
+from api.metrics import DB_SESSIONS_IN_FLIGHT, stage
+
 
 # Use a local SQLite database
 DATABASE_URL = "sqlite+aiosqlite:///./users.db"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# "wal" applies the pragmas below to every connection, "default" leaves
+# SQLite's defaults (rollback journal, no busy timeout) in place.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "wal")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 2**20)))
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", str(64 * 1024)))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+# SQLite has a single writer, so more write connections only add lock waits.
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "1"))
+
+
+def sqlite_pragmas(profile: str, read_only: bool) -> List[str]:
+    """
+    Return the pragmas to run on each new connection.
+
+    In WAL mode readers see the last committed state and are never blocked by
+    the writer, and the writer is only blocked by checkpoints.
+
+    Parameters
+    ----------
+    profile : str
+        "wal" or "default".
+    read_only : bool
+        Whether the connection is only used for reads.
+
+    Returns
+    -------
+    List[str]
+        The pragma statements.
+    """
+    if profile == "default":
+        return []
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KIB}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def create_sqlite_engine(
+    url: str = DATABASE_URL,
+    profile: str = SQLITE_PROFILE,
+    read_only: bool = False,
+    pool_size: int = DB_WRITE_POOL_SIZE,
+) -> AsyncEngine:
+    """
+    Create an engine for the SQLite database.
+
+    Parameters
+    ----------
+    url : str, optional
+        The database URL, by default ``DATABASE_URL``.
+    profile : str, optional
+        The pragma profile, see ``sqlite_pragmas``.
+    read_only : bool, optional
+        Whether the engine is only used for reads, by default False.
+    pool_size : int, optional
+        Number of pooled connections, by default ``DB_WRITE_POOL_SIZE``.
+
+    Returns
+    -------
+    AsyncEngine
+        The engine.
+    """
+    engine = create_async_engine(url, echo=False, pool_size=pool_size, max_overflow=0)
+    pragmas = sqlite_pragmas(profile, read_only)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+engine = create_sqlite_engine()
+read_engine = create_sqlite_engine(read_only=True, pool_size=DB_READ_POOL_SIZE)
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 Base: Any = declarative_base()
 
@@ -29,13 +125,43 @@ async def init_db() -> None:
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+
+
+def create_missing_indexes(connection: Connection) -> None:
+    """
+    Create indexes added to the models after their tables were created.
+
+    ``create_all`` only creates indexes together with new tables, so databases
+    created by an earlier version would otherwise never get them.
+
+    Parameters
+    ----------
+    connection : Connection
+        A synchronous connection to the database.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+async def close_db() -> None:
+    """
+    Close the connections of the read and write engines.
+
+    In WAL mode the last connection to close checkpoints the log into the
+    database file.
+    """
+    await read_engine.dispose()
+    await engine.dispose()
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """
-    Create and yield an asynchronous database session.
+    Create and yield an asynchronous database session for reads and writes.
 
     This function is intended to be used as a dependency in FastAPI route functions.
+    Routes that only read should depend on ``get_async_read_session`` instead.
 
     Yields
     ------
@@ -49,8 +175,29 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         # Use the session here
         ...
     """
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+    with DB_SESSIONS_IN_FLIGHT.track_inprogress(), stage("db_session"):
+        async with AsyncSessionLocal() as session:
+            try:
+                yield session
+            finally:
+                await session.close()
+
+
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Create and yield an asynchronous database session for reads only.
+
+    Read sessions use their own connection pool, so lookups never wait for a
+    connection held by a write, and in WAL mode never wait for its lock.
+
+    Yields
+    ------
+    AsyncSession
+        An asynchronous SQLAlchemy session on a read-only connection.
+    """
+    with DB_SESSIONS_IN_FLIGHT.track_inprogress(), stage("db_read_session"):
+        async with AsyncReadSessionLocal() as session:
+            try:
+                yield session
+            finally:
+                await session.close()
@@ -1,7 +1,13 @@
 """Utility functions for user management."""
 
+import asyncio
+from typing import List
+
 from passlib.context import CryptContext
 
+from api.executor import hash_executor
+from api.metrics import stage
+
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -41,3 +47,99 @@ def get_password_hash(password: str) -> str:
         The hashed password.
     """
     return str(pwd_context.hash(password))
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool, without blocking the event loop.
+
+    Parameters
+    ----------
+    plain_password : str
+        The plain text password to verify.
+    hashed_password : str
+        The hashed password to compare against.
+
+    Returns
+    -------
+    bool
+        True if the password is correct, False otherwise.
+
+    Raises
+    ------
+    HTTPException
+        503 if the hashing pool is saturated.
+    """
+    with stage("password_verify"):
+        return await hash_executor.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the hashing pool, without blocking the event loop.
+
+    Parameters
+    ----------
+    password : str
+        The plain text password to hash.
+
+    Returns
+    -------
+    str
+        The hashed password.
+
+    Raises
+    ------
+    HTTPException
+        503 if the hashing pool is saturated.
+    """
+    with stage("password_hash"):
+        return await hash_executor.run(get_password_hash, password)
+
+
+async def hash_passwords_async(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords in parallel on the hashing pool.
+
+    At most one call per worker is queued at a time, so a bulk import keeps the
+    pool busy without filling its queue and turning away sign-ins.
+
+    Parameters
+    ----------
+    passwords : List[str]
+        The plain text passwords to hash.
+
+    Returns
+    -------
+    List[str]
+        The hashed passwords, in the same order.
+
+    Raises
+    ------
+    HTTPException
+        503 if the hashing pool is saturated.
+    """
+    slots = asyncio.Semaphore(hash_executor.max_workers)
+
+    async def hash_one(password: str) -> str:
+        async with slots:
+            return await get_password_hash_async(password)
+
+    return list(await asyncio.gather(*(hash_one(password) for password in passwords)))
+
+
+def is_password_hash(value: str) -> bool:
+    """
+    Check whether a value is a hash this application can verify.
+
+    Parameters
+    ----------
+    value : str
+        The value to check.
+
+    Returns
+    -------
+    bool
+        True if the value is a supported password hash.
+    """
+    return pwd_context.identify(value) is not None
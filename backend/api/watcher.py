@@ -0,0 +1,223 @@
+"""Background invalidation of cached datasets when objects change."""
+
+import logging
+import os
+import threading
+import urllib.parse
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from api.cache import DatasetCache, ObjectVersion
+
+
+logger = logging.getLogger("uvicorn")
+
+WATCHER_MODE = os.getenv("WATCHER_MODE", "notify")
+WATCHER_POLL_INTERVAL = float(os.getenv("WATCHER_POLL_INTERVAL", "10"))
+
+WATCHED_EVENTS = ("s3:ObjectCreated:*", "s3:ObjectRemoved:*")
+
+
+class DatasetWatcher:
+    """
+    Watch the data bucket and refresh the datasets whose objects change.
+
+    In ``notify`` mode the watcher subscribes to the bucket's notifications.
+    While the subscription is unavailable it falls back to polling the version
+    of every watched object, and it polls once after each reconnection to catch
+    changes missed in between. In ``poll`` mode it only polls.
+
+    When an object changes, its cached datasets are dropped and ``on_change`` is
+    called with the object name so the datasets that depend on it can be
+    rebuilt in the background instead of on the next request. When delta
+    partitions were only appended to the object, the cached datasets are kept
+    so that just the new partitions are merged into them.
+
+    Parameters
+    ----------
+    client : Callable[[], Any]
+        Returns the object store client.
+    cache : DatasetCache
+        The cache to invalidate.
+    bucket_name : str
+        The bucket to watch.
+    object_names : Iterable[str]
+        The objects to watch.
+    on_change : Callable[[str], object]
+        Called with the name of each changed object, after invalidation.
+    mode : str, optional
+        "notify" or "poll", by default ``WATCHER_MODE``.
+    poll_interval : float, optional
+        Seconds between polls, by default ``WATCHER_POLL_INTERVAL``.
+    version : Optional[Callable[[str], ObjectVersion]], optional
+        Returns the current version of a watched object, by default the
+        version from ``stat_object``.
+    delta_prefix : Optional[Callable[[str], Optional[str]]], optional
+        Returns the prefix of a watched object's delta partitions, by default
+        objects have none.
+    """
+
+    def __init__(
+        self,
+        client: Callable[[], Any],
+        cache: DatasetCache,
+        bucket_name: str,
+        object_names: Iterable[str],
+        on_change: Callable[[str], object],
+        mode: str = WATCHER_MODE,
+        poll_interval: float = WATCHER_POLL_INTERVAL,
+        version: Optional[Callable[[str], ObjectVersion]] = None,
+        delta_prefix: Optional[Callable[[str], Optional[str]]] = None,
+    ) -> None:
+        self.client = client
+        self.cache = cache
+        self.bucket_name = bucket_name
+        self.object_names = set(object_names)
+        self.on_change = on_change
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.version = version or self._stat
+        self.delta_prefixes = {
+            prefix: object_name
+            for object_name in self.object_names
+            if delta_prefix and (prefix := delta_prefix(object_name))
+        }
+        self._versions: Dict[str, Optional[ObjectVersion]] = {}
+        self._listen_failed = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start watching in the background.
+
+        The current object versions are recorded on the watcher's thread, so
+        startup does not wait on the object store.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="dataset-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self._stop.set()
+
+    def poll(self) -> None:
+        """Compare the version of every watched object with the last one seen."""
+        for object_name in self.object_names:
+            self._update(object_name)
+
+    def changed(self, object_name: str, appended: bool = False) -> None:
+        """
+        Invalidate and rebuild the datasets of a changed object.
+
+        Parameters
+        ----------
+        object_name : str
+            The object that changed.
+        appended : bool, optional
+            Whether delta partitions were only appended to the object, in which
+            case the cached datasets are revalidated instead of dropped.
+        """
+        logger.info(f"Object {self.bucket_name}/{object_name} changed, refreshing")
+        if appended:
+            self.cache.expire((self.bucket_name, object_name))
+        else:
+            self.cache.invalidate((self.bucket_name, object_name))
+        try:
+            self.on_change(object_name)
+        except Exception as e:
+            logger.warning(f"Refreshing datasets of {object_name} failed: {e}")
+
+    def handle_event(self, event: Dict[str, Any]) -> None:
+        """
+        Process one bucket notification.
+
+        Parameters
+        ----------
+        event : Dict[str, Any]
+            The notification, with S3 event records under ``Records``.
+        """
+        for record in event.get("Records") or []:
+            s3 = record.get("s3", {})
+            if s3.get("bucket", {}).get("name", self.bucket_name) != self.bucket_name:
+                continue
+            key = urllib.parse.unquote_plus(s3.get("object", {}).get("key", ""))
+            object_name = self._watched_object(key)
+            if object_name is None:
+                continue
+            self._update(object_name)
+
+    def _run(self) -> None:
+        """Record the current object versions, then watch until stopped."""
+        for object_name in self.object_names:
+            if self._stop.is_set():
+                return
+            self._versions[object_name] = self._version(object_name)
+        while not self._stop.is_set():
+            if self.mode == "notify":
+                self._listen()
+            if self._stop.wait(self.poll_interval):
+                return
+            self._safe_poll()
+
+    def _listen(self) -> None:
+        """Consume bucket notifications until the subscription fails."""
+        try:
+            events = self.client().listen_bucket_notification(
+                self.bucket_name, events=WATCHED_EVENTS
+            )
+            # Catch changes made while the subscription was being set up.
+            self._safe_poll()
+            self._listen_failed = False
+            for event in events:
+                if self._stop.is_set():
+                    return
+                self.handle_event(event)
+        except Exception as e:
+            if not self._listen_failed:
+                logger.warning(
+                    f"Bucket notifications unavailable ({e}), polling every "
+                    f"{self.poll_interval}s"
+                )
+            self._listen_failed = True
+
+    def _safe_poll(self) -> None:
+        """Poll, logging instead of raising on store errors."""
+        try:
+            self.poll()
+        except Exception as e:
+            logger.warning(f"Polling object versions failed: {e}")
+
+    def _watched_object(self, key: str) -> Optional[str]:
+        """Return the watched object a key or delta partition belongs to."""
+        if key in self.object_names:
+            return key
+        for prefix, object_name in self.delta_prefixes.items():
+            if key.startswith(prefix):
+                return object_name
+        return None
+
+    def _update(self, object_name: str) -> None:
+        """Record the current version of an object and refresh it if it changed."""
+        previous = self._versions.get(object_name)
+        current = self._version(object_name)
+        self._versions[object_name] = current
+        if previous is None or current is None:
+            if previous is not current:
+                self.changed(object_name)
+        elif current.etag != previous.etag:
+            self.changed(object_name, current.appended_to(previous) is not None)
+
+    def _stat(self, object_name: str) -> ObjectVersion:
+        """Return the version of an object from ``stat_object``."""
+        return ObjectVersion.from_stat(
+            self.client().stat_object(self.bucket_name, object_name)
+        )
+
+    def _version(self, object_name: str) -> Optional[ObjectVersion]:
+        """Return the version of an object, None if it does not exist."""
+        try:
+            return self.version(object_name)
+        except Exception:
+            return None
@@ -0,0 +1,123 @@
+"""Rate aggregation from encounter-level records.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.aggregation --sizes 1000000 5000000 --output agg.json
+
+For each size, synthetic encounters are reduced to an ``EncounterTable``
+(``build``), each aggregation is computed on a fresh table (``quarter``,
+``month``, ``rolling``) and served again from the memoized result
+(``memoized``). ``groupby`` times the equivalent pandas ``groupby`` over
+``Period`` keys for quarters, and its counts are checked against the engine's.
+"""
+
+import argparse
+from functools import partial
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from api.aggregation import EncounterTable
+from api.models import AggregationPeriod
+from benchmarks.stats import best_of, write_results
+
+
+def make_encounters(n_rows: int, seed: int = 0, years: int = 10) -> pd.DataFrame:
+    """
+    Generate synthetic encounters.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of encounters.
+    seed : int, optional
+        Random seed, by default 0.
+    years : int, optional
+        Number of years the admissions span, by default 10.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with ``admission_date``, ``ward`` and ``delirium`` columns.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2015-01-01")
+    return pd.DataFrame(
+        {
+            "admission_date": start
+            + rng.integers(0, 365 * years, n_rows).astype("timedelta64[D]"),
+            "ward": rng.choice([f"Ward {i}" for i in range(50)], n_rows),
+            "delirium": rng.random(n_rows) < 0.15,
+        }
+    )
+
+
+def groupby_quarters(df: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate encounters by ward and quarter with a pandas ``groupby``."""
+    quarters = df["admission_date"].dt.to_period("Q")
+    grouped = df.groupby([df["ward"], quarters], sort=True)["delirium"]
+    counts = grouped.agg(["size", "sum"])
+    counts["rate"] = 100.0 * counts["sum"] / counts["size"]
+    return counts
+
+
+def aggregate_fresh(table: EncounterTable, period: AggregationPeriod) -> Any:
+    """Compute an aggregation without the memoized result."""
+    table._aggregates.clear()
+    return table.aggregate(period)
+
+
+def main() -> None:
+    """Run the benchmark for each size, print a table and optionally save JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(
+        f"{'rows':>10} {'build ms':>9} {'quarter':>8} {'month':>8} {'rolling':>8} "
+        f"{'memoized':>9} {'groupby':>8} {'match':>6}"
+    )
+    for n_rows in args.sizes:
+        df = make_encounters(n_rows)
+        table = EncounterTable(df)
+        timings = {
+            "build": best_of(partial(EncounterTable, df), args.repeat),
+            **{
+                period.value: best_of(
+                    partial(aggregate_fresh, table, period), args.repeat
+                )
+                for period in AggregationPeriod
+            },
+        }
+        table.aggregate(AggregationPeriod.QUARTER)
+        timings["memoized"] = best_of(
+            partial(table.query, AggregationPeriod.QUARTER, wards=["Ward 7"]),
+            args.repeat,
+        )
+        timings["groupby"] = best_of(partial(groupby_quarters, df), args.repeat)
+
+        expected = groupby_quarters(df)
+        rates = table.aggregate(AggregationPeriod.QUARTER).rates
+        match = len(rates) == len(expected) and all(
+            (rate.encounters, rate.cases) == (int(size), int(cases))
+            for rate, size, cases in zip(rates, expected["size"], expected["sum"])
+        )
+        results[str(n_rows)] = {
+            **{f"{name}_ms": value * 1000 for name, value in timings.items()},
+            "match": match,
+        }
+        ms = {name: value * 1000 for name, value in timings.items()}
+        print(
+            f"{n_rows:>10} {ms['build']:>9.1f} {ms['quarter']:>8.2f} "
+            f"{ms['month']:>8.2f} {ms['rolling']:>8.2f} {ms['memoized']:>9.3f} "
+            f"{ms['groupby']:>8.1f} {match!s:>6}"
+        )
+    write_results(args.output, "aggregation", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark the columnar DataFrame-to-response conversion against iterrows.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.columnar --sizes 10000 100000 1000000
+"""
+
+import argparse
+from functools import partial
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from api.columnar import rates_from_frame
+from api.models import DeliriumRate
+from benchmarks.stats import best_of, write_results
+
+
+def make_rates(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a synthetic delirium rates DataFrame.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of rows to generate.
+    seed : int, optional
+        Random seed, by default 0.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with ``quarter``, ``year``, ``rate`` and ``ward`` columns.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "quarter": rng.choice(["Q1", "Q2", "Q3", "Q4"], n_rows),
+            "year": rng.integers(2000, 2030, n_rows),
+            "rate": rng.integers(0, 100, n_rows),
+            "ward": rng.choice([f"Ward {i}" for i in range(50)], n_rows),
+        }
+    )
+
+
+def rates_from_iterrows(df: pd.DataFrame) -> List[DeliriumRate]:
+    """
+    Convert a rates DataFrame row by row, as the backend previously did.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The rates DataFrame.
+
+    Returns
+    -------
+    List[DeliriumRate]
+        One delirium rate per row.
+    """
+    return [
+        DeliriumRate(
+            quarter=row["quarter"], year=row["year"], rate=row["rate"], ward=row["ward"]
+        )
+        for _, row in df.iterrows()
+    ]
+
+
+def main() -> None:
+    """Run the benchmark and print a table of timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = {}
+
+    print(f"{'rows':>10} {'iterrows (s)':>14} {'columnar (s)':>14} {'speedup':>9}")
+    for n_rows in args.sizes:
+        df = make_rates(n_rows)
+        # iterrows is slow enough that a single run is representative.
+        legacy = best_of(partial(rates_from_iterrows, df), 1)
+        columnar = best_of(partial(rates_from_frame, df), args.repeat)
+        results[str(n_rows)] = {"iterrows_s": legacy, "columnar_s": columnar}
+        print(
+            f"{n_rows:>10} {legacy:>14.3f} {columnar:>14.3f} {legacy / columnar:>8.1f}x"
+        )
+    write_results(args.output, "columnar", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare two benchmark result files.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.compare baseline.json candidate.json
+
+Every numeric measurement present in both files is printed with its relative
+change. For timings lower is better; for ``throughput`` higher is better.
+"""
+
+import argparse
+import json
+from typing import Any, Dict
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    """
+    Flatten nested results into numeric leaves keyed by their path.
+
+    Parameters
+    ----------
+    value : Any
+        The results, or a part of them.
+    prefix : str, optional
+        Path of ``value`` within the results.
+
+    Returns
+    -------
+    Dict[str, float]
+        Each numeric leaf, keyed by its slash-separated path.
+    """
+    if isinstance(value, dict):
+        leaves: Dict[str, float] = {}
+        for key, item in value.items():
+            leaves.update(flatten(item, f"{prefix}/{key}" if prefix else str(key)))
+        return leaves
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def main() -> None:
+    """Print the measurements of two result files side by side."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["benchmark"] != candidate["benchmark"]:
+        parser.error(
+            f"Cannot compare {baseline['benchmark']} with {candidate['benchmark']}"
+        )
+
+    for name, document in [("baseline", baseline), ("candidate", candidate)]:
+        metadata = document["metadata"]
+        print(f"{name:>9}: commit {metadata['commit']} at {metadata['timestamp']}")
+    old = flatten(baseline["results"])
+    new = flatten(candidate["results"])
+    width = max((len(key) for key in old), default=10)
+    print(f"{'measurement':<{width}} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for key, before in old.items():
+        if key not in new:
+            continue
+        after = new[key]
+        change = f"{(after - before) / before * 100:+8.1f}%" if before else "      n/a"
+        print(f"{key:<{width}} {before:>12.3f} {after:>12.3f} {change:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Cost of absorbing a new delta partition against reloading the whole dataset.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.deltas --rows 1000000 --delta-rows 10000 --output deltas.json
+
+A rates object of ``--rows`` rows is loaded through ``api.data``, then
+``--deltas`` partitions of ``--delta-rows`` rows are added one at a time. After
+each, ``incremental`` revalidates the cached dataset, which fetches and parses
+only the new partition, while ``full`` drops it first, which fetches and parses
+the base object and every partition again, as a rewritten CSV would need.
+"""
+
+import argparse
+import os
+import time
+from typing import Any, Dict, List
+
+from benchmarks.columnar import make_rates
+from benchmarks.fake_minio import FakeMinio
+from benchmarks.stages import encode_frame
+from benchmarks.stats import percentiles, write_results
+
+
+def run_format(
+    client: FakeMinio, file_format: str, args: argparse.Namespace
+) -> Dict[str, Any]:
+    """
+    Time incremental and full refreshes of a dataset as partitions are added.
+
+    Parameters
+    ----------
+    client : FakeMinio
+        The fake store the backend reads from.
+    file_format : str
+        "csv", "parquet" or "arrow".
+    args : argparse.Namespace
+        The parsed command-line arguments.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Latency percentiles of each kind of refresh, and whether both produced
+        the same dataset.
+    """
+    import api.data  # noqa: PLC0415
+
+    bucket = api.data.BUCKET_NAME
+    # Delta prefixes drop the extension, so give each format its own dataset.
+    object_name = f"bench_rates_{file_format}.{file_format}"
+    raw, content_type = encode_frame(make_rates(args.rows), file_format)
+    client.put_object(bucket, object_name, raw, content_type=content_type)
+    prefix = api.data.delta_prefix(object_name)
+    api.data.dataset_cache.clear()
+    api.data.load_data_from_minio(bucket, object_name)
+
+    timings: Dict[str, List[float]] = {"incremental": [], "full": []}
+    for i in range(args.deltas):
+        raw, content_type = encode_frame(
+            make_rates(args.delta_rows, seed=i + 1), file_format
+        )
+        client.put_object(
+            bucket, f"{prefix}{i:06d}.{file_format}", raw, content_type=content_type
+        )
+
+        start = time.perf_counter()
+        api.data.dataset_cache.expire((bucket, object_name))
+        incremental = api.data.load_data_from_minio(bucket, object_name)
+        timings["incremental"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        api.data.dataset_cache.invalidate((bucket, object_name))
+        full = api.data.load_data_from_minio(bucket, object_name)
+        timings["full"].append(time.perf_counter() - start)
+
+    return {
+        **{kind: percentiles(values) for kind, values in timings.items()},
+        "rows": len(full),
+        "identical": bool(incremental.equals(full)),
+    }
+
+
+def main() -> None:
+    """Run the benchmark per format, print a table and optionally save JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--delta-rows", type=int, default=10_000)
+    parser.add_argument("--deltas", type=int, default=5)
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet"])
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("FRONTEND_PORT", "3000")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+    import api.data  # noqa: PLC0415
+
+    client = FakeMinio()
+    api.data.minio_client = client  # type: ignore[assignment]
+
+    results = {
+        file_format: run_format(client, file_format, args)
+        for file_format in args.formats
+    }
+
+    print(
+        f"{'format':>8} {'rows':>10} {'incremental p50':>16} {'full p50':>10} "
+        f"{'speedup':>8} {'identical':>10}"
+    )
+    for file_format, result in results.items():
+        incremental = result["incremental"]["p50"]
+        full = result["full"]["p50"]
+        print(
+            f"{file_format:>8} {result['rows']:>10} {incremental:>13.1f} ms "
+            f"{full:>7.1f} ms {full / incremental:>7.1f}x {result['identical']!s:>10}"
+        )
+    write_results(args.output, "deltas", args, results)
+
+
+if __name__ == "__main__":
+    main()
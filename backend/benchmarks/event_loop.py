@@ -0,0 +1,143 @@
+"""Load test: /auth/session latency while /rates waits on a slow object store.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.event_loop --latency 0.05 --concurrency 4 --duration 5
+
+Pass ``--inline`` to run the data layer on the event loop, as the routes did
+before the worker pool was introduced, for comparison.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Callable, List
+
+import httpx
+
+from benchmarks.harness import create_app, create_token
+from benchmarks.stats import percentiles, write_results
+
+
+async def measure_session(
+    client: httpx.AsyncClient, token: str, duration: float
+) -> List[float]:
+    """
+    Time sequential ``/auth/session`` requests for ``duration`` seconds.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        Client bound to the app.
+    token : str
+        Bearer token.
+    duration : float
+        Seconds to keep sending requests for.
+
+    Returns
+    -------
+    List[float]
+        Latency of each request, in seconds.
+    """
+    latencies = []
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/auth/session", headers=headers)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return latencies
+
+
+async def hammer_rates(client: httpx.AsyncClient, stop: asyncio.Event) -> int:
+    """
+    Request ``/rates`` in a loop until ``stop`` is set.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        Client bound to the app.
+    stop : asyncio.Event
+        Set to end the loop.
+
+    Returns
+    -------
+    int
+        The number of completed requests.
+    """
+    completed = 0
+    while not stop.is_set():
+        await client.get("/rates")
+        completed += 1
+        # The in-process transport never suspends on I/O, so yield explicitly.
+        await asyncio.sleep(0)
+    return completed
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the idle and loaded scenarios and print the latencies."""
+    main, _ = create_app(latency=args.latency)
+    token = await create_token()
+
+    import api.data  # noqa: PLC0415
+    from api.executor import data_executor  # noqa: PLC0415
+
+    # Revalidate on every request so each /rates call waits on the store.
+    api.data.dataset_cache.ttl = 0
+    if args.inline:
+
+        async def inline(fn: Callable[..., Any], *fn_args: Any) -> Any:
+            return fn(*fn_args)
+
+        data_executor.run = inline  # type: ignore[method-assign]
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        idle = await measure_session(client, token, args.duration)
+
+        stop = asyncio.Event()
+        workers = [
+            asyncio.create_task(hammer_rates(client, stop))
+            for _ in range(args.concurrency)
+        ]
+        loaded = await measure_session(client, token, args.duration)
+        stop.set()
+        rates_completed = sum(await asyncio.gather(*workers))
+
+    print(f"/auth/session latency (ms), store latency {args.latency * 1000:.0f} ms")
+    print(f"{'scenario':>10} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, latencies in [("idle", idle), ("loaded", loaded)]:
+        stats = percentiles(latencies)
+        print(
+            f"{name:>10} {stats['p50']:>9.1f} {stats['p95']:>9.1f} "
+            f"{stats['p99']:>9.1f} {stats['max']:>9.1f}"
+        )
+    print(f"/auth/session requests: {len(idle)} idle, {len(loaded)} loaded")
+    print(f"/rates requests completed under load: {rates_completed}")
+    results = {
+        "idle_ms": percentiles(idle),
+        "loaded_ms": percentiles(loaded),
+        "rates_completed": rates_completed,
+    }
+    write_results(args.output, "event_loop", args, results)
+
+
+def main() -> None:
+    """Parse arguments and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--inline", action="store_true")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
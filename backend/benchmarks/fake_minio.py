@@ -0,0 +1,222 @@
+"""In-process stand-in for the MinIO client used by the benchmarks."""
+
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterator, List, Sequence, Tuple, Union
+
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "scripts")
+
+
+@dataclass
+class FakeStat:
+    """Subset of ``minio.datatypes.Object`` returned by ``stat_object``."""
+
+    bucket_name: str
+    object_name: str
+    etag: str
+    size: int
+    last_modified: datetime
+    content_type: str
+    is_dir: bool = False
+
+
+class FakeResponse(io.BytesIO):
+    """Subset of ``urllib3.HTTPResponse`` returned by ``get_object``."""
+
+    def __init__(self, data: bytes, content_type: str) -> None:
+        super().__init__(data)
+        self.headers = {"Content-Type": content_type, "Content-Length": str(len(data))}
+
+    def release_conn(self) -> None:
+        """Release the connection, a no-op here."""
+
+    def stream(self, amt: int = 64 * 1024) -> Any:
+        """Yield the body in chunks of ``amt`` bytes."""
+        while chunk := self.read(amt):
+            yield chunk
+
+
+class FakeMinio:
+    """
+    Thread-safe in-memory object store with the MinIO client interface.
+
+    Parameters
+    ----------
+    latency : float, optional
+        Seconds every call sleeps for, to simulate a slow store, by default 0.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self._objects: Dict[Tuple[str, str], Tuple[bytes, FakeStat]] = {}
+        self._listeners: List["queue.Queue[Dict[str, Any]]"] = []
+        self._lock = threading.Lock()
+
+    def put_object(
+        self,
+        bucket_name: str,
+        object_name: str,
+        data: Union[bytes, BinaryIO],
+        length: int = -1,
+        content_type: str = "application/octet-stream",
+    ) -> FakeStat:
+        """Store an object, replacing any previous version."""
+        raw = data if isinstance(data, bytes) else data.read()
+        stat = FakeStat(
+            bucket_name=bucket_name,
+            object_name=object_name,
+            etag=hashlib.md5(raw).hexdigest(),  # noqa: S324
+            size=len(raw),
+            last_modified=datetime.now(timezone.utc),
+            content_type=content_type,
+        )
+        with self._lock:
+            self._objects[(bucket_name, object_name)] = (raw, stat)
+        self._notify("s3:ObjectCreated:Put", bucket_name, object_name, stat.etag)
+        return stat
+
+    def fput_object(
+        self, bucket_name: str, object_name: str, file_path: str, content_type: str
+    ) -> FakeStat:
+        """Store the contents of a local file."""
+        with open(file_path, "rb") as f:
+            return self.put_object(
+                bucket_name, object_name, f.read(), content_type=content_type
+            )
+
+    def remove_object(self, bucket_name: str, object_name: str) -> None:
+        """Delete an object."""
+        with self._lock:
+            self._objects.pop((bucket_name, object_name), None)
+        self._notify("s3:ObjectRemoved:Delete", bucket_name, object_name, "")
+
+    def stat_object(self, bucket_name: str, object_name: str) -> FakeStat:
+        """Return the metadata of an object."""
+        return self._lookup("stat_object", bucket_name, object_name)[1]
+
+    def get_object(self, bucket_name: str, object_name: str) -> FakeResponse:
+        """Return the contents of an object."""
+        raw, stat = self._lookup("get_object", bucket_name, object_name)
+        return FakeResponse(raw, stat.content_type)
+
+    def list_objects(
+        self, bucket_name: str, prefix: str = "", recursive: bool = False
+    ) -> Iterator[FakeStat]:
+        """List objects under a prefix, in name order."""
+        with self._lock:
+            self.calls["list_objects"] = self.calls.get("list_objects", 0) + 1
+            stats = sorted(
+                (
+                    stat
+                    for (bucket, name), (_, stat) in self._objects.items()
+                    if bucket == bucket_name and name.startswith(prefix)
+                ),
+                key=lambda stat: stat.object_name,
+            )
+        if self.latency:
+            time.sleep(self.latency)
+        directories = set()
+        for stat in stats:
+            rest = stat.object_name[len(prefix) :]
+            if recursive or "/" not in rest:
+                yield stat
+                continue
+            directory = prefix + rest.split("/")[0] + "/"
+            if directory not in directories:
+                directories.add(directory)
+                yield FakeStat(
+                    bucket_name, directory, "", 0, stat.last_modified, "", is_dir=True
+                )
+
+    def listen_bucket_notification(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        suffix: str = "",
+        events: Sequence[str] = ("s3:ObjectCreated:*", "s3:ObjectRemoved:*"),
+    ) -> Iterator[Dict[str, Any]]:
+        """Subscribe to changes, yielding S3 event notifications until closed."""
+        listener: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        with self._lock:
+            self._listeners.append(listener)
+
+        def iterate() -> Iterator[Dict[str, Any]]:
+            while True:
+                event = listener.get()
+                record = event["Records"][0]
+                key = urllib.parse.unquote_plus(record["s3"]["object"]["key"])
+                if (
+                    record["s3"]["bucket"]["name"] == bucket_name
+                    and key.startswith(prefix)
+                    and key.endswith(suffix)
+                    and any(
+                        record["eventName"].startswith(pattern.rstrip("*"))
+                        for pattern in events
+                    )
+                ):
+                    yield event
+
+        return iterate()
+
+    def _notify(
+        self, event_name: str, bucket_name: str, object_name: str, etag: str
+    ) -> None:
+        """Send an S3 event notification to every listener."""
+        event = {
+            "Records": [
+                {
+                    "eventName": event_name,
+                    "s3": {
+                        "bucket": {"name": bucket_name},
+                        "object": {
+                            "key": urllib.parse.quote_plus(object_name),
+                            "eTag": etag,
+                        },
+                    },
+                }
+            ]
+        }
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener.put(event)
+
+    def _lookup(
+        self, method: str, bucket_name: str, object_name: str
+    ) -> Tuple[bytes, FakeStat]:
+        """Count the call, apply the simulated latency and find the object."""
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            found = self._objects.get((bucket_name, object_name))
+        if found is None:
+            raise KeyError(f"No such object: {bucket_name}/{object_name}")
+        return found
+
+
+def load_sample_data(client: FakeMinio, bucket_name: str = "delirium-data") -> None:
+    """
+    Upload the sample CSVs from ``scripts/`` to a fake store.
+
+    Parameters
+    ----------
+    client : FakeMinio
+        The fake store.
+    bucket_name : str, optional
+        The bucket to upload to, by default "delirium-data".
+    """
+    for name in ["delirium_rates.csv", "time_trends.csv", "demographics.csv"]:
+        client.fput_object(
+            bucket_name, name, os.path.join(SCRIPTS_DIR, name), content_type="text/csv"
+        )
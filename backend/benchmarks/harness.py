@@ -0,0 +1,74 @@
+"""Set up the backend against a fake object store and a temporary database."""
+
+import os
+import tempfile
+from types import ModuleType
+from typing import Tuple
+
+from benchmarks.fake_minio import FakeMinio, load_sample_data
+
+
+def create_app(latency: float = 0.0) -> Tuple[ModuleType, FakeMinio]:
+    """
+    Import the backend with a fake object store and a temporary database.
+
+    The working directory is switched to a fresh temporary directory so the
+    SQLite database does not touch the developer's ``users.db``.
+
+    Parameters
+    ----------
+    latency : float, optional
+        Simulated latency of every object store call, by default 0.
+
+    Returns
+    -------
+    Tuple[ModuleType, FakeMinio]
+        The ``api.main`` module and the fake store.
+    """
+    os.environ.setdefault("FRONTEND_PORT", "3000")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+    os.chdir(tempfile.mkdtemp(prefix="scorecard-bench-"))
+
+    import api.data  # noqa: PLC0415
+    import api.main  # noqa: PLC0415
+
+    client = FakeMinio(latency=latency)
+    load_sample_data(client)
+    api.data.minio_client = client  # type: ignore[assignment]
+    return api.main, client
+
+
+async def create_token(username: str = "bench", role: str = "admin") -> str:
+    """
+    Create a user in the database and return an access token for it.
+
+    Parameters
+    ----------
+    username : str, optional
+        The username, by default "bench".
+    role : str, optional
+        The role, by default "admin".
+
+    Returns
+    -------
+    str
+        A bearer token for the user.
+    """
+    from api.users.auth import create_access_token  # noqa: PLC0415
+    from api.users.crud import create_user, get_user_by_username  # noqa: PLC0415
+    from api.users.data import UserCreate  # noqa: PLC0415
+    from api.users.db import AsyncSessionLocal, init_db  # noqa: PLC0415
+
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        if await get_user_by_username(session, username) is None:
+            await create_user(
+                session,
+                UserCreate(
+                    username=username,
+                    email=f"{username}@example.com",
+                    role=role,
+                    password="bench-password",
+                ),
+            )
+    return create_access_token({"sub": username, "role": role})
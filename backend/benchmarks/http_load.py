@@ -0,0 +1,135 @@
+"""Load test: throughput and latency percentiles of each endpoint.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.http_load --concurrency 8 --duration 5 --output http.json
+
+Each endpoint is loaded in turn by ``--concurrency`` clients for ``--duration``
+seconds, in process, against the fake object store and a temporary database.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Counter, Dict, List
+
+import httpx
+
+from benchmarks.harness import create_app, create_token
+from benchmarks.stats import percentiles, write_results
+
+
+ENDPOINTS = [
+    "/rates",
+    "/rates?ward=GIM&start_year=2023",
+    "/time-trends",
+    "/demographics",
+    "/scorecard",
+    "/auth/session",
+]
+
+
+async def load_endpoint(
+    client: httpx.AsyncClient,
+    path: str,
+    headers: Dict[str, str],
+    concurrency: int,
+    duration: float,
+) -> Dict[str, Any]:
+    """
+    Request one endpoint from concurrent clients for a fixed duration.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        Client bound to the app.
+    path : str
+        Path and query string to request.
+    headers : Dict[str, str]
+        Request headers.
+    concurrency : int
+        Number of concurrent clients.
+    duration : float
+        Seconds to keep sending requests for.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Throughput, latency percentiles and the count of each status code.
+    """
+    latencies: List[float] = []
+    statuses: Counter[int] = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+            # The in-process transport never suspends on I/O, so yield explicitly.
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "latency_ms": percentiles(latencies),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Load every endpoint in turn and return the results keyed by path."""
+    main, _ = create_app(latency=args.latency)
+    token = await create_token()
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": args.encoding}
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for path in args.endpoints:
+            # Warm up the caches so the first request does not skew the tail.
+            (await client.get(path, headers=headers)).raise_for_status()
+            results[path] = await load_endpoint(
+                client, path, headers, args.concurrency, args.duration
+            )
+    return results
+
+
+def main() -> None:
+    """Parse arguments, run the load test, print a table and optionally save JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--encoding", default="gzip, br")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = asyncio.run(run(args))
+
+    print(
+        f"{'endpoint':<34} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}"
+    )
+    for path, result in results.items():
+        latency = result["latency_ms"]
+        errors = sum(
+            count for code, count in result["statuses"].items() if int(code) >= 400
+        )
+        print(
+            f"{path:<34} {result['throughput']:>8.1f} {latency['p50']:>8.1f} "
+            f"{latency['p95']:>8.1f} {latency['p99']:>8.1f} {errors:>7}"
+        )
+    write_results(args.output, "http_load", args, results)
+
+
+if __name__ == "__main__":
+    main()
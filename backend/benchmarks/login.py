@@ -0,0 +1,126 @@
+"""Load test: /auth/signin throughput and event loop latency under a login burst.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.login --concurrency 32 --duration 5
+
+Pass ``--inline`` to hash on the event loop, as the routes did before the
+hashing pool was introduced, for comparison.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Counter, Dict, List
+
+import httpx
+
+from benchmarks.event_loop import measure_session
+from benchmarks.harness import create_app, create_token
+from benchmarks.stats import percentiles, write_results
+
+
+async def hammer_signin(
+    client: httpx.AsyncClient, stop: asyncio.Event
+) -> Dict[str, Any]:
+    """
+    Sign in in a loop until ``stop`` is set, honouring ``Retry-After``.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        Client bound to the app.
+    stop : asyncio.Event
+        Set to end the loop.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Count of responses per status code and latency of successful sign-ins.
+    """
+    statuses: Counter[int] = Counter()
+    latencies = []
+    credentials = {"username": "bench", "password": "bench-password"}
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.post("/auth/signin", json=credentials)
+        statuses[response.status_code] += 1
+        if response.status_code == httpx.codes.OK:
+            latencies.append(time.perf_counter() - start)
+        # Back off as a well-behaved client would when the pool is saturated.
+        await asyncio.sleep(float(response.headers.get("Retry-After", 0)))
+    return {"statuses": statuses, "latencies": latencies}
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the login burst and print throughput and latencies."""
+    main, _ = create_app()
+    token = await create_token()
+
+    from api.executor import hash_executor  # noqa: PLC0415
+
+    if args.inline:
+
+        async def inline(fn: Callable[..., Any], *fn_args: Any) -> Any:
+            return fn(*fn_args)
+
+        hash_executor.run = inline  # type: ignore[method-assign]
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        stop = asyncio.Event()
+        start = time.perf_counter()
+        workers = [
+            asyncio.create_task(hammer_signin(client, stop))
+            for _ in range(args.concurrency)
+        ]
+        session = await measure_session(client, token, args.duration)
+        stop.set()
+        results = await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - start
+
+    statuses: Counter[int] = Counter()
+    signins: List[float] = []
+    for result in results:
+        statuses.update(result["statuses"])
+        signins.extend(result["latencies"])
+
+    mode = "inline" if args.inline else f"pool of {hash_executor.max_workers}"
+    print(f"Login burst, {args.concurrency} concurrent clients, hashing {mode}")
+    print(f"sign-ins/s: {statuses[httpx.codes.OK] / elapsed:.1f}")
+    print(f"responses: {dict(sorted(statuses.items()))}")
+    print(f"{'latency ms':>16} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, latencies in [("/auth/signin", signins), ("/auth/session", session)]:
+        if not latencies:
+            continue
+        stats = percentiles(latencies)
+        print(
+            f"{name:>16} {stats['p50']:>9.1f} {stats['p95']:>9.1f} "
+            f"{stats['p99']:>9.1f} {stats['max']:>9.1f}"
+        )
+    summary = {
+        "signins_per_s": statuses[httpx.codes.OK] / elapsed,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "signin_ms": percentiles(signins),
+        "session_ms": percentiles(session),
+    }
+    write_results(args.output, "login", args, summary)
+
+
+def main() -> None:
+    """Parse arguments and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--inline", action="store_true")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
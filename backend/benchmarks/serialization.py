@@ -0,0 +1,95 @@
+"""Benchmark serializing response models through response_model and the fast path.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.serialization --sizes 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+from functools import partial
+from typing import Any, List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from api.columnar import rates_from_frame
+from api.models import DeliriumRate
+from api.responses import model_response, rates_adapter
+from benchmarks.columnar import make_rates
+from benchmarks.stats import best_of, write_results
+
+
+rates_field = create_response_field(name="Response_rates", type_=List[DeliriumRate])
+
+
+def response_model_path(rates: List[DeliriumRate]) -> bytes:
+    """
+    Serialize rates the way FastAPI does for a ``response_model`` route.
+
+    The models are validated against the response field, converted to JSON
+    compatible Python objects and then encoded with the standard library.
+
+    Parameters
+    ----------
+    rates : List[DeliriumRate]
+        The response models.
+
+    Returns
+    -------
+    bytes
+        The response body.
+    """
+    content: Any = asyncio.run(
+        serialize_response(field=rates_field, response_content=rates)
+    )
+    return bytes(JSONResponse(content).body)
+
+
+def fast_path(rates: List[DeliriumRate]) -> bytes:
+    """
+    Serialize rates with ``api.responses.model_response``.
+
+    Parameters
+    ----------
+    rates : List[DeliriumRate]
+        The response models.
+
+    Returns
+    -------
+    bytes
+        The response body.
+    """
+    return bytes(model_response(rates_adapter, rates, Response()).body)
+
+
+def main() -> None:
+    """Run the benchmark and print a table of timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = {}
+
+    print(
+        f"{'rows':>10} {'response_model (s)':>19} {'fast path (s)':>14} {'speedup':>9}"
+    )
+    for n_rows in args.sizes:
+        rates = rates_from_frame(make_rates(n_rows))
+        if response_model_path(rates) != fast_path(rates):
+            raise AssertionError("The fast path changed the response body")
+        legacy = best_of(partial(response_model_path, rates), args.repeat)
+        fast = best_of(partial(fast_path, rates), args.repeat)
+        results[str(n_rows)] = {"response_model_s": legacy, "fast_path_s": fast}
+        print(f"{n_rows:>10} {legacy:>19.4f} {fast:>14.4f} {legacy / fast:>8.1f}x")
+    write_results(args.output, "serialization", args, results)
+
+
+if __name__ == "__main__":
+    main()
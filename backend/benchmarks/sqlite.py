@@ -0,0 +1,214 @@
+"""User lookup latency while user-admin writes run against the same database.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.sqlite --readers 8 --duration 5 --output sqlite.json
+
+Each profile gets a fresh SQLite database in a temporary directory. ``legacy``
+is the original setup, a single engine with SQLite's default rollback journal
+shared by reads and writes. ``wal`` is the current setup, WAL mode with tuned
+pragmas and separate read and write engines. ``--readers`` clients look users
+up by username, as ``get_current_user`` does, while one writer updates
+``--batch`` users per transaction, as a bulk admin change would.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from benchmarks.stats import percentiles, write_results
+
+
+async def seed(engine: AsyncEngine, n_users: int) -> None:
+    """
+    Create the users table and fill it with ``n_users`` users.
+
+    Parameters
+    ----------
+    engine : AsyncEngine
+        The write engine.
+    n_users : int
+        Number of users.
+    """
+    from api.users.crud import UserModel  # noqa: PLC0415
+    from api.users.db import Base  # noqa: PLC0415
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(UserModel),
+            [
+                {
+                    "username": f"user{i}",
+                    "email": f"user{i}@example.com",
+                    "hashed_password": "not-a-hash",
+                    "role": "user",
+                    "is_active": True,
+                }
+                for i in range(n_users)
+            ],
+        )
+
+
+def create_engines(profile: str, url: str) -> Tuple[AsyncEngine, AsyncEngine]:
+    """
+    Create the write and read engines of a profile.
+
+    Parameters
+    ----------
+    profile : str
+        "legacy" or "wal".
+    url : str
+        The database URL.
+
+    Returns
+    -------
+    Tuple[AsyncEngine, AsyncEngine]
+        The write and read engines, the same engine for "legacy".
+    """
+    from api.users.db import (  # noqa: PLC0415
+        DB_READ_POOL_SIZE,
+        DB_WRITE_POOL_SIZE,
+        create_sqlite_engine,
+    )
+
+    if profile == "legacy":
+        engine = create_async_engine(url)
+        return engine, engine
+    return (
+        create_sqlite_engine(url, "wal", pool_size=DB_WRITE_POOL_SIZE),
+        create_sqlite_engine(url, "wal", read_only=True, pool_size=DB_READ_POOL_SIZE),
+    )
+
+
+async def run_profile(profile: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run concurrent lookups and writes against a fresh database.
+
+    Parameters
+    ----------
+    profile : str
+        "legacy" or "wal".
+    args : argparse.Namespace
+        The parsed command-line arguments.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Lookup throughput and latency percentiles, write throughput and
+        transaction latency percentiles, and the number of failed operations.
+    """
+    from api.users.crud import UserModel, get_user_by_username  # noqa: PLC0415
+
+    directory = tempfile.mkdtemp(prefix=f"scorecard-sqlite-{profile}-")
+    url = f"sqlite+aiosqlite:///{os.path.join(directory, 'users.db')}"
+    write_engine, read_engine = create_engines(profile, url)
+    await seed(write_engine, args.users)
+    write_sessions = async_sessionmaker(write_engine, class_=AsyncSession)
+    read_sessions = async_sessionmaker(read_engine, class_=AsyncSession)
+
+    lookups: List[float] = []
+    writes: List[float] = []
+    errors = {"lookup": 0, "write": 0}
+    deadline = time.perf_counter() + args.duration
+    rng = random.Random(0)
+
+    async def reader() -> None:
+        while time.perf_counter() < deadline:
+            username = f"user{rng.randrange(args.users)}"
+            start = time.perf_counter()
+            try:
+                async with read_sessions() as session:
+                    await get_user_by_username(session, username)
+            except Exception:
+                errors["lookup"] += 1
+                continue
+            lookups.append(time.perf_counter() - start)
+
+    async def writer() -> None:
+        version = 0
+        while time.perf_counter() < deadline:
+            version += 1
+            # Seeded users have consecutive ids starting at 1.
+            first = rng.randrange(1, args.users - args.batch + 2)
+            start = time.perf_counter()
+            try:
+                async with write_sessions() as session:
+                    await session.execute(
+                        update(UserModel)
+                        .where(UserModel.id.between(first, first + args.batch - 1))
+                        .values(role=f"role{version}")
+                    )
+                    await session.commit()
+            except Exception:
+                errors["write"] += 1
+                continue
+            writes.append(time.perf_counter() - start)
+            await asyncio.sleep(args.write_interval)
+
+    start = time.perf_counter()
+    await asyncio.gather(writer(), *(reader() for _ in range(args.readers)))
+    elapsed = time.perf_counter() - start
+    await read_engine.dispose()
+    await write_engine.dispose()
+    return {
+        "lookups": len(lookups),
+        "lookup_throughput": len(lookups) / elapsed,
+        "lookup_ms": percentiles(lookups),
+        "writes": len(writes),
+        "write_throughput": len(writes) / elapsed,
+        "write_ms": percentiles(writes),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    """Run each profile, print a table and optionally save JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "wal"])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--write-interval", type=float, default=0.0)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("FRONTEND_PORT", "3000")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+    # Importing api.users.db creates engines for ./users.db, keep it out of the tree.
+    os.chdir(tempfile.mkdtemp(prefix="scorecard-bench-"))
+
+    results = {
+        profile: asyncio.run(run_profile(profile, args)) for profile in args.profiles
+    }
+
+    print(
+        f"{'profile':>8} {'lookups/s':>10} {'p50':>8} {'p99':>8} {'max':>8} "
+        f"{'writes/s':>9} {'write p50':>10} {'errors':>7}"
+    )
+    for profile, result in results.items():
+        lookup = result["lookup_ms"]
+        print(
+            f"{profile:>8} {result['lookup_throughput']:>10.1f} {lookup['p50']:>8.2f} "
+            f"{lookup['p99']:>8.2f} {lookup['max']:>8.2f} "
+            f"{result['write_throughput']:>9.1f} {result['write_ms']['p50']:>10.2f} "
+            f"{sum(result['errors'].values()):>7}"
+        )
+    write_results(args.output, "sqlite", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Micro-benchmarks of each stage behind the data and auth endpoints.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.stages --rows 100000 --output stages.json
+
+Data stages are timed per object format: ``fetch`` downloads the object from
+the fake store, ``parse`` turns it into a DataFrame, ``load`` does both through
+``api.data`` with the cache cleared, ``build`` converts the DataFrame to
+response models, ``index`` builds the rates index and ``serialize`` dumps the
+models to JSON. Auth stages time bcrypt and JWT.
+"""
+
+import argparse
+import io
+import os
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.columnar import make_rates
+from benchmarks.fake_minio import FakeMinio
+from benchmarks.stats import percentiles, time_calls, write_results
+
+
+OBJECT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+def encode_frame(df: pd.DataFrame, file_format: str) -> Tuple[bytes, str]:
+    """
+    Serialize a DataFrame as an object of the given format.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame.
+    file_format : str
+        "csv", "parquet" or "arrow".
+
+    Returns
+    -------
+    Tuple[bytes, str]
+        The object contents and its content type.
+    """
+    buffer = io.BytesIO()
+    if file_format == "csv":
+        df.to_csv(buffer, index=False)
+    elif file_format == "parquet":
+        df.to_parquet(buffer, index=False)
+    else:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_file(buffer, table.schema) as writer:
+            writer.write_table(table)
+    return buffer.getvalue(), OBJECT_CONTENT_TYPES[file_format]
+
+
+def data_stages(
+    client: FakeMinio, file_format: str, n_rows: int
+) -> Dict[str, Callable[[], object]]:
+    """
+    Upload a synthetic rates object and return the stages that process it.
+
+    Parameters
+    ----------
+    client : FakeMinio
+        The fake store the backend reads from.
+    file_format : str
+        "csv", "parquet" or "arrow".
+    n_rows : int
+        Number of rates in the object.
+
+    Returns
+    -------
+    Dict[str, Callable[[], object]]
+        A no-argument callable per stage.
+    """
+    import api.data  # noqa: PLC0415
+    from api.columnar import rates_from_frame  # noqa: PLC0415
+    from api.formats import read_frame  # noqa: PLC0415
+    from api.index import RatesIndex  # noqa: PLC0415
+    from api.responses import rates_adapter  # noqa: PLC0415
+
+    raw, content_type = encode_frame(make_rates(n_rows), file_format)
+    object_name = f"bench_rates.{file_format}"
+    client.put_object(api.data.BUCKET_NAME, object_name, raw, content_type=content_type)
+    df = read_frame(raw, file_format)
+    rates = rates_from_frame(df)
+
+    def fetch() -> bytes:
+        response = client.get_object(api.data.BUCKET_NAME, object_name)
+        return response.read()
+
+    def load() -> pd.DataFrame:
+        api.data.dataset_cache.clear()
+        return api.data.load_data_from_minio(api.data.BUCKET_NAME, object_name)
+
+    return {
+        "fetch": fetch,
+        "parse": partial(read_frame, raw, file_format),
+        "load": load,
+        "build": partial(rates_from_frame, df),
+        "index": partial(RatesIndex, df),
+        "serialize": partial(rates_adapter.dump_json, rates),
+    }
+
+
+def auth_stages() -> Dict[str, Callable[[], object]]:
+    """
+    Return the password hashing and token stages of the auth layer.
+
+    Returns
+    -------
+    Dict[str, Callable[[], object]]
+        A no-argument callable per stage.
+    """
+    from jose import jwt  # noqa: PLC0415
+
+    from api.users.auth import (  # noqa: PLC0415
+        ALGORITHM,
+        SECRET_KEY,
+        create_access_token,
+    )
+    from api.users.utils import get_password_hash, verify_password  # noqa: PLC0415
+
+    hashed = get_password_hash("bench-password")
+    token = create_access_token({"sub": "bench", "role": "admin"})
+    return {
+        "bcrypt_hash": partial(get_password_hash, "bench-password"),
+        "bcrypt_verify": partial(verify_password, "bench-password", hashed),
+        "jwt_encode": partial(create_access_token, {"sub": "bench", "role": "admin"}),
+        "jwt_decode": partial(jwt.decode, token, SECRET_KEY, algorithms=[ALGORITHM]),
+    }
+
+
+def main() -> None:
+    """Run the stage benchmarks, print a table and optionally save JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet", "arrow"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--auth-repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("FRONTEND_PORT", "3000")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+    import api.data  # noqa: PLC0415
+
+    client = FakeMinio()
+    api.data.minio_client = client  # type: ignore[assignment]
+
+    suites: List[Tuple[str, Dict[str, Callable[[], object]], int]] = [
+        (file_format, data_stages(client, file_format, args.rows), args.repeat)
+        for file_format in args.formats
+    ]
+    suites.append(("auth", auth_stages(), args.auth_repeat))
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    print(f"{'suite':>8} {'stage':>14} {'min ms':>10} {'p50 ms':>10} {'mean ms':>10}")
+    for suite, stages, repeat in suites:
+        results[suite] = {}
+        for stage, fn in stages.items():
+            fn()  # Warm up.
+            timings = time_calls(fn, repeat)
+            stats = {"min": min(timings) * 1000, **percentiles(timings)}
+            results[suite][stage] = stats
+            print(
+                f"{suite:>8} {stage:>14} {stats['min']:>10.2f} "
+                f"{stats['p50']:>10.2f} {stats['mean']:>10.2f}"
+            )
+    write_results(args.output, "stages", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Cold-start cost of the backend: importing the app and running its startup.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.startup --repeat 5 --output startup.json
+
+Each measurement runs in a fresh interpreter, as a restarted container or a new
+replica would. ``import`` is the wall-clock time of ``import api.main``, and the
+heaviest modules it pulls in are read from ``python -X importtime``, by
+cumulative time. ``first boot`` runs the startup handler against an empty
+database, which creates the tables and hashes the initial admin's password;
+``restart`` runs it again against the same database. The watcher is off, so no
+object store is needed. The data libraries are imported on a background thread
+once startup is done, so neither phase includes them.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.stats import percentiles, write_results
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import api.main
+print(time.perf_counter() - start)
+"""
+
+STARTUP_SCRIPT = """
+import asyncio, time
+import api.main
+start = time.perf_counter()
+asyncio.run(api.main.startup_event())
+print(time.perf_counter() - start)
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_script(script: str, cwd: str, *options: str) -> Tuple[float, str]:
+    """
+    Run a script in a fresh interpreter.
+
+    Parameters
+    ----------
+    script : str
+        The script, which prints a duration in seconds.
+    cwd : str
+        Working directory, where the users database is created.
+    *options : str
+        Extra interpreter options, e.g. ``-X importtime``.
+
+    Returns
+    -------
+    Tuple[float, str]
+        The printed duration and the interpreter's stderr.
+    """
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR,
+        "FRONTEND_PORT": os.environ.get("FRONTEND_PORT", "3000"),
+        "JWT_SECRET_KEY": os.environ.get("JWT_SECRET_KEY", "benchmark-secret-key"),
+        "WATCHER_MODE": "off",
+    }
+    output = subprocess.run(
+        [sys.executable, *options, "-c", script],
+        capture_output=True,
+        check=True,
+        text=True,
+        cwd=cwd,
+        env=env,
+    )
+    return float(output.stdout.strip().splitlines()[-1]), output.stderr
+
+
+def heaviest_imports(report: str, top: int) -> List[Dict[str, Any]]:
+    """
+    Return the top-level packages that take longest to import.
+
+    Parameters
+    ----------
+    report : str
+        Output of ``python -X importtime``.
+    top : int
+        Number of packages to return.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Package names and cumulative import times in milliseconds, slowest
+        first.
+    """
+    totals: Dict[str, int] = {}
+    for line in report.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        package = match.group(4).split(".")[0]
+        if package == "api":
+            continue
+        # Submodules are included in the cumulative time of the package's
+        # outermost import, which is the largest.
+        totals[package] = max(totals.get(package, 0), int(match.group(2)))
+    slowest = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [
+        {"package": package, "ms": microseconds / 1000}
+        for package, microseconds in slowest[:top]
+    ]
+
+
+def main() -> None:
+    """Run the benchmark, print a table and optionally save JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    timings: Dict[str, List[float]] = {"import": [], "first boot": [], "restart": []}
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as cwd:
+            timings["import"].append(run_script(IMPORT_SCRIPT, cwd)[0])
+            timings["first boot"].append(run_script(STARTUP_SCRIPT, cwd)[0])
+            timings["restart"].append(run_script(STARTUP_SCRIPT, cwd)[0])
+    with tempfile.TemporaryDirectory() as cwd:
+        _, report = run_script(IMPORT_SCRIPT, cwd, "-X", "importtime")
+    imports = heaviest_imports(report, args.top)
+
+    summaries = {phase: percentiles(values) for phase, values in timings.items()}
+    print(f"{'phase':>12} {'p50':>10} {'max':>10}")
+    for phase, summary in summaries.items():
+        print(f"{phase:>12} {summary['p50']:>7.1f} ms {summary['max']:>7.1f} ms")
+    print(f"\n{'package':>20} {'import':>10}")
+    for item in imports:
+        print(f"{item['package']:>20} {item['ms']:>7.1f} ms")
+    write_results(
+        args.output, "startup", args, {**summaries, "heaviest_imports": imports}
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Timing helpers and JSON result files shared by the benchmarks."""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    """
+    Return the best wall-clock time of ``repeat`` calls to ``fn``.
+
+    Parameters
+    ----------
+    fn : Callable[[], object]
+        The function to time.
+    repeat : int
+        Number of timed calls.
+
+    Returns
+    -------
+    float
+        The fastest call, in seconds.
+    """
+    return min(time_calls(fn, repeat))
+
+
+def time_calls(fn: Callable[[], object], repeat: int) -> List[float]:
+    """
+    Time ``repeat`` calls to ``fn``.
+
+    Parameters
+    ----------
+    fn : Callable[[], object]
+        The function to time.
+    repeat : int
+        Number of timed calls.
+
+    Returns
+    -------
+    List[float]
+        The duration of each call, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """
+    Summarize latencies in milliseconds.
+
+    Parameters
+    ----------
+    latencies : List[float]
+        Latencies in seconds.
+
+    Returns
+    -------
+    Dict[str, float]
+        The mean, p50, p95, p99 and max latencies in milliseconds.
+    """
+    if not latencies:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    values = np.asarray(latencies) * 1000
+    return {
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Return the commit of the working tree, None outside a git checkout."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=os.path.dirname(__file__),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def write_results(
+    path: Optional[str], benchmark: str, args: Any, results: Dict[str, Any]
+) -> None:
+    """
+    Write benchmark results to a JSON file, with the context they were run in.
+
+    Compare two files with ``python -m benchmarks.compare``.
+
+    Parameters
+    ----------
+    path : Optional[str]
+        The file to write, None to skip writing.
+    benchmark : str
+        Name of the benchmark.
+    args : Any
+        The parsed command-line arguments.
+    results : Dict[str, Any]
+        The measurements.
+    """
+    if path is None:
+        return
+    document = {
+        "benchmark": benchmark,
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "args": vars(args),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results written to {path}")
@@ -1,5 +1,33 @@
+import argparse
+import io
+import json
+import urllib.request
+
+import pandas as pd
 from minio import Minio
 
+
+parser = argparse.ArgumentParser(description="Upload the scorecard data to MinIO.")
+parser.add_argument(
+    "--format",
+    choices=["csv", "parquet"],
+    default="csv",
+    help="Upload the CSVs as-is, or convert them to Parquet first.",
+)
+parser.add_argument(
+    "--row-group-size",
+    type=int,
+    default=64 * 1024,
+    help="Rows per Parquet row group.",
+)
+parser.add_argument(
+    "--materialize-url",
+    help="Backend URL to recompile the response snapshots after uploading, "
+    "e.g. http://localhost:8000/admin/materialize.",
+)
+parser.add_argument("--token", help="Admin access token for --materialize-url.")
+args = parser.parse_args()
+
 minio_client = Minio(
     "localhost:9000", access_key="minioadmin", secret_key="minioadmin", secure=False
 )
@@ -14,5 +42,33 @@ if not minio_client.bucket_exists(bucket_name):
 files = ["delirium_rates.csv", "time_trends.csv", "demographics.csv"]
 
 for file in files:
-    minio_client.fput_object(bucket_name, file, file)
-    print(f"'{file}' is successfully uploaded to bucket '{bucket_name}'.")
+    if args.format == "csv":
+        minio_client.fput_object(bucket_name, file, file, content_type="text/csv")
+        print(f"'{file}' is successfully uploaded to bucket '{bucket_name}'.")
+        continue
+
+    df = pd.read_csv(file)
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False, row_group_size=args.row_group_size)
+    object_name = file.removesuffix(".csv") + ".parquet"
+    minio_client.put_object(
+        bucket_name,
+        object_name,
+        io.BytesIO(buffer.getvalue()),
+        length=buffer.tell(),
+        content_type="application/vnd.apache.parquet",
+    )
+    print(
+        f"'{file}' is successfully uploaded to bucket '{bucket_name}' as '{object_name}'."
+    )
+
+if args.materialize_url:
+    request = urllib.request.Request(
+        args.materialize_url,
+        method="POST",
+        headers={"Authorization": f"Bearer {args.token}"},
+    )
+    with urllib.request.urlopen(request) as response:
+        snapshots = json.load(response)
+    for name, snapshot in snapshots.items():
+        print(f"Snapshot '{name}' compiled ({snapshot['size']} bytes).")